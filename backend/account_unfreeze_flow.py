@@ -1,12 +1,19 @@
+import logging
+
 from .whatsapp_api import send_message
-from .utils import loads, dumps, validate_phone, validate_email, validate_pin_code, validate_date_of_birth
+from .utils import loads, dumps, generate_reference_number
 from .complaint_flow import PERSONAL_INFO_FIELDS
+from . import form_parser, metrics
+
+logger = logging.getLogger(__name__)
 
-def start_account_unfreeze(db, wa_id):
+@metrics.timed(metrics.HANDLER_SECONDS)
+def start_account_unfreeze(db, wa_id, cs=None):
     """Start account unfreeze flow"""
     from .models import ConversationState
     
-    cs = db.query(ConversationState).filter_by(wa_id=wa_id).first()
+    if cs is None:
+        cs = db.query(ConversationState).filter_by(wa_id=wa_id).first()
     if not cs:
         cs = ConversationState(wa_id=wa_id, state="account_unfreeze:ask_account", meta=dumps({}))
         db.add(cs)
@@ -17,6 +24,7 @@ def start_account_unfreeze(db, wa_id):
     
     send_message(wa_id, "Please provide your Account Number:")
 
+@metrics.timed(metrics.HANDLER_SECONDS)
 def handle_account_number(db, wa_id, account_number):
     """Handle account number input"""
     from .models import Complaint, ConversationState
@@ -47,6 +55,7 @@ def handle_account_number(db, wa_id, account_number):
     
     send_message(wa_id, f"Account Number: {account_number}\n\nPlease provide your details:\n\n{PERSONAL_INFO_FIELDS[0][1]}:")
 
+@metrics.timed(metrics.HANDLER_SECONDS)
 def handle_account_unfreeze_personal_info(db, wa_id, text):
     """Handle personal information for account unfreeze"""
     from .models import Complaint, ConversationState
@@ -67,48 +76,20 @@ def handle_account_unfreeze_personal_info(db, wa_id, text):
     
     if field_index >= len(PERSONAL_INFO_FIELDS):
         # All info collected, finalize
-        from .utils import generate_reference_number
-        reference_number = generate_reference_number(complaint.id)
-        complaint.reference_number = reference_number
-        complaint.status = "submitted"
-        db.commit()
-        
-        # Generate PDF
-        try:
-            from .reports import save_pdf_for_complaint
-            save_pdf_for_complaint(complaint)
-        except Exception as e:
-            print(f"PDF generation error: {e}")
-        
-        cs.state = "idle"
-        cs.meta = dumps({})
-        db.commit()
-        
-        send_message(wa_id, f"✅ Account Unfreeze Request Submitted!\n\n📋 Reference Number: {reference_number}\n\nOur agent will call or message you shortly to solve your issue.\n\nThank you for using 1930 Cyber Crime Helpline, Odisha.")
+        finalize_request(db, wa_id, complaint, cs)
         return
     
     field_name, field_label = PERSONAL_INFO_FIELDS[field_index]
     text = text.strip()
     
-    # Validation
-    if field_name == "phone_number" and not validate_phone(text):
-        send_message(wa_id, "Invalid phone number. Please enter a valid 10-digit Indian phone number:")
-        return
-    
-    if field_name == "email_id" and not validate_email(text):
-        send_message(wa_id, "Invalid email address. Please enter a valid email:")
-        return
-    
-    if field_name == "pin_code" and not validate_pin_code(text):
-        send_message(wa_id, "Invalid PIN code. Please enter a valid 6-digit PIN code:")
-        return
-    
-    if field_name == "date_of_birth" and not validate_date_of_birth(text):
-        send_message(wa_id, "Invalid date format. Please enter date in DD/MM/YYYY format:")
+    # Validation: the normalized value (10-digit phone, ISO date, ...) is what gets stored
+    value = form_parser.normalize_field(field_name, text)
+    if value is None:
+        send_message(wa_id, f"{form_parser.ERROR_MESSAGES[field_name]}:")
         return
     
     # Save the answer
-    setattr(complaint, field_name, text)
+    setattr(complaint, field_name, value)
     db.commit()
     
     # Move to next field
@@ -121,22 +102,22 @@ def handle_account_unfreeze_personal_info(db, wa_id, text):
         send_message(wa_id, f"{next_field_label}:")
     else:
         # All info collected, finalize
-        from .utils import generate_reference_number
-        reference_number = generate_reference_number(complaint.id)
-        complaint.reference_number = reference_number
-        complaint.status = "submitted"
-        db.commit()
-        
-        # Generate PDF
-        try:
-            from .reports import save_pdf_for_complaint
-            save_pdf_for_complaint(complaint)
-        except Exception as e:
-            print(f"PDF generation error: {e}")
-        
-        cs.state = "idle"
-        cs.meta = dumps({})
-        db.commit()
-        
-        send_message(wa_id, f"✅ Account Unfreeze Request Submitted!\n\n📋 Reference Number: {reference_number}\n\nOur agent will call or message you shortly to solve your issue.\n\nThank you for using 1930 Cyber Crime Helpline, Odisha.")
+        finalize_request(db, wa_id, complaint, cs)
+
+def finalize_request(db, wa_id, complaint, cs):
+    """Assign the reference, submit and reset the conversation in one commit, then send the PDF and confirmation"""
+    reference_number = generate_reference_number(complaint.id)
+    complaint.reference_number = reference_number
+    complaint.status = "submitted"
+    cs.state = "idle"
+    cs.meta = dumps({})
+    db.commit()
+
+    # Generate PDF
+    try:
+        from .reports import save_pdf_for_complaint
+        save_pdf_for_complaint(complaint)
+    except Exception as e:
+        logger.exception("PDF generation failed for complaint %s", complaint.id)
 
+    send_message(wa_id, f"✅ Account Unfreeze Request Submitted!\n\n📋 Reference Number: {reference_number}\n\nOur agent will call or message you shortly to solve your issue.\n\nThank you for using 1930 Cyber Crime Helpline, Odisha.")
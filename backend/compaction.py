@@ -0,0 +1,292 @@
+"""
+Compaction of the hot tables.
+
+- draft complaints nobody touched for DRAFT_TTL are deleted (with their documents),
+  unless a conversation that is still active is filling them in
+- conversation states at rest (idle, menu, other_query) are deleted after
+  SESSION_IDLE_TTL; states in the middle of a flow are kept as long as drafts
+  (DRAFT_TTL) and then deleted together with the draft they point to
+- expired status-check verification tokens are purged
+- complaints resolved more than ARCHIVE_RESOLVED_AFTER ago move to complaints_archive
+  (one row per complaint, the full record as JSON) and out of complaints
+
+Runs as a background thread in the API (COMPACTION_INTERVAL) or from the command line:
+
+    python -m backend.compaction [--dry-run] [--vacuum]
+
+With several worker processes only one runs the background passes: the one
+holding an exclusive lock on a file next to the SQLite database. The others
+try to take it over at every interval, so compaction moves on when that
+worker exits.
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import selectinload
+
+from . import verification
+from .config import ARCHIVE_RESOLVED_AFTER, COMPACTION_INTERVAL, DRAFT_TTL, SESSION_IDLE_TTL
+from .models import ArchivedComplaint, Complaint, ComplaintDocument, ConversationState
+from .utils import loads
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single process, nothing to coordinate
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+# Conversation states that are not in the middle of a flow
+RESTING_STATES = ("idle", "menu", "other_query")
+
+# Stored columns of complaints (generated columns are recomputed by SQLite)
+_COLUMNS = [column.name for column in Complaint.__table__.columns if column.computed is None]
+_DATETIME_COLUMNS = {"created_at", "updated_at"}
+
+_stop = threading.Event()
+_thread = None
+_runner_lock = None
+
+
+def _page_bytes(db, pragma):
+    """PRAGMA page_count / freelist_count in bytes (None on other databases)"""
+    if db.get_bind().dialect.name != "sqlite":
+        return None
+    page_size = db.execute(text("PRAGMA page_size")).scalar()
+    return db.execute(text(f"PRAGMA {pragma}")).scalar() * page_size
+
+
+def _ids(query):
+    return [row[0] for row in query.limit(BATCH_SIZE).all()]
+
+
+def _delete_complaints(db, ids):
+    db.query(ComplaintDocument).filter(ComplaintDocument.complaint_id.in_(ids)).delete(synchronize_session=False)
+    db.query(Complaint).filter(Complaint.id.in_(ids)).delete(synchronize_session=False)
+
+
+def archive_payload(complaint):
+    payload = {}
+    for name in _COLUMNS:
+        value = getattr(complaint, name)
+        payload[name] = value.isoformat() if isinstance(value, datetime) else value
+    payload["documents"] = [document.path for document in complaint.attachments]
+    return json.dumps(payload, separators=(",", ":"))
+
+
+def restore(archived):
+    """Transient (not session-bound) Complaint rebuilt from an archive row"""
+    payload = json.loads(archived.payload)
+    payload.pop("documents", None)
+    for name in _DATETIME_COLUMNS:
+        if payload.get(name):
+            payload[name] = datetime.fromisoformat(payload[name])
+    return Complaint(**{name: payload.get(name) for name in _COLUMNS})
+
+
+def expire_drafts(db, now, dry_run=False):
+    cutoff = now - timedelta(seconds=DRAFT_TTL)
+    # Drafts an active conversation points to; their states expire below, with them
+    held_id = func.json_extract(ConversationState.meta, "$.complaint_id")
+    in_use = db.query(held_id).filter(ConversationState.updated_at >= cutoff, held_id.isnot(None))
+    query = db.query(Complaint.id).filter(
+        Complaint.status == "draft", Complaint.updated_at < cutoff, Complaint.id.notin_(in_use.scalar_subquery())
+    )
+    if dry_run:
+        return query.count()
+    removed = 0
+    while True:
+        ids = _ids(query)
+        if not ids:
+            return removed
+        _delete_complaints(db, ids)
+        db.commit()
+        removed += len(ids)
+
+
+def _held_drafts(db, rows):
+    """Ids of the drafts the given (id, meta) conversation states point to"""
+    complaint_ids = [i for i in (loads(meta).get("complaint_id") for _, meta in rows) if i]
+    if not complaint_ids:
+        return []
+    return [row[0] for row in db.query(Complaint.id).filter(Complaint.id.in_(complaint_ids), Complaint.status == "draft")]
+
+
+def expire_sessions(db, now, dry_run=False):
+    """(states, drafts) removed: resting states after SESSION_IDLE_TTL, in-flow ones with their draft after DRAFT_TTL"""
+    draft_cutoff = now - timedelta(seconds=DRAFT_TTL)
+    resting = db.query(ConversationState).filter(
+        ConversationState.state.in_(RESTING_STATES),
+        ConversationState.updated_at < now - timedelta(seconds=SESSION_IDLE_TTL),
+    )
+    in_flow = db.query(ConversationState.id, ConversationState.meta).filter(
+        ConversationState.state.notin_(RESTING_STATES),
+        ConversationState.updated_at < draft_cutoff,
+    )
+    if dry_run:
+        # Drafts old enough themselves are already counted by expire_drafts
+        held = _held_drafts(db, in_flow.all())
+        recent = db.query(Complaint.id).filter(Complaint.id.in_(held), Complaint.updated_at >= draft_cutoff).count() if held else 0
+        return resting.count() + in_flow.count(), recent
+    removed = resting.delete(synchronize_session=False)
+    db.commit()
+    drafts = 0
+    while True:
+        rows = in_flow.limit(BATCH_SIZE).all()
+        if not rows:
+            return removed, drafts
+        draft_ids = _held_drafts(db, rows)
+        if draft_ids:
+            _delete_complaints(db, draft_ids)
+        db.query(ConversationState).filter(ConversationState.id.in_([row[0] for row in rows])).delete(synchronize_session=False)
+        db.commit()
+        removed += len(rows)
+        drafts += len(draft_ids)
+
+
+def archive_resolved(db, now, dry_run=False):
+    cutoff = now - timedelta(seconds=ARCHIVE_RESOLVED_AFTER)
+    query = (
+        db.query(Complaint)
+        .options(selectinload(Complaint.attachments))
+        .filter(Complaint.status == "resolved", Complaint.updated_at < cutoff)
+    )
+    if dry_run:
+        return query.count()
+    archived = 0
+    while True:
+        complaints = query.order_by(Complaint.id).limit(BATCH_SIZE).all()
+        if not complaints:
+            return archived
+        for complaint in complaints:
+            db.merge(ArchivedComplaint(
+                id=complaint.id,
+                reference_number=complaint.reference_number,
+                wa_id=complaint.wa_id,
+                status=complaint.status,
+                created_at=complaint.created_at,
+                updated_at=complaint.updated_at,
+                archived_at=now,
+                payload=archive_payload(complaint),
+            ))
+        # Archive rows and deletes commit together, so a crash never loses a complaint
+        _delete_complaints(db, [complaint.id for complaint in complaints])
+        db.commit()
+        db.expunge_all()
+        archived += len(complaints)
+
+
+def run(db, dry_run=False, vacuum=False):
+    """One compaction pass; returns {"drafts", "sessions", "verifications", "archived", "reclaimed_bytes", ...}"""
+    now = datetime.utcnow()
+    free_before = _page_bytes(db, "freelist_count")
+    drafts = expire_drafts(db, now, dry_run)
+    sessions, session_drafts = expire_sessions(db, now, dry_run)
+    report = {
+        "drafts": drafts + session_drafts,
+        "sessions": sessions,
+        "verifications": 0 if dry_run else verification.purge_expired(db),
+        "archived": archive_resolved(db, now, dry_run),
+    }
+    report["rows"] = sum(report.values())
+    # Pages emptied by the deletes go to the freelist and are reused by later inserts
+    free_after = _page_bytes(db, "freelist_count")
+    report["reclaimed_bytes"] = free_after - free_before if free_before is not None else None
+    if vacuum and not dry_run and free_after is not None:
+        # VACUUM rewrites the file: returns free pages to the OS and repacks half-empty ones
+        size_before = _page_bytes(db, "page_count")
+        db.commit()
+        with db.get_bind().connect() as conn:
+            conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+        report["vacuumed_bytes"] = size_before - _page_bytes(db, "page_count")
+    return report
+
+
+def _lock_path(bind) -> str:
+    database = bind.url.database if bind.dialect.name == "sqlite" else None
+    if database and database != ":memory:":
+        return f"{os.path.abspath(database)}.compaction.lock"
+    return os.path.join(tempfile.gettempdir(), "chatbot-compaction.lock")
+
+
+def _is_runner(bind) -> bool:
+    """True in the one process that runs background passes against this database"""
+    global _runner_lock
+    if _runner_lock is not None or fcntl is None:
+        return True
+    lock = open(_lock_path(bind), "a")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock.close()
+        return False
+    # Held until this process exits (or stop_background), then another worker takes over
+    _runner_lock = lock
+    logger.info("Running background compaction in this process")
+    return True
+
+
+def _loop(session_factory):
+    while not _stop.wait(COMPACTION_INTERVAL):
+        db = session_factory()
+        if not _is_runner(db.get_bind()):
+            db.close()
+            continue
+        try:
+            report = run(db)
+            if report["rows"]:
+                logger.info("Compaction removed %s row(s)", report["rows"], extra={"report": report})
+        except Exception:
+            db.rollback()
+            logger.exception("Compaction failed")
+        finally:
+            db.close()
+
+
+def start_background(session_factory):
+    """Run compaction every COMPACTION_INTERVAL seconds in a daemon thread"""
+    global _thread
+    if COMPACTION_INTERVAL <= 0 or (_thread is not None and _thread.is_alive()):
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_loop, args=(session_factory,), name="compaction", daemon=True)
+    _thread.start()
+
+
+def stop_background(timeout: float = 30):
+    """Stop the loop, letting a pass that is already running finish"""
+    global _runner_lock
+    _stop.set()
+    if _thread is not None:
+        _thread.join(timeout=timeout)
+    if _runner_lock is not None and (_thread is None or not _thread.is_alive()):
+        _runner_lock.close()
+        _runner_lock = None
+
+
+if __name__ == "__main__":
+    from .db import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Expire drafts and idle sessions, archive old resolved complaints")
+    parser.add_argument("--dry-run", action="store_true", help="only count what would be removed")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM afterwards to shrink the SQLite file")
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        result = run(session, dry_run=args.dry_run, vacuum=args.vacuum)
+    finally:
+        session.close()
+    print(f"[COMPACTION] {'Would remove' if args.dry_run else 'Removed'}: drafts={result['drafts']} "
+          f"sessions={result['sessions']} verifications={result['verifications']} archived={result['archived']}")
+    if result["reclaimed_bytes"] is not None:
+        print(f"[COMPACTION] Freed {result['reclaimed_bytes']} bytes of pages"
+              + (f", file shrank by {result['vacuumed_bytes']} bytes after VACUUM" if "vacuumed_bytes" in result else ""))
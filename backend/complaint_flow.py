@@ -1,6 +1,12 @@
+import logging
 import os
-from .whatsapp_api import send_message, send_interactive_buttons, send_interactive_list
-from .utils import loads, dumps, generate_reference_number, validate_phone, validate_email, validate_pin_code, validate_date_of_birth
+from .whatsapp_api import send_message, send_interactive_buttons
+from .utils import loads, dumps, generate_reference_number
+from .config import MEDIA_DIR
+from . import form_parser
+from . import metrics
+
+logger = logging.getLogger(__name__)
 
 # Financial Fraud Types (A1.1)
 FINANCIAL_FRAUD_TYPES = {
@@ -62,8 +68,14 @@ PERSONAL_INFO_FIELDS = [
     ("pin_code", "PIN Code")
 ]
 
+# Shown with the first question: all details can be sent in one message instead
+PERSONAL_INFO_FORM_HINT = (
+    "Tip: you can send all details in one message, one per line:\n"
+    + form_parser.form_template(PERSONAL_INFO_FIELDS)
+    + "\n\nOr answer one at a time."
+)
+
 # Document types for Financial Fraud (A1.1.1)
-BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 MEDIA_PREFIX = "/media/"
 
 FINANCIAL_DOCUMENTS = [
@@ -85,45 +97,22 @@ def get_financial_fraud_menu():
     menu += "\nReply with the number (1-23):"
     return menu
 
-def send_financial_fraud_interactive(wa_id):
+def send_financial_fraud_interactive(wa_id, language=None):
     """Send financial fraud types as interactive list"""
-    from .whatsapp_api import send_interactive_list, send_message
+    from . import interactive
     
-    # Split into sections (max 10 rows per section)
-    rows = []
-    for key, value in FINANCIAL_FRAUD_TYPES.items():
-        rows.append({
-            "id": key,
-            "title": value[:24],
-            "description": ""
-        })
-    
-    # Split into sections of 10 rows each
-    sections = []
-    for i in range(0, len(rows), 10):
-        section_rows = rows[i:i+10]
-        sections.append({
-            "title": f"Types {i+1}-{min(i+10, len(rows))}",
-            "rows": section_rows
-        })
-    
-    print(f"[DEBUG] Sending financial fraud interactive list to {wa_id}")
-    result = send_interactive_list(
-        wa_id,
-        "Select the type of Financial Fraud:",
-        "Select Fraud Type",
-        sections
-    )
+    logger.debug("Sending financial fraud interactive list", extra={"wa_id": wa_id})
+    result = interactive.send(wa_id, "financial_types", language)
     
-    # The send_interactive_list function already handles fallback internally
+    # send_prepared already handles fallback internally
     # But we can add an extra check here for safety
     if result and isinstance(result, dict):
         if result.get("dry_run"):
-            print(f"[DEBUG] Dry-run mode: interactive list would be sent")
+            logger.debug("Dry-run mode: interactive list would be sent")
         elif result.get("error") and not result.get("messages"):
-            print(f"[DEBUG] Interactive list failed, fallback should have been sent")
+            logger.debug("Interactive list failed, fallback should have been sent")
         elif result.get("messages"):
-            print(f"[DEBUG] Interactive list sent successfully")
+            logger.debug("Interactive list sent successfully")
     
     return result
 
@@ -135,29 +124,11 @@ def get_social_media_menu():
     menu += "\nReply with the number (1-7):"
     return menu
 
-def send_social_media_interactive(wa_id):
+def send_social_media_interactive(wa_id, language=None):
     """Send social media platforms as interactive list"""
-    from .whatsapp_api import send_interactive_list
+    from . import interactive
     
-    rows = []
-    for key, value in SOCIAL_MEDIA_PLATFORMS.items():
-        rows.append({
-            "id": key,
-            "title": value[:24],
-            "description": ""
-        })
-    
-    sections = [{
-        "title": "Platforms",
-        "rows": rows
-    }]
-    
-    send_interactive_list(
-        wa_id,
-        "Select the platform:",
-        "Select Platform",
-        sections
-    )
+    interactive.send(wa_id, "social_platforms", language)
 
 def get_social_media_subtype_menu():
     """Generate menu for social media fraud subtypes - returns text for fallback"""
@@ -167,24 +138,14 @@ def get_social_media_subtype_menu():
     menu += "\nReply with the number (1-4):"
     return menu
 
-def send_social_media_subtype_interactive(wa_id):
+def send_social_media_subtype_interactive(wa_id, language=None):
     """Send social media subtypes as interactive buttons"""
-    from .whatsapp_api import send_interactive_buttons
+    from . import interactive
     
-    buttons = []
-    for key, value in SOCIAL_MEDIA_SUB_TYPES.items():
-        buttons.append({
-            "id": key,
-            "title": value[:20]
-        })
-    
-    send_interactive_buttons(
-        wa_id,
-        "Select the type of fraud:",
-        buttons
-    )
+    interactive.send(wa_id, "social_subtypes", language)
 
-def start_new_complaint_flow(db, wa_id, complaint_type="A"):
+@metrics.timed(metrics.HANDLER_SECONDS)
+def start_new_complaint_flow(db, wa_id, complaint_type="A", cs=None, language=None):
     """Start a new complaint flow"""
     from .models import Complaint, ConversationState
     
@@ -199,7 +160,8 @@ def start_new_complaint_flow(db, wa_id, complaint_type="A"):
     db.refresh(complaint)
     
     # Update conversation state
-    cs = db.query(ConversationState).filter_by(wa_id=wa_id).first()
+    if cs is None:
+        cs = db.query(ConversationState).filter_by(wa_id=wa_id).first()
     if not cs:
         cs = ConversationState(wa_id=wa_id, state="new_complaint:choose_category", meta=dumps({"complaint_id": complaint.id}))
         db.add(cs)
@@ -210,18 +172,17 @@ def start_new_complaint_flow(db, wa_id, complaint_type="A"):
     
     # Ask for category with interactive buttons
     if complaint_type == "A":
-        buttons = [
-            {"id": "1", "title": "Financial Fraud"},
-            {"id": "2", "title": "Social Media Fraud"}
-        ]
-        send_interactive_buttons(wa_id, "Is your complaint related to:", buttons)
+        from . import interactive
+        interactive.send(wa_id, "category", language)
     return complaint.id
 
-def handle_financial_fraud_type(db, wa_id, fraud_type_num):
+@metrics.timed(metrics.HANDLER_SECONDS)
+def handle_financial_fraud_type(db, wa_id, fraud_type_num, cs=None):
     """Handle financial fraud type selection"""
     from .models import Complaint, ConversationState
     
-    cs = db.query(ConversationState).filter_by(wa_id=wa_id).first()
+    if cs is None:
+        cs = db.query(ConversationState).filter_by(wa_id=wa_id).first()
     if not cs:
         send_message(wa_id, "Session expired. Please send 'start' to begin again.")
         return
@@ -237,8 +198,7 @@ def handle_financial_fraud_type(db, wa_id, fraud_type_num):
     # Normalize the input (strip whitespace, handle both string and numeric)
     fraud_type_num = str(fraud_type_num).strip()
     
-    print(f"[DEBUG] Processing financial fraud type: '{fraud_type_num}'")
-    print(f"[DEBUG] Available types: {list(FINANCIAL_FRAUD_TYPES.keys())}")
+    logger.debug("Processing financial fraud type %r", fraud_type_num)
     
     if fraud_type_num in FINANCIAL_FRAUD_TYPES:
         complaint.main_category = "financial_fraud"
@@ -250,18 +210,20 @@ def handle_financial_fraud_type(db, wa_id, fraud_type_num):
         cs.meta = dumps({"complaint_id": complaint_id, "field_index": 0})
         db.commit()
         
-        print(f"[DEBUG] Successfully selected: {FINANCIAL_FRAUD_TYPES[fraud_type_num]}")
-        send_message(wa_id, f"✅ Selected: {FINANCIAL_FRAUD_TYPES[fraud_type_num]}\n\nNow, please provide your personal details:\n\n{PERSONAL_INFO_FIELDS[0][1]}:")
+        logger.debug("Selected financial fraud type: %s", FINANCIAL_FRAUD_TYPES[fraud_type_num])
+        send_message(wa_id, f"✅ Selected: {FINANCIAL_FRAUD_TYPES[fraud_type_num]}\n\nNow, please provide your personal details.\n\n{PERSONAL_INFO_FORM_HINT}\n\n{PERSONAL_INFO_FIELDS[0][1]}:")
     else:
-        print(f"[DEBUG] Invalid fraud type selection: '{fraud_type_num}'")
+        logger.debug("Invalid fraud type selection %r", fraud_type_num)
         # Resend the interactive list
         send_financial_fraud_interactive(wa_id)
 
-def handle_social_media_platform(db, wa_id, platform_num):
+@metrics.timed(metrics.HANDLER_SECONDS)
+def handle_social_media_platform(db, wa_id, platform_num, cs=None):
     """Handle social media platform selection"""
     from .models import Complaint, ConversationState
     
-    cs = db.query(ConversationState).filter_by(wa_id=wa_id).first()
+    if cs is None:
+        cs = db.query(ConversationState).filter_by(wa_id=wa_id).first()
     if not cs:
         send_message(wa_id, "Session expired. Please send 'start' to begin again.")
         return
@@ -284,7 +246,7 @@ def handle_social_media_platform(db, wa_id, platform_num):
             cs.state = "new_complaint:personal_info:0"
             cs.meta = dumps({"complaint_id": complaint_id, "field_index": 0})
             db.commit()
-            send_message(wa_id, f"Selected: {SOCIAL_MEDIA_PLATFORMS[platform_num]}\n\nPlease provide your personal details:\n\n{PERSONAL_INFO_FIELDS[0][1]}:")
+            send_message(wa_id, f"Selected: {SOCIAL_MEDIA_PLATFORMS[platform_num]}\n\nPlease provide your personal details.\n\n{PERSONAL_INFO_FORM_HINT}\n\n{PERSONAL_INFO_FIELDS[0][1]}:")
         else:
             # Ask for subtype with interactive buttons
             cs.state = "new_complaint:social_subtype"
@@ -295,11 +257,13 @@ def handle_social_media_platform(db, wa_id, platform_num):
     else:
         send_message(wa_id, "Invalid selection. Please reply with a number between 1-7:")
 
-def handle_social_media_subtype(db, wa_id, subtype_num):
+@metrics.timed(metrics.HANDLER_SECONDS)
+def handle_social_media_subtype(db, wa_id, subtype_num, cs=None):
     """Handle social media fraud subtype selection"""
     from .models import Complaint, ConversationState
     
-    cs = db.query(ConversationState).filter_by(wa_id=wa_id).first()
+    if cs is None:
+        cs = db.query(ConversationState).filter_by(wa_id=wa_id).first()
     if not cs:
         send_message(wa_id, "Session expired. Please send 'start' to begin again.")
         return
@@ -321,10 +285,11 @@ def handle_social_media_subtype(db, wa_id, subtype_num):
         cs.meta = dumps({"complaint_id": complaint_id, "field_index": 0})
         db.commit()
 
-        send_message(wa_id, f"Selected: {SOCIAL_MEDIA_SUB_TYPES[subtype_num]}\n\nNow, please provide your personal details:\n\n{PERSONAL_INFO_FIELDS[0][1]}:")
+        send_message(wa_id, f"Selected: {SOCIAL_MEDIA_SUB_TYPES[subtype_num]}\n\nNow, please provide your personal details.\n\n{PERSONAL_INFO_FORM_HINT}\n\n{PERSONAL_INFO_FIELDS[0][1]}:")
     else:
         send_message(wa_id, "Invalid selection. Please reply with a number between 1-4:")
 
+@metrics.timed(metrics.HANDLER_SECONDS)
 def handle_personal_info_answer(db, wa_id, text):
     """Handle personal information collection"""
     from .models import Complaint, ConversationState
@@ -348,32 +313,31 @@ def handle_personal_info_answer(db, wa_id, text):
         handle_document_collection(db, wa_id)
         return
     
-    field_name, field_label = PERSONAL_INFO_FIELDS[field_index]
-    text = text.strip()
-    
-    # Validation
-    if field_name == "phone_number" and not validate_phone(text):
-        send_message(wa_id, "Invalid phone number. Please enter a valid 10-digit Indian phone number:")
-        return
-    
-    if field_name == "email_id" and not validate_email(text):
-        send_message(wa_id, "Invalid email address. Please enter a valid email:")
+    # Several "Label: value" lines or a Flow form response: take them all at once
+    details = form_parser.parse_details(text)
+    if len(details) >= 2 or (details and text.lstrip().startswith("{")):
+        _apply_personal_details(db, wa_id, cs, complaint, details)
         return
     
-    if field_name == "pin_code" and not validate_pin_code(text):
-        send_message(wa_id, "Invalid PIN code. Please enter a valid 6-digit PIN code:")
-        return
+    field_name, field_label = PERSONAL_INFO_FIELDS[field_index]
+    text = text.strip()
     
-    if field_name == "date_of_birth" and not validate_date_of_birth(text):
-        send_message(wa_id, "Invalid date format. Please enter date in DD/MM/YYYY format:")
+    # Validation: the normalized value (10-digit phone, ISO date, ...) is what gets stored
+    value = form_parser.normalize_field(field_name, text)
+    if value is None:
+        send_message(wa_id, f"{form_parser.ERROR_MESSAGES[field_name]}:")
         return
     
     # Save the answer
-    setattr(complaint, field_name, text)
+    setattr(complaint, field_name, value)
     db.commit()
+    if field_name == "phone_number":
+        # This complaint is now the latest one for the number
+        from .complaint_lookup import forget_phone
+        forget_phone(value)
     
-    # Move to next field
-    field_index += 1
+    # Move to next field (skipping any already given in a pasted form)
+    field_index = _next_missing_field(complaint, field_index + 1)
     if field_index < len(PERSONAL_INFO_FIELDS):
         cs.state = f"new_complaint:personal_info:{field_index}"
         cs.meta = dumps({"complaint_id": complaint_id, "field_index": field_index})
@@ -387,6 +351,46 @@ def handle_personal_info_answer(db, wa_id, text):
         db.commit()
         handle_document_collection(db, wa_id)
 
+def _next_missing_field(complaint, start=0):
+    """Index of the first empty personal detail at or after `start` (len(PERSONAL_INFO_FIELDS) if none)"""
+    for index in range(start, len(PERSONAL_INFO_FIELDS)):
+        if not getattr(complaint, PERSONAL_INFO_FIELDS[index][0]):
+            return index
+    return len(PERSONAL_INFO_FIELDS)
+
+def _apply_personal_details(db, wa_id, cs, complaint, details):
+    """Save every valid field of a pasted/Flow form in one commit and ask only for what is left"""
+    valid, errors = form_parser.validate_details(details)
+    for field_name, value in valid.items():
+        setattr(complaint, field_name, value)
+    
+    complaint_id = complaint.id
+    field_index = _next_missing_field(complaint)
+    if field_index < len(PERSONAL_INFO_FIELDS):
+        cs.state = f"new_complaint:personal_info:{field_index}"
+        cs.meta = dumps({"complaint_id": complaint_id, "field_index": field_index})
+    else:
+        cs.state = "new_complaint:documents"
+        cs.meta = dumps({"complaint_id": complaint_id})
+    missing = [field for field in PERSONAL_INFO_FIELDS if not getattr(complaint, field[0])]
+    db.commit()
+    if "phone_number" in valid:
+        from .complaint_lookup import forget_phone
+        forget_phone(valid["phone_number"])
+    
+    if not missing:
+        send_message(wa_id, f"✅ Received all {len(PERSONAL_INFO_FIELDS)} details.")
+        handle_document_collection(db, wa_id)
+        return
+    
+    message = f"✅ Saved {len(valid)} detail(s)."
+    if errors:
+        message += "\n\n" + "\n".join(f"• {msg}" for msg in errors.values())
+    message += "\n\nStill needed:\n" + form_parser.form_template(missing)
+    message += f"\n\nSend them the same way, or reply with your {missing[0][1]}:"
+    send_message(wa_id, message)
+
+@metrics.timed(metrics.HANDLER_SECONDS)
 def handle_document_collection(db, wa_id):
     """Handle document collection phase"""
     from .models import Complaint, ConversationState
@@ -454,18 +458,17 @@ def _normalize_document_path(value: str) -> str:
     if value.startswith("./media/"):
         return "/" + value.lstrip("./")
     abs_path = os.path.abspath(value)
-    media_root = os.path.join(BASE_DIR, "media")
-    if abs_path.startswith(media_root):
-        rel = os.path.relpath(abs_path, BASE_DIR).replace("\\", "/")
-        return "/" + rel
+    if abs_path.startswith(MEDIA_DIR):
+        rel = os.path.relpath(abs_path, MEDIA_DIR).replace("\\", "/")
+        return MEDIA_PREFIX + rel
     return value
 
 
+@metrics.timed(metrics.HANDLER_SECONDS)
 def handle_document_upload(db, wa_id, document_url_or_path):
     """Handle document upload (image URL or file path)"""
-    from .models import Complaint, ConversationState
+    from .models import Complaint, ComplaintDocument, ConversationState
     from .whatsapp_api import send_interactive_buttons
-    import json
     
     cs = db.query(ConversationState).filter_by(wa_id=wa_id).first()
     if not cs:
@@ -480,11 +483,8 @@ def handle_document_upload(db, wa_id, document_url_or_path):
         send_message(wa_id, "Error: Complaint not found. Please send 'start' to begin again.")
         return
     
-    # Add document to list
-    documents = json.loads(complaint.documents or "[]")
-    normalized = _normalize_document_path(document_url_or_path)
-    documents.append(normalized)
-    complaint.documents = json.dumps(documents)
+    # Append the document: one INSERT, the existing ones are not read or rewritten
+    db.add(ComplaintDocument(complaint_id=complaint.id, path=_normalize_document_path(document_url_or_path)))
     db.commit()
     
     # Send confirmation with interactive buttons
@@ -494,11 +494,13 @@ def handle_document_upload(db, wa_id, document_url_or_path):
     ]
     send_interactive_buttons(wa_id, "✅ Document received successfully!\n\nWhat would you like to do next?", buttons)
 
-def finalize_complaint(db, wa_id):
+@metrics.timed(metrics.HANDLER_SECONDS)
+def finalize_complaint(db, wa_id, cs=None):
     """Finalize and submit the complaint"""
     from .models import Complaint, ConversationState
     
-    cs = db.query(ConversationState).filter_by(wa_id=wa_id).first()
+    if cs is None:
+        cs = db.query(ConversationState).filter_by(wa_id=wa_id).first()
     if not cs:
         send_message(wa_id, "Session expired. Please send 'start' to begin again.")
         return
@@ -511,10 +513,12 @@ def finalize_complaint(db, wa_id):
         send_message(wa_id, "Error: Complaint not found. Please send 'start' to begin again.")
         return
     
-    # Generate reference number
+    # Reference number, submission and state reset go out in one commit
     reference_number = generate_reference_number(complaint.id)
     complaint.reference_number = reference_number
     complaint.status = "submitted"
+    cs.state = "idle"
+    cs.meta = dumps({})
     db.commit()
     
     # Generate PDF report
@@ -522,12 +526,7 @@ def finalize_complaint(db, wa_id):
         from .reports import save_pdf_for_complaint
         save_pdf_for_complaint(complaint)
     except Exception as e:
-        print(f"PDF generation error: {e}")
-
-    # Reset conversation state
-    cs.state = "idle"
-    cs.meta = dumps({})
-    db.commit()
+        logger.exception("PDF generation failed for complaint %s", complaint.id)
     
     # Send confirmation
     send_message(wa_id, f"✅ Complaint submitted successfully!\n\n📋 Reference Number: {reference_number}\n\nOur agent will call or message you shortly to follow up on your complaint.\n\nThank you for using 1930 Cyber Crime Helpline, Odisha.")
@@ -0,0 +1,97 @@
+"""
+Complaint lookups for status checks.
+
+- reference numbers embed the complaint id, so they resolve by primary key
+  (falling back to complaints_archive for archived complaints)
+- mobile numbers resolve through the (phone_normalized, created_at) index; the
+  id of the latest complaint per phone is kept in a small TTL cache
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from . import compaction
+from .config import COMPLAINT_LOOKUP_CACHE_SIZE, COMPLAINT_LOOKUP_CACHE_TTL
+from .models import ArchivedComplaint, Complaint
+from .utils import normalize_phone, parse_reference_number
+
+_latest_by_phone: "OrderedDict[str, tuple]" = OrderedDict()  # phone -> (complaint_id, expires_at)
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def find_by_id(db, complaint_id) -> Optional[Complaint]:
+    """Complaint by primary key, including archived ones (returned detached, read-only)"""
+    complaint = db.get(Complaint, complaint_id)
+    if complaint is None:
+        # Old resolved complaints are moved out of the hot table by compaction
+        archived = db.get(ArchivedComplaint, complaint_id)
+        complaint = compaction.restore(archived) if archived is not None else None
+    return complaint
+
+
+def find_by_reference(db, reference: str) -> Optional[Complaint]:
+    """Primary-key lookup; the full reference must still match the stored one"""
+    complaint_id = parse_reference_number(reference)
+    if complaint_id is None:
+        return None
+    complaint = find_by_id(db, complaint_id)
+    if complaint is None or complaint.reference_number != reference.strip():
+        return None
+    return complaint
+
+
+def _cached_id(phone: str) -> Optional[int]:
+    with _lock:
+        entry = _latest_by_phone.get(phone)
+        if entry is None or entry[1] < time.monotonic():
+            _stats["misses"] += 1
+            return None
+        _latest_by_phone.move_to_end(phone)
+        _stats["hits"] += 1
+        return entry[0]
+
+
+def _remember(phone: str, complaint_id: int):
+    if COMPLAINT_LOOKUP_CACHE_SIZE <= 0:
+        return
+    with _lock:
+        _latest_by_phone[phone] = (complaint_id, time.monotonic() + COMPLAINT_LOOKUP_CACHE_TTL)
+        _latest_by_phone.move_to_end(phone)
+        while len(_latest_by_phone) > COMPLAINT_LOOKUP_CACHE_SIZE:
+            _latest_by_phone.popitem(last=False)
+
+
+def latest_for_phone(db, phone: str) -> Optional[Complaint]:
+    """Most recent complaint filed with this mobile number (any format)"""
+    phone = normalize_phone(phone)
+    if not phone:
+        return None
+    complaint_id = _cached_id(phone)
+    if complaint_id is not None:
+        complaint = db.get(Complaint, complaint_id)
+        if complaint is not None and complaint.phone_normalized == phone:
+            return complaint
+    complaint = (
+        db.query(Complaint)
+        .filter(Complaint.phone_normalized == phone)
+        .order_by(Complaint.created_at.desc())
+        .first()
+    )
+    if complaint is not None:
+        _remember(phone, complaint.id)
+    return complaint
+
+
+def forget_phone(phone: str):
+    """Drop the cached entry when a complaint starts using this number"""
+    phone = normalize_phone(phone)
+    with _lock:
+        if _latest_by_phone.pop(phone, None) is not None:
+            _stats["invalidations"] += 1
+
+
+def stats():
+    with _lock:
+        return {**_stats, "size": len(_latest_by_phone)}
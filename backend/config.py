@@ -6,5 +6,84 @@ VERIFY_TOKEN = os.getenv("VERIFY_TOKEN", "cyberbot123")
 WHATSAPP_TOKEN = os.getenv("WHATSAPP_TOKEN", "")  # from Meta WhatsApp Cloud API
 PHONE_NUMBER_ID = os.getenv("PHONE_NUMBER_ID", "")  # from Meta
 GRAPH_VERSION = os.getenv("GRAPH_VERSION", "v21.0")
+GRAPH_API_BASE = os.getenv("GRAPH_API_BASE", "https://graph.facebook.com")  # e.g. http://localhost:8092 for scripts/stub_graph.py
 DEBUG_PRINT_REPLY = os.getenv("DEBUG_PRINT_REPLY", "1")  # if 1, prints replies when no token
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MEDIA_DIR = os.getenv("MEDIA_DIR", os.path.join(_ROOT, "media"))  # downloaded user images, served at /media
+REPORTS_DIR = os.getenv("REPORTS_DIR", os.path.join(_ROOT, "reports"))  # generated complaint PDFs
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "AlzaSyA_CPSofwYwYgz6ishOMR6HsQGgwyLO2kA")  # Google Gemini API key
+
+# Cache for generated "other query" / unclear-input answers
+NLU_CACHE_SIZE = int(os.getenv("NLU_CACHE_SIZE", "512"))  # max cached answers (0 disables)
+NLU_CACHE_TTL = float(os.getenv("NLU_CACHE_TTL", "3600"))  # seconds
+NLU_CACHE_SIMILARITY = float(os.getenv("NLU_CACHE_SIMILARITY", "0.85"))  # near-duplicate threshold (0-1)
+
+# Gemini upstream limits
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "8"))  # seconds, generated answers
+GEMINI_INTENT_TIMEOUT = float(os.getenv("GEMINI_INTENT_TIMEOUT", "3"))  # seconds, intent detection (has keyword fallback)
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))  # in-flight requests per process
+GEMINI_HEDGE_AFTER = float(os.getenv("GEMINI_HEDGE_AFTER", "2.5"))  # seconds before a hedged retry (0 disables)
+GEMINI_BREAKER_THRESHOLD = int(os.getenv("GEMINI_BREAKER_THRESHOLD", "5"))  # consecutive failures to open
+GEMINI_BREAKER_RESET = float(os.getenv("GEMINI_BREAKER_RESET", "30"))  # seconds before a probe call
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT", "")  # e.g. http://localhost:8090 for the stand-in server (REST transport)
+
+# Micro-batching of intent classification (0 disables)
+NLU_BATCH_WINDOW_MS = float(os.getenv("NLU_BATCH_WINDOW_MS", "5"))
+NLU_BATCH_MAX = int(os.getenv("NLU_BATCH_MAX", "16"))
+
+# Run schema migrations at startup when the database is behind (set to 0 when
+# `python -m backend.migrations` runs as a separate deploy step)
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "1")
+
+# Stream "Other Queries" answers and send them sentence by sentence (0 sends the full answer at once)
+NLU_STREAMING = os.getenv("NLU_STREAMING", "1")
+
+# Max tokens of user text spliced into a prompt (longer messages are truncated)
+PROMPT_USER_TOKEN_BUDGET = int(os.getenv("PROMPT_USER_TOKEN_BUDGET", "200"))
+
+# Status checks: latest complaint id per mobile number
+COMPLAINT_LOOKUP_CACHE_SIZE = int(os.getenv("COMPLAINT_LOOKUP_CACHE_SIZE", "10000"))  # 0 disables
+COMPLAINT_LOOKUP_CACHE_TTL = float(os.getenv("COMPLAINT_LOOKUP_CACHE_TTL", "300"))  # seconds
+
+# Status checks: how long a completed verification lets the same WhatsApp user skip it
+STATUS_VERIFICATION_TTL = float(os.getenv("STATUS_VERIFICATION_TTL", "1800"))  # seconds (0 disables)
+
+# Reference numbers: 1930-YYYYMMDD-NN-XXXXX, NN = this writer's node id. Give every
+# node/database that issues references its own id so they never collide
+NODE_ID = int(os.getenv("NODE_ID", "1"))  # 0-99
+
+# Compaction (python -m backend.compaction, or the background job below)
+DRAFT_TTL = float(os.getenv("DRAFT_TTL", "259200"))  # seconds an untouched draft complaint is kept (72h)
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "86400"))  # seconds before a conversation at rest (idle, menu, other_query) is dropped; mid-flow ones follow DRAFT_TTL
+ARCHIVE_RESOLVED_AFTER = float(os.getenv("ARCHIVE_RESOLVED_AFTER", "7776000"))  # seconds after resolution before archiving (90 days)
+COMPACTION_INTERVAL = float(os.getenv("COMPACTION_INTERVAL", "3600"))  # seconds between background runs (0 disables)
+
+# Tracing: spans are exported as OTLP/JSON to a file (one batch per line) and/or an
+# OTLP/HTTP collector. Both empty: trace ids are still kept, nothing is exported
+TRACE_FILE = os.getenv("TRACE_FILE", "")  # e.g. traces.jsonl
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "")  # e.g. http://localhost:4318/v1/traces
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "chatbot-backend")
+TRACE_EXPORT_INTERVAL = float(os.getenv("TRACE_EXPORT_INTERVAL", "2"))  # seconds between export batches
+
+# Logging: JSON lines on stdout, written by a background thread
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")  # per module, e.g. backend.nlu=DEBUG,backend.whatsapp_api=WARNING
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # json, or text for local development
+LOG_DEBUG_SAMPLE = int(os.getenv("LOG_DEBUG_SAMPLE", "1"))  # keep 1 in N debug records of each kind
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # records waiting to be written; beyond that they are dropped
+
+# Admin endpoints (/_admin/profile); empty disables them
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "")  # shared by the workers of one node (default: <tmp>/chatbot-profiles)
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "10"))  # stack sampling period
+
+# Database shared by all workers. SQLite runs in WAL mode so readers never wait
+# for the writer; concurrent writers queue for up to SQLITE_BUSY_TIMEOUT
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./chatbot.db")
+SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", "10"))  # seconds
+
+# Multi-worker mode (gunicorn.conf.py sets it): each worker writes its metrics here
+# every METRICS_SYNC_INTERVAL seconds and /metrics serves the sum over the node
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+METRICS_SYNC_INTERVAL = float(os.getenv("METRICS_SYNC_INTERVAL", "5"))
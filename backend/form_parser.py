@@ -0,0 +1,169 @@
+"""
+One-message entry of the personal details form.
+
+Users can paste every detail in one message, one "Label: value" per line, or
+submit a WhatsApp Flow form (nfm_reply). All fields are extracted and validated
+in one pass so the bot only has to ask for what is missing or invalid.
+
+normalize_field() is also what the one-field-per-message flows store: the
+normalized value from validators (10-digit phone, ISO date of birth, ...).
+"""
+import json
+import re
+from typing import Dict, Optional, Tuple
+
+from . import validators
+
+# Cleaned label -> PERSONAL_INFO_FIELDS name. Labels are lower-cased with punctuation
+# turned into spaces, so "Father/Spouse/Guardian Name" and the Flow key
+# "father_spouse_guardian_name" both clean to "father spouse guardian name".
+FIELD_ALIASES = {
+    "name": "name",
+    "full name": "name",
+    "your name": "name",
+    "father spouse guardian name": "father_spouse_guardian_name",
+    "father spouse guardian": "father_spouse_guardian_name",
+    "father name": "father_spouse_guardian_name",
+    "fathers name": "father_spouse_guardian_name",
+    "spouse name": "father_spouse_guardian_name",
+    "guardian name": "father_spouse_guardian_name",
+    "guardian": "father_spouse_guardian_name",
+    "date of birth": "date_of_birth",
+    "date of birth dd mm yyyy": "date_of_birth",
+    "dob": "date_of_birth",
+    "birth date": "date_of_birth",
+    "phone number": "phone_number",
+    "phone": "phone_number",
+    "mobile": "phone_number",
+    "mobile number": "phone_number",
+    "mobile no": "phone_number",
+    "phone no": "phone_number",
+    "contact number": "phone_number",
+    "email id": "email_id",
+    "email": "email_id",
+    "e mail": "email_id",
+    "mail": "email_id",
+    "gender": "gender",
+    "gender male female other": "gender",
+    "sex": "gender",
+    "village": "village",
+    "village town": "village",
+    "town": "village",
+    "post office": "post_office",
+    "po": "post_office",
+    "police station": "police_station",
+    "ps": "police_station",
+    "thana": "police_station",
+    "district": "district",
+    "dist": "district",
+    "pin code": "pin_code",
+    "pincode": "pin_code",
+    "pin": "pin_code",
+}
+
+_APOSTROPHE = re.compile(r"['’]")
+_LABEL_CLEAN = re.compile(r"[^a-z0-9]+")
+_SPACED_DASH = re.compile(r"\s[-–=]\s")
+_BULLET = re.compile(r"^\s*(?:[•*\-]|\d{1,2}[.)])\s*")
+
+ERROR_MESSAGES = {
+    "phone_number": "Invalid phone number. Please enter a valid 10-digit Indian phone number",
+    "email_id": "Invalid email address. Please enter a valid email",
+    "pin_code": "Invalid PIN code. Please enter a valid 6-digit PIN code",
+    "date_of_birth": "Invalid date of birth. Please enter a real past date in DD/MM/YYYY format",
+}
+
+# Must be valid; the normalized value is stored
+_VALIDATORS = {
+    "phone_number": validators.phone,
+    "email_id": validators.email,
+    "pin_code": validators.pin_code,
+    "date_of_birth": validators.date_of_birth,
+}
+# Canonical spelling when recognised, otherwise stored as given
+_NORMALIZERS = {
+    "gender": validators.gender,
+    "district": validators.district,
+}
+
+
+def field_for_label(label: str) -> Optional[str]:
+    label = _APOSTROPHE.sub("", label.lower())
+    return FIELD_ALIASES.get(_LABEL_CLEAN.sub(" ", label).strip())
+
+
+def _split_line(line: str) -> Optional[Tuple[str, str]]:
+    line = _BULLET.sub("", line)
+    if ":" in line:
+        label, value = line.split(":", 1)
+    else:
+        # "Label - value" / "Label = value"; a bare dash would split dates like 01-01-1990
+        match = _SPACED_DASH.search(line)
+        if not match:
+            return None
+        label, value = line[:match.start()], line[match.end():]
+    return label, value.strip()
+
+
+def parse_flow_response(text: str) -> Dict[str, str]:
+    """Fields of a WhatsApp Flow response (the nfm_reply response_json)"""
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    fields = {}
+    for key, value in data.items():
+        field = field_for_label(str(key))
+        if field and value not in (None, ""):
+            fields[field] = str(value).strip()
+    return fields
+
+
+def parse_details(text: str) -> Dict[str, str]:
+    """Extract {field: value} from a pasted form or a Flow response; unknown labels are ignored"""
+    text = (text or "").strip()
+    if text.startswith("{"):
+        return parse_flow_response(text)
+    fields = {}
+    for line in text.splitlines():
+        parts = _split_line(line)
+        if not parts:
+            continue
+        field = field_for_label(parts[0])
+        if field and parts[1]:
+            fields[field] = parts[1]
+    return fields
+
+
+def is_form(text: str) -> bool:
+    """True when the message carries at least two labelled fields"""
+    return len(parse_details(text)) >= 2
+
+
+def normalize_field(field: str, value: str) -> Optional[str]:
+    """The value to store for `field`, or None if it is invalid"""
+    value = (value or "").strip()
+    check = _VALIDATORS.get(field)
+    if check is not None:
+        return check(value)
+    normalize = _NORMALIZERS.get(field)
+    return (normalize(value) if normalize else None) or value
+
+
+def validate_details(fields: Dict[str, str]) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Split parsed fields into (valid, errors): normalized values, and field -> message"""
+    valid, errors = {}, {}
+    for field, value in fields.items():
+        normalized = normalize_field(field, value)
+        if normalized is None:
+            errors[field] = ERROR_MESSAGES[field]
+        else:
+            valid[field] = normalized
+    return valid, errors
+
+
+def form_template(fields) -> str:
+    """The 'Label: ' lines for the given PERSONAL_INFO_FIELDS entries, ready to copy and fill"""
+    return "\n".join(f"{label}: " for _, label in fields)
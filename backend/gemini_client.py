@@ -0,0 +1,234 @@
+"""
+Deadline-bounded Gemini client used by the NLU module.
+
+- every call has a deadline (the SDK call itself also gets the timeout)
+- a global semaphore caps concurrent upstream requests per process
+- a circuit breaker fails fast after consecutive failures so callers drop to the
+  keyword fallback instead of waiting on a degraded upstream
+- a hedged second attempt is started if the first has not answered after
+  `hedge_after` seconds; whichever finishes first wins
+
+Callers in the sync routing code use `generate()`; async code can await `agenerate()`.
+`stream()` yields text pieces as Gemini produces them (no hedging), with the same
+concurrency cap and breaker; its deadline applies to the time to the first piece
+and the gaps between pieces.
+"""
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterator, Optional
+
+from . import tracing
+
+logger = logging.getLogger(__name__)
+
+
+class NLUUnavailable(Exception):
+    """Raised when Gemini cannot answer within the deadline (or the breaker is open)"""
+
+
+class CircuitBreaker:
+    """closed -> open after `failure_threshold` consecutive failures;
+    open -> half_open after `reset_timeout` seconds (one probe call allowed);
+    half_open -> closed on success, back to open on failure."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open":
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = "half_open"
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning("Circuit breaker opened after %d consecutive failures", self._failures)
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+
+class GeminiClient:
+    stream_max_duration = 120.0  # seconds, upper bound of one whole streamed answer
+
+    def __init__(
+        self,
+        model_factory: Callable[[], object],
+        timeout: float = 8.0,
+        max_concurrency: int = 8,
+        hedge_after: float = 2.5,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self._model_factory = model_factory
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self.breaker = breaker or CircuitBreaker()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        # Abandoned attempts keep their thread until the SDK call returns, so leave headroom
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency * 2, thread_name_prefix="gemini")
+        self.stats = {"calls": 0, "failures": 0, "timeouts": 0, "hedges": 0, "short_circuited": 0, "rejected": 0}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return self._model_factory() is not None
+
+    def _count(self, name: str):
+        # Called from caller, executor and hedge threads
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    @staticmethod
+    def _options(deadline: float, max_output_tokens: Optional[int]) -> dict:
+        options = {"request_options": {"timeout": max(0.1, deadline - time.monotonic())}}
+        if max_output_tokens:
+            options["generation_config"] = {"max_output_tokens": max_output_tokens}
+        return options
+
+    def _attempt(self, prompt: str, deadline: float, max_output_tokens: Optional[int] = None) -> str:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not self._slots.acquire(timeout=remaining):
+            self._count("rejected")
+            raise NLUUnavailable("no upstream slot available before deadline")
+        try:
+            model = self._model_factory()
+            if model is None:
+                raise NLUUnavailable("Gemini is not configured")
+            with tracing.span("gemini.attempt", tracing.CLIENT):
+                response = model.generate_content(prompt, **self._options(deadline, max_output_tokens))
+            return response.text
+        finally:
+            self._slots.release()
+
+    def generate(self, prompt: str, timeout: Optional[float] = None, max_output_tokens: Optional[int] = None) -> str:
+        """Return the generated text or raise NLUUnavailable within `timeout` seconds"""
+        if not self.breaker.allow():
+            self._count("short_circuited")
+            raise NLUUnavailable("circuit breaker open")
+
+        self._count("calls")
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        hedge_at = start + self.hedge_after if 0 < self.hedge_after < timeout else None
+        pending = {self._executor.submit(tracing.wrap(self._attempt), prompt, deadline, max_output_tokens)}
+        last_error = None
+
+        while pending:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            until = deadline if hedge_at is None else min(deadline, hedge_at)
+            done, pending = wait(pending, timeout=until - now, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                self.breaker.record_success()
+                return result
+            if hedge_at is not None and (time.monotonic() >= hedge_at or not pending):
+                # First attempt is slow (or already failed): start the hedged attempt
+                hedge_at = None
+                self._count("hedges")
+                pending.add(self._executor.submit(tracing.wrap(self._attempt), prompt, deadline, max_output_tokens))
+
+        self.breaker.record_failure()
+        if pending:
+            self._count("timeouts")
+            raise NLUUnavailable(f"Gemini did not answer within {timeout:.1f}s")
+        self._count("failures")
+        raise NLUUnavailable(f"Gemini request failed: {last_error}")
+
+    async def agenerate(self, prompt: str, timeout: Optional[float] = None, max_output_tokens: Optional[int] = None) -> str:
+        return await asyncio.to_thread(self.generate, prompt, timeout, max_output_tokens)
+
+    def stream(self, prompt: str, timeout: Optional[float] = None, max_output_tokens: Optional[int] = None,
+               idle_timeout: Optional[float] = None) -> Iterator[str]:
+        """Yield generated text pieces as they arrive; raise NLUUnavailable if Gemini stalls or fails.
+
+        The deadline bounds Gemini only: `timeout` to the first piece, then `idle_timeout`
+        (default: timeout) between pieces. Time the caller spends between pulls (sending
+        the previous message) does not count; pieces keep arriving in the meantime.
+        """
+        if not self.breaker.allow():
+            self._count("short_circuited")
+            raise NLUUnavailable("circuit breaker open")
+
+        self._count("calls")
+        timeout = self.timeout if timeout is None else timeout
+        idle_timeout = timeout if idle_timeout is None else idle_timeout
+        # When the next piece is due; moved forward by the producer on every piece
+        due = [time.monotonic() + timeout]
+        pieces: "queue.Queue" = queue.Queue()
+        done = object()
+
+        def produce():
+            if not self._slots.acquire(timeout=max(0.0, due[0] - time.monotonic())):
+                self._count("rejected")
+                pieces.put(NLUUnavailable("no upstream slot available before deadline"))
+                return
+            try:
+                model = self._model_factory()
+                if model is None:
+                    raise NLUUnavailable("Gemini is not configured")
+                # The SDK timeout covers the whole streamed call: only a backstop for a hung connection
+                options = self._options(time.monotonic() + self.stream_max_duration, max_output_tokens)
+                for chunk in model.generate_content(prompt, stream=True, **options):
+                    due[0] = time.monotonic() + idle_timeout
+                    pieces.put(chunk.text)
+                pieces.put(done)
+            except Exception as e:
+                pieces.put(e)
+            finally:
+                self._slots.release()
+
+        self._executor.submit(tracing.wrap(produce))
+        received = False
+        while True:
+            try:
+                # Returns at once if pieces arrived while the caller was busy
+                item = pieces.get(timeout=max(0.0, due[0] - time.monotonic()))
+            except queue.Empty:
+                self._count("timeouts")
+                self.breaker.record_failure()
+                if received:
+                    raise NLUUnavailable(f"Gemini stream stalled for {idle_timeout:.1f}s")
+                raise NLUUnavailable(f"Gemini stream did not start within {timeout:.1f}s")
+            if item is done:
+                self.breaker.record_success()
+                return
+            if isinstance(item, Exception):
+                self._count("failures")
+                self.breaker.record_failure()
+                raise NLUUnavailable(f"Gemini stream failed: {item}")
+            received = True
+            yield item
@@ -0,0 +1,56 @@
+"""
+Interactive messages with static content: the main menu, the complaint category
+buttons, the fraud type / platform / subtype menus and the restart / see-menu
+buttons.
+
+They are built and JSON-encoded once per language at import; sending one only
+splices the recipient into the encoded body.
+"""
+from .complaint_flow import FINANCIAL_FRAUD_TYPES, SOCIAL_MEDIA_PLATFORMS, SOCIAL_MEDIA_SUB_TYPES
+from .language import DEFAULT_LANGUAGE, LANGUAGE_NAMES, ui_text
+from .whatsapp_api import prepare_buttons, prepare_list, send_prepared
+
+
+def _financial_sections():
+    # Split into sections (max 10 rows per section)
+    rows = [{"id": key, "title": value[:24], "description": ""} for key, value in FINANCIAL_FRAUD_TYPES.items()]
+    return [
+        {"title": f"Types {i+1}-{min(i+10, len(rows))}", "rows": rows[i:i+10]}
+        for i in range(0, len(rows), 10)
+    ]
+
+
+def _build(language):
+    def t(key):
+        return ui_text(key, language)
+
+    return {
+        "main_menu": prepare_buttons(t("menu"), [
+            {"id": "A", "title": t("menu_a")},
+            {"id": "B", "title": t("menu_b")},
+            {"id": "C", "title": t("menu_c")},
+        ]),
+        "category": prepare_buttons(t("category"), [
+            {"id": "1", "title": t("category_financial")},
+            {"id": "2", "title": t("category_social")},
+        ]),
+        "restart": prepare_buttons(t("restart"), [{"id": "start", "title": t("restart_button")}]),
+        "see_menu": prepare_buttons(t("see_menu"), [{"id": "start", "title": t("see_menu_button")}]),
+        "financial_types": prepare_list(t("financial_types"), t("financial_types_button"), _financial_sections()),
+        "social_platforms": prepare_list(t("social_platforms"), t("social_platforms_button"), [{
+            "title": t("social_platforms_section"),
+            "rows": [{"id": key, "title": value[:24], "description": ""} for key, value in SOCIAL_MEDIA_PLATFORMS.items()],
+        }]),
+        "social_subtypes": prepare_buttons(t("social_subtypes"), [
+            {"id": key, "title": value[:20]} for key, value in SOCIAL_MEDIA_SUB_TYPES.items()
+        ]),
+    }
+
+
+MESSAGES = {language: _build(language) for language in LANGUAGE_NAMES}
+
+
+def send(wa_id, name, language=None):
+    """Send the prepared message `name` in the user's language"""
+    messages = MESSAGES.get(language) or MESSAGES[DEFAULT_LANGUAGE]
+    return send_prepared(wa_id, messages[name])
@@ -0,0 +1,113 @@
+"""
+Multi-pattern keyword matcher (Aho-Corasick) used by the fallback intent detector.
+
+The automaton is compiled once from an {intent: [keywords]} table and then scans a
+message in a single pass, independent of how many keywords are registered.
+Matches are word-boundary aware: "account" does not fire inside "accountant".
+A keyword ending in "*" is a stem and only needs a boundary on its left side
+("impersonat*" matches "impersonating", "impersonation", ...).
+"""
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+
+def _is_word_char(ch: str) -> bool:
+    """Letters, digits, underscore and combining marks (Indic vowel signs) are word chars"""
+    if ch == "_":
+        return True
+    return unicodedata.category(ch)[0] in ("L", "N", "M")
+
+
+def keyword_weight(keyword: str) -> float:
+    """Phrases are more specific than single words, so they count for more"""
+    words = len(keyword.rstrip("*").split())
+    return 1.0 + 0.5 * (words - 1)
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over intent keywords with weighted scoring"""
+
+    def __init__(self, table: Dict[str, Iterable[str]]):
+        # goto[state] maps char -> next state; fail[state] is the failure link;
+        # out[state] lists (intent, weight, length, is_stem) patterns ending here.
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[str, float, int, bool]]] = [[]]
+        self.intents: List[str] = list(table.keys())
+
+        for intent, keywords in table.items():
+            for keyword in keywords:
+                self._add(intent, keyword)
+        self._build_links()
+
+    def _add(self, intent: str, keyword: str):
+        keyword = keyword.lower().strip()
+        is_stem = keyword.endswith("*")
+        pattern = keyword.rstrip("*")
+        if not pattern:
+            return
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[state][ch] = nxt
+            state = nxt
+        entry = (intent, keyword_weight(keyword), len(pattern), is_stem)
+        if entry not in self._out[state]:
+            self._out[state].append(entry)
+
+    def _build_links(self):
+        queue = deque()
+        for nxt in self._goto[0].values():
+            self._fail[nxt] = 0
+            queue.append(nxt)
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                link = self._goto[fallback].get(ch, 0)
+                self._fail[nxt] = link if link != nxt else 0
+                # Inherit the outputs of the failure state so each position is O(1) to report
+                self._out[nxt].extend(self._out[self._fail[nxt]])
+
+    def find(self, text: str) -> List[Tuple[str, int, int, float]]:
+        """Return (intent, start, end, weight) for every boundary-respecting match"""
+        text = text.lower()
+        goto, fail, out = self._goto, self._fail, self._out
+        n = len(text)
+        matches = []
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state]:
+                continue
+            for intent, weight, length, is_stem in out[state]:
+                start = i - length + 1
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if not is_stem and i + 1 < n and _is_word_char(text[i + 1]):
+                    continue
+                matches.append((intent, start, i + 1, weight))
+        return matches
+
+    def score(self, text: str) -> Dict[str, float]:
+        """Sum of keyword weights per intent; each distinct keyword counts once"""
+        scores: Dict[str, float] = {}
+        seen = set()
+        for intent, start, end, weight in self.find(text):
+            key = (intent, text[start:end].lower())
+            if key in seen:
+                continue
+            seen.add(key)
+            scores[intent] = scores.get(intent, 0.0) + weight
+        return scores
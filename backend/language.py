@@ -0,0 +1,331 @@
+"""
+Local language support for Odia, Hindi and Hinglish (romanized Hindi) messages.
+
+- script/language detection without any upstream call
+- intent keyword tables per language, compiled into the same word-boundary aware
+  matcher as the English table (romanized text is normalized first so common
+  spelling variants like "paisa"/"paise"/"pesa" or "dhokha"/"dhoka" collapse)
+- reply templates per language, built once at import
+"""
+import re
+import unicodedata
+from typing import Dict, Optional
+
+from .keyword_matcher import KeywordMatcher
+
+DEFAULT_LANGUAGE = "en"
+
+LANGUAGE_NAMES = {
+    "en": "English",
+    "hi": "Hindi",
+    "or": "Odia",
+    "hi-Latn": "Hinglish (Hindi written in English letters)",
+}
+
+_ODIA = (0x0B00, 0x0B7F)
+_DEVANAGARI = (0x0900, 0x097F)
+
+# Frequent Hindi function words / verbs as typed in Latin letters
+_HINGLISH_MARKERS = frozenset("""
+hai hain nahi nahin mera meri mere mujhe kya kaise karna karo karu karein gaya gaye gayi
+ho hua hui tha thi aap apna kripya chahiye raha rahi rahe liye se ka ki ke bhai ji
+""".split())
+
+# Frequent English function words, so names and addresses don't count as English
+_ENGLISH_MARKERS = frozenset("""
+i my me is am are was were the a an to of in on for from have has had how what why when
+please can could do does did not with and it this that someone got been
+""".split())
+
+# --- Intent keyword tables ('*' marks a stem, see keyword_matcher) ---
+
+HINDI_INTENTS = {
+    "new_complaint_financial": [
+        "धोखा*", "धोखाधड़ी", "ठगी", "ठग*", "पैसे", "पैसा", "रुपये", "यूपीआई", "फ्रॉड*",
+        "स्कैम", "लेनदेन", "ट्रांजैक्शन", "पैसे कट", "बैंक से पैसे",
+    ],
+    "new_complaint_social": [
+        "हैक*", "अकाउंट हैक*", "फर्जी", "नकली", "फेक", "फेसबुक", "इंस्टाग्राम", "व्हाट्सएप",
+        "सोशल मीडिया", "प्रोफाइल",
+    ],
+    "status_check": [
+        "स्थिति", "स्टेटस", "शिकायत की स्थिति", "संदर्भ संख्या", "रेफरेंस नंबर", "ट्रैक",
+    ],
+    "account_unfreeze": [
+        "फ्रीज*", "खाता फ्रीज*", "खाता बंद", "ब्लॉक*", "अनफ्रीज*", "खाता खोल*",
+    ],
+    "other_query": [
+        "मदद", "सहायता", "जानकारी", "कैसे", "क्या करें", "सलाह",
+    ],
+}
+
+ODIA_INTENTS = {
+    "new_complaint_financial": [
+        "ଠକେଇ", "ଠକି*", "ପଇସା", "ଟଙ୍କା", "ୟୁପିଆଇ", "ଫ୍ରଡ", "ପ୍ରତାରଣା", "କାରବାର", "ଟଙ୍କା କଟି*",
+    ],
+    "new_complaint_social": [
+        "ହ୍ୟାକ*", "ନକଲି", "ଫେସବୁକ", "ଇନଷ୍ଟାଗ୍ରାମ", "ହ୍ୱାଟସଆପ", "ସୋସିଆଲ ମିଡିଆ", "ଆକାଉଣ୍ଟ ହ୍ୟାକ*",
+    ],
+    "status_check": [
+        "ସ୍ଥିତି", "ଷ୍ଟାଟସ", "ଅଭିଯୋଗ ସ୍ଥିତି", "ରେଫରେନ୍ସ ନମ୍ବର",
+    ],
+    "account_unfreeze": [
+        "ଫ୍ରିଜ*", "ଖାତା ବନ୍ଦ", "ବ୍ଲକ*", "ଅନଫ୍ରିଜ*",
+    ],
+    "other_query": [
+        "ସାହାଯ୍ୟ", "ତଥ୍ୟ", "କିପରି", "ପରାମର୍ଶ",
+    ],
+}
+
+# Romanized Hindi (and common romanized Odia) words; English words are covered by nlu.INTENTS
+ROMANIZED_INTENTS = {
+    "new_complaint_financial": [
+        "paise kat gaye", "paisa kat gaya", "paise", "paisa", "rupaye", "dhokha", "dhokhadhadi",
+        "thagi", "thag liya", "fraud ho gaya", "khate se paise", "tanka", "thakei",
+    ],
+    "new_complaint_social": [
+        "hack ho gaya", "id hack", "nakli", "farzi", "fake id",
+    ],
+    "status_check": [
+        "shikayat ki sthiti", "shikayat ka status", "complaint ka status", "status kya hai", "sthiti",
+    ],
+    "account_unfreeze": [
+        "khata freeze", "khata band", "account band", "freeze ho gaya", "unfreeze karna", "khata khol",
+    ],
+    "other_query": [
+        "madad", "sahayata", "jankari", "kya karu", "kya karein", "kaise kare",
+    ],
+}
+
+_NUKTA = "़"
+_REPEATED_VOWEL = re.compile(r"([aeiou])\1+")  # aa -> a
+_ASPIRATE = re.compile(r"([bcdgjkpt])h")  # dh -> d, kh -> k, th -> t
+
+
+def normalize_indic(text: str) -> str:
+    """NFC-normalize and drop the nukta so spelling variants match"""
+    return unicodedata.normalize("NFC", text or "").replace(_NUKTA, "")
+
+
+def normalize_roman(text: str) -> str:
+    """Collapse common transliteration variants of romanized Hindi/Odia"""
+    # Literal rewrites are str.replace; the order matters (ee -> i before collapsing vowels)
+    text = (text or "").lower().replace("ee", "i").replace("oo", "u")
+    text = _REPEATED_VOWEL.sub(r"\1", text).replace("w", "v").replace("ph", "f").replace("z", "j")
+    return _ASPIRATE.sub(r"\1", text)
+
+
+def _compile(table, normalize):
+    return KeywordMatcher({
+        intent: [normalize(keyword) for keyword in keywords]
+        for intent, keywords in table.items()
+    })
+
+
+_SCRIPT_MATCHER = _compile(
+    {intent: HINDI_INTENTS[intent] + ODIA_INTENTS[intent] for intent in HINDI_INTENTS},
+    normalize_indic,
+)
+_ROMAN_MATCHER = _compile(ROMANIZED_INTENTS, normalize_roman)
+
+
+def detect_language(text: str) -> Optional[str]:
+    """Return "or", "hi", "hi-Latn" or "en"; None when the text is too short to tell
+    (menu letters, numbers, names)."""
+    odia = devanagari = 0
+    for ch in text or "":
+        code = ord(ch)
+        if _ODIA[0] <= code <= _ODIA[1]:
+            odia += 1
+        elif _DEVANAGARI[0] <= code <= _DEVANAGARI[1]:
+            devanagari += 1
+    if odia or devanagari:
+        return "or" if odia >= devanagari else "hi"
+    words = re.findall(r"[a-z]+", (text or "").lower())
+    if len(words) < 2:
+        return None
+    markers = sum(1 for w in words if w in _HINGLISH_MARKERS)
+    if markers >= 2 or (markers and markers * 3 >= len(words)):
+        return "hi-Latn"
+    if sum(1 for w in words if w in _ENGLISH_MARKERS) >= 2:
+        return "en"
+    return None
+
+
+def local_scores(text: str) -> Dict[str, float]:
+    """Keyword scores from the Odia, Hindi and romanized tables"""
+    # Odia/Devanagari keywords can't occur in plain ASCII text
+    scores = {} if text.isascii() else _SCRIPT_MATCHER.score(normalize_indic(text))
+    for intent, score in _ROMAN_MATCHER.score(normalize_roman(text)).items():
+        scores[intent] = scores.get(intent, 0.0) + score
+    return scores
+
+
+# --- Reply templates ---
+
+REPLY_TEMPLATES = {
+    "other_query": {
+        "en": """Thank you for contacting 1930 Cyber Crime Helpline, Odisha.
+
+For general queries and guidance:
+• Send 'A' to file a new complaint
+• Send 'B' to check complaint status
+• Send 'C' for account unfreeze requests
+• Send 'start' to see the main menu
+
+For urgent matters, please call the helpline directly at 1930.
+
+How can I help you today?""",
+        "hi": """1930 साइबर क्राइम हेल्पलाइन, ओडिशा से संपर्क करने के लिए धन्यवाद।
+
+सामान्य प्रश्नों और मार्गदर्शन के लिए:
+• नई शिकायत दर्ज करने के लिए 'A' भेजें
+• शिकायत की स्थिति जानने के लिए 'B' भेजें
+• खाता अनफ्रीज़ अनुरोध के लिए 'C' भेजें
+• मुख्य मेनू देखने के लिए 'start' भेजें
+
+तत्काल सहायता के लिए सीधे 1930 पर कॉल करें।
+
+मैं आपकी क्या मदद कर सकता हूँ?""",
+        "or": """1930 ସାଇବର କ୍ରାଇମ ହେଲ୍ପଲାଇନ, ଓଡ଼ିଶା ସହ ଯୋଗାଯୋଗ କରିଥିବାରୁ ଧନ୍ୟବାଦ।
+
+ସାଧାରଣ ପ୍ରଶ୍ନ ଓ ମାର୍ଗଦର୍ଶନ ପାଇଁ:
+• ନୂଆ ଅଭିଯୋଗ ଦାଖଲ ପାଇଁ 'A' ପଠାନ୍ତୁ
+• ଅଭିଯୋଗ ସ୍ଥିତି ଜାଣିବା ପାଇଁ 'B' ପଠାନ୍ତୁ
+• ଖାତା ଅନଫ୍ରିଜ ଅନୁରୋଧ ପାଇଁ 'C' ପଠାନ୍ତୁ
+• ମୁଖ୍ୟ ମେନୁ ଦେଖିବା ପାଇଁ 'start' ପଠାନ୍ତୁ
+
+ଜରୁରୀ ଆବଶ୍ୟକତା ପାଇଁ ସିଧାସଳଖ 1930 କୁ କଲ କରନ୍ତୁ।
+
+ମୁଁ ଆପଣଙ୍କୁ କିପରି ସାହାଯ୍ୟ କରିପାରିବି?""",
+        "hi-Latn": """1930 Cyber Crime Helpline, Odisha se sampark karne ke liye dhanyavaad.
+
+Sawal aur margdarshan ke liye:
+• Nayi shikayat ke liye 'A' bhejein
+• Shikayat ka status jaanne ke liye 'B' bhejein
+• Account unfreeze ke liye 'C' bhejein
+• Main menu ke liye 'start' bhejein
+
+Zaroori madad ke liye seedhe 1930 par call karein.
+
+Main aapki kya madad kar sakta hoon?""",
+    },
+    "unclear_input": {
+        "en": """I didn't quite understand that.
+
+Please choose from the following options:
+• A - New Complaint
+• B - Status Check
+• C - Account Unfreeze
+• D - Other Queries
+
+Or send 'start' to see the main menu.""",
+        "hi": """मुझे आपका संदेश समझ नहीं आया।
+
+कृपया इनमें से एक विकल्प चुनें:
+• A - नई शिकायत
+• B - शिकायत की स्थिति
+• C - खाता अनफ्रीज़
+• D - अन्य प्रश्न
+
+या मुख्य मेनू देखने के लिए 'start' भेजें।""",
+        "or": """ମୁଁ ଆପଣଙ୍କ ବାର୍ତ୍ତା ବୁଝିପାରିଲି ନାହିଁ।
+
+ଦୟାକରି ନିମ୍ନଲିଖିତ ବିକଳ୍ପରୁ ବାଛନ୍ତୁ:
+• A - ନୂଆ ଅଭିଯୋଗ
+• B - ଅଭିଯୋଗ ସ୍ଥିତି
+• C - ଖାତା ଅନଫ୍ରିଜ
+• D - ଅନ୍ୟ ପ୍ରଶ୍ନ
+
+କିମ୍ବା ମୁଖ୍ୟ ମେନୁ ଦେଖିବା ପାଇଁ 'start' ପଠାନ୍ତୁ।""",
+        "hi-Latn": """Maaf kijiye, aapka message samajh nahi aaya.
+
+Kripya in options mein se chunein:
+• A - Nayi Shikayat
+• B - Shikayat ka Status
+• C - Account Unfreeze
+• D - Anya Sawal
+
+Ya main menu dekhne ke liye 'start' bhejein.""",
+    },
+    "answer_cut_short": {
+        "en": "Sorry, this answer was cut short. Please ask again, or call 1930 for urgent help.",
+        "hi": "क्षमा करें, यह उत्तर अधूरा रह गया। कृपया फिर से पूछें, या तुरंत मदद के लिए 1930 पर कॉल करें।",
+        "or": "କ୍ଷମା କରନ୍ତୁ, ଏହି ଉତ୍ତର ଅସମ୍ପୂର୍ଣ୍ଣ ରହିଗଲା। ଦୟାକରି ପୁଣି ପଚାରନ୍ତୁ, କିମ୍ବା ତୁରନ୍ତ ସାହାଯ୍ୟ ପାଇଁ 1930 କୁ କଲ କରନ୍ତୁ।",
+        "hi-Latn": "Maaf kijiye, yeh jawab adhoora reh gaya. Kripya dobara poochein, ya turant madad ke liye 1930 par call karein.",
+    },
+}
+
+
+def reply_template(kind: str, language: Optional[str] = None) -> str:
+    templates = REPLY_TEMPLATES[kind]
+    return templates.get(language or DEFAULT_LANGUAGE, templates[DEFAULT_LANGUAGE])
+
+
+# --- Menu and list texts (see interactive.py) ---
+
+UI_TEXT = {
+    "menu": {
+        "en": "Welcome to 1930 Cyber Crime Helpline, Odisha!\n\nPlease select an option:",
+        "hi": "1930 साइबर क्राइम हेल्पलाइन, ओडिशा में आपका स्वागत है!\n\nकृपया एक विकल्प चुनें:",
+        "or": "1930 ସାଇବର କ୍ରାଇମ ହେଲ୍ପଲାଇନ, ଓଡ଼ିଶାକୁ ସ୍ୱାଗତ!\n\nଦୟାକରି ଏକ ବିକଳ୍ପ ବାଛନ୍ତୁ:",
+        "hi-Latn": "1930 Cyber Crime Helpline, Odisha mein aapka swagat hai!\n\nKripya ek option chunein:",
+    },
+    "menu_a": {"en": "New Complaint", "hi": "नई शिकायत", "or": "ନୂଆ ଅଭିଯୋଗ", "hi-Latn": "Nayi Shikayat"},
+    "menu_b": {"en": "Status Check", "hi": "शिकायत की स्थिति", "or": "ଅଭିଯୋଗ ସ୍ଥିତି", "hi-Latn": "Shikayat Status"},
+    "menu_c": {"en": "Account Unfreeze", "hi": "खाता अनफ्रीज़", "or": "ଖାତା ଅନଫ୍ରିଜ", "hi-Latn": "Account Unfreeze"},
+    "menu_d": {
+        "en": "Or type D for Other Queries",
+        "hi": "अन्य प्रश्नों के लिए D लिखें",
+        "or": "ଅନ୍ୟ ପ୍ରଶ୍ନ ପାଇଁ D ଲେଖନ୍ତୁ",
+        "hi-Latn": "Anya sawalon ke liye D likhein",
+    },
+    "category": {
+        "en": "Is your complaint related to:",
+        "hi": "आपकी शिकायत किससे संबंधित है:",
+        "or": "ଆପଣଙ୍କ ଅଭିଯୋଗ କେଉଁଥିରେ ସମ୍ବନ୍ଧିତ:",
+        "hi-Latn": "Aapki shikayat kis se judi hai:",
+    },
+    "category_financial": {"en": "Financial Fraud", "hi": "वित्तीय धोखाधड़ी", "or": "ଆର୍ଥିକ ଠକେଇ", "hi-Latn": "Financial Fraud"},
+    "category_social": {"en": "Social Media Fraud", "hi": "सोशल मीडिया धोखाधड़ी", "or": "ସୋସିଆଲ ମିଡିଆ ଠକେଇ", "hi-Latn": "Social Media Fraud"},
+    "financial_types": {
+        "en": "Select the type of Financial Fraud:",
+        "hi": "वित्तीय धोखाधड़ी का प्रकार चुनें:",
+        "or": "ଆର୍ଥିକ ଠକେଇର ପ୍ରକାର ବାଛନ୍ତୁ:",
+        "hi-Latn": "Financial fraud ka prakar chunein:",
+    },
+    "financial_types_button": {"en": "Select Fraud Type", "hi": "प्रकार चुनें", "or": "ପ୍ରକାର ବାଛନ୍ତୁ", "hi-Latn": "Prakar Chunein"},
+    "social_platforms": {
+        "en": "Select the platform:",
+        "hi": "प्लेटफ़ॉर्म चुनें:",
+        "or": "ପ୍ଲାଟଫର୍ମ ବାଛନ୍ତୁ:",
+        "hi-Latn": "Platform chunein:",
+    },
+    "social_platforms_button": {"en": "Select Platform", "hi": "प्लेटफ़ॉर्म चुनें", "or": "ପ୍ଲାଟଫର୍ମ ବାଛନ୍ତୁ", "hi-Latn": "Platform Chunein"},
+    "social_platforms_section": {"en": "Platforms", "hi": "प्लेटफ़ॉर्म", "or": "ପ୍ଲାଟଫର୍ମ", "hi-Latn": "Platforms"},
+    "social_subtypes": {
+        "en": "Select the type of fraud:",
+        "hi": "धोखाधड़ी का प्रकार चुनें:",
+        "or": "ଠକେଇର ପ୍ରକାର ବାଛନ୍ତୁ:",
+        "hi-Latn": "Fraud ka prakar chunein:",
+    },
+    "restart": {
+        "en": "Would you like to start over?",
+        "hi": "क्या आप फिर से शुरू करना चाहेंगे?",
+        "or": "ଆପଣ ପୁଣି ଆରମ୍ଭ କରିବାକୁ ଚାହାଁନ୍ତି କି?",
+        "hi-Latn": "Kya aap phir se shuru karna chahenge?",
+    },
+    "restart_button": {"en": "Restart", "hi": "फिर से शुरू करें", "or": "ପୁଣି ଆରମ୍ଭ କରନ୍ତୁ", "hi-Latn": "Phir Shuru Karein"},
+    "see_menu": {
+        "en": "Send 'start' to see the menu:",
+        "hi": "मेनू देखने के लिए 'start' भेजें:",
+        "or": "ମେନୁ ଦେଖିବା ପାଇଁ 'start' ପଠାନ୍ତୁ:",
+        "hi-Latn": "Menu dekhne ke liye 'start' bhejein:",
+    },
+    "see_menu_button": {"en": "See Menu", "hi": "मेनू देखें", "or": "ମେନୁ ଦେଖନ୍ତୁ", "hi-Latn": "Menu Dekhein"},
+}
+
+
+def ui_text(key: str, language: Optional[str] = None) -> str:
+    texts = UI_TEXT[key]
+    return texts.get(language or DEFAULT_LANGUAGE, texts[DEFAULT_LANGUAGE])
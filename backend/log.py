@@ -0,0 +1,156 @@
+"""
+Structured logging: JSON lines on stdout, written off the request path.
+
+Modules log through the standard library (`logger = logging.getLogger(__name__)`).
+configure() installs a QueueHandler on the root logger, so a log call only
+formats the message and enqueues the record; a QueueListener thread serializes
+and writes it. When the queue is full records are dropped (and counted) rather
+than blocking a worker.
+
+- Levels: LOG_LEVEL for everything, LOG_LEVELS for single modules
+  (backend.nlu=DEBUG,backend.whatsapp_api=WARNING).
+- Sampling: with LOG_DEBUG_SAMPLE=N only 1 in N debug records of each kind
+  (logger + message template) is kept; the record carries "sampled": N.
+- Each record carries the trace and span id of the message being handled.
+"""
+import atexit
+import copy
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from .config import LOG_LEVEL, LOG_LEVELS, LOG_FORMAT, LOG_DEBUG_SAMPLE, LOG_QUEUE_SIZE
+from . import tracing
+
+stats = {"dropped": 0, "sampled_out": 0}
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "trace_id", "span_id", "sampled"}
+
+_listener: Optional[QueueListener] = None
+_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key in ("trace_id", "span_id", "sampled"):
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _ContextFilter(logging.Filter):
+    """Runs in the calling thread before the record is queued: attach the trace ids
+    (a contextvar, so it must be read here) and sample debug records"""
+
+    def __init__(self, sample_every: int):
+        super().__init__()
+        self.sample_every = max(1, sample_every)
+        self._seen: Dict[tuple, int] = {}
+
+    def filter(self, record):
+        if record.levelno <= logging.DEBUG and self.sample_every > 1:
+            key = (record.name, record.msg)
+            if len(self._seen) > 10000:
+                # Messages built with f-strings never repeat; don't let them pile up
+                self._seen.clear()
+            count = self._seen.get(key, 0)
+            self._seen[key] = count + 1
+            if count % self.sample_every:
+                stats["sampled_out"] += 1
+                return False
+            record.sampled = self.sample_every
+        span = tracing.current_span()
+        if span is not None:
+            record.trace_id = span.trace_id
+            record.span_id = span.span_id
+        return True
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    def prepare(self, record):
+        # Resolve what cannot safely cross threads (args, traceback objects) and keep
+        # the rest of the record for the formatter on the listener thread
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            stats["dropped"] += 1
+
+
+def _parse_levels(spec: str) -> Dict[str, str]:
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure(force: bool = False):
+    """Install the queue handler on the root logger (idempotent)"""
+    global _listener
+    with _lock:
+        if _listener is not None and not force:
+            return
+        if _listener is not None:
+            _listener.stop()
+
+        output = logging.StreamHandler(sys.stdout)
+        if LOG_FORMAT == "text":
+            output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+        else:
+            output.setFormatter(JsonFormatter())
+
+        records: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        handler = _NonBlockingQueueHandler(records)
+        handler.addFilter(_ContextFilter(LOG_DEBUG_SAMPLE))
+
+        root = logging.getLogger()
+        for existing in [h for h in root.handlers if isinstance(h, _NonBlockingQueueHandler)]:
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(LOG_LEVEL.upper())
+        for name, level in _parse_levels(LOG_LEVELS).items():
+            logging.getLogger(name).setLevel(level)
+
+        _listener = QueueListener(records, output, respect_handler_level=True)
+        _listener.start()
+
+
+def shutdown():
+    """Write out everything still queued"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(shutdown)
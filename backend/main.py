@@ -1,18 +1,47 @@
-import os, json
+import os, json, logging, hmac
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException, Depends
 from fastapi.responses import PlainTextResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from .config import VERIFY_TOKEN
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from .config import VERIFY_TOKEN, AUTO_MIGRATE, MEDIA_DIR, REPORTS_DIR, ADMIN_TOKEN
 from .db import SessionLocal, engine
-from .models import User, Complaint, ConversationState, Base
-from .message_router import route_message
-from .migrations import ensure_schema
+from .models import User, Complaint, ConversationState
+from .message_router import route_message, route_interactive
+from .language import detect_language
+from .migrations import migrate, schema_is_current
+from . import compaction, metrics, tracing, log, profiler
 
-Base.metadata.create_all(bind=engine)
-ensure_schema(engine)
+log.configure()
+logger = logging.getLogger(__name__)
 
-app = FastAPI(title="1930 WhatsApp Chatbot (modular)")
+@asynccontextmanager
+async def lifespan(app):
+    # Schema changes are an explicit deploy step (python -m backend.migrations);
+    # workers only check the stamped version, which is a single PRAGMA read.
+    if not schema_is_current(engine):
+        if AUTO_MIGRATE == "1":
+            logger.info("Database schema is out of date, migrating")
+            migrate(engine)
+        else:
+            logger.warning("Database schema is out of date. Run: python -m backend.migrations")
+    compaction.start_background(SessionLocal)
+    metrics.start_sync()
+    if ADMIN_TOKEN:
+        profiler.start_watcher()
+    # On SIGTERM the server stops accepting connections and waits for in-flight
+    # webhooks (each one runs its conversation turn to the end) before this resumes
+    yield
+    profiler.stop_watcher()
+    compaction.stop_background()
+    metrics.stop_sync()
+    tracing.flush()
+    log.shutdown()
+
+app = FastAPI(title="1930 WhatsApp Chatbot (modular)", lifespan=lifespan)
 
 # Add CORS middleware to allow frontend to access the API
 app.add_middleware(
@@ -23,7 +52,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-MEDIA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "media")
+metrics.instrument_engine(engine)
+
+@metrics.register_collector
+def _nlu_metrics():
+    from . import nlu
+    upstream = nlu.upstream_stats()
+    breaker = upstream.pop("breaker")
+    for name, value in upstream.items():
+        yield "chatbot_gemini_calls_total", "counter", "Gemini client call outcomes", {"outcome": name}, value
+    yield "chatbot_gemini_breaker_open", "gauge", "1 while the Gemini circuit breaker is open", {}, int(breaker == "open")
+    cache = nlu.cache_stats()
+    for name in ("hits_exact", "hits_near", "misses", "evictions", "expirations"):
+        yield "chatbot_nlu_cache_total", "counter", "NLU response cache lookups and removals", {"result": name}, cache[name]
+    yield "chatbot_nlu_cache_size", "gauge", "Entries in the NLU response cache", {}, cache["size"]
+
+@metrics.register_collector
+def _telemetry_metrics():
+    yield "chatbot_log_records_dropped_total", "counter", "Log records dropped because the log queue was full", {}, log.stats["dropped"]
+    yield "chatbot_log_records_sampled_out_total", "counter", "Debug log records skipped by sampling", {}, log.stats["sampled_out"]
+    yield "chatbot_trace_spans_dropped_total", "counter", "Finished spans dropped because the export queue was full", {}, tracing.stats["dropped"]
+
 if os.path.isdir(MEDIA_DIR):
     app.mount("/media", StaticFiles(directory=MEDIA_DIR), name="media")
 
@@ -38,6 +87,55 @@ def get_db():
 def health():
     return {"ok": True}
 
+@app.get("/metrics")
+def prometheus_metrics():
+    # With several workers (METRICS_DIR) this is the sum over all workers of the node
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+def _require_admin(request: Request):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    auth = request.headers.get("authorization", "")
+    token = request.headers.get("x-admin-token") or (auth[7:] if auth.lower().startswith("bearer ") else "")
+    if not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+@app.get("/_admin/profile")
+def admin_profile(request: Request, seconds: float = 10, mode: str = "cpu", top: int = 25,
+                  workers: str = "all", idle: bool = False):
+    """Profile the workers for `seconds`: cpu returns collapsed stacks, memory the tracemalloc top-N.
+    workers=all profiles every worker on this node, workers=self only the one serving the request;
+    idle=true keeps the stacks of waiting threads."""
+    _require_admin(request)
+    if mode not in profiler.MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(profiler.MODES)}")
+    if workers == "self":
+        try:
+            results = [profiler.profile_local(seconds, mode, top, idle)]
+        except profiler.ProfilerBusy as e:
+            raise HTTPException(status_code=409, detail=str(e))
+    else:
+        results = profiler.profile_workers(seconds, mode, top, idle)
+    profiled = [r for r in results if "error" not in r]
+    if not profiled:
+        raise HTTPException(status_code=409, detail="no worker could be profiled (already running?)")
+    headers = {"X-Profile-Workers": str(len(profiled)), "X-Profile-Skipped": str(len(results) - len(profiled))}
+    if mode == "memory":
+        return JSONResponse({"workers": results}, headers=headers)
+    lines = [line for r in profiled for line in r["collapsed"]]
+    return PlainTextResponse("\n".join(lines) + "\n", headers=headers)
+
+@app.get("/_demo/nlu/stats")
+def nlu_stats():
+    from . import nlu
+    return {
+        "response_cache": nlu.cache_stats(),
+        "gemini": nlu.upstream_stats(),
+        "upstream_calls_per_message": nlu.turn_stats(),
+        "intent_batching": nlu.batch_stats(),
+        "prompts": nlu.prompt_stats(),
+    }
+
 @app.get("/webhook")
 async def verify_webhook(request: Request):
     # Meta sends hub.mode, hub.challenge, hub.verify_token
@@ -47,8 +145,7 @@ async def verify_webhook(request: Request):
     challenge = qp.get("hub.challenge") or qp.get("challenge")
     token = qp.get("hub.verify_token") or qp.get("verify_token") or qp.get("token")
 
-    # debug logging (helpful while developing)
-    print("[WEBHOOK-VERIFY] mode:", mode, "token:", token, "expected:", VERIFY_TOKEN, "challenge:", challenge)
+    logger.info("Webhook verification", extra={"mode": mode, "token_matches": token == VERIFY_TOKEN})
 
     if mode == "subscribe" and token == VERIFY_TOKEN:
         # return the challenge string as plain text (Meta requires this)
@@ -60,6 +157,30 @@ async def verify_webhook(request: Request):
 @app.post("/webhook")
 async def incoming(request: Request, db=Depends(get_db)):
     payload = await request.json()
+    # One trace per inbound message; the worker thread inherits it (run_in_threadpool copies the context)
+    with tracing.start_trace(_first_message_id(payload), "webhook"):
+        # Routing is blocking (DB, Gemini, Graph API calls): keep it off the event loop
+        return await run_in_threadpool(process_webhook_payload, db, payload)
+
+def _first_message_id(payload):
+    for entry in payload.get('entry', []):
+        for change in entry.get('changes', []):
+            for msg in change.get('value', {}).get('messages', []) or []:
+                if msg.get('id'):
+                    return msg['id']
+    return None
+
+def _create_user(db, wa_id):
+    # Another worker may insert the same wa_id between our lookup and this insert
+    try:
+        user = User(wa_id=wa_id); db.add(user); db.commit(); db.refresh(user)
+    except IntegrityError:
+        db.rollback()
+        user = db.query(User).filter_by(wa_id=wa_id).one()
+    return user
+
+@metrics.timed(metrics.WEBHOOK_SECONDS)
+def process_webhook_payload(db, payload):
     # minimal parsing per WhatsApp Cloud API structure
     try:
         for entry in payload.get('entry', []):
@@ -71,6 +192,7 @@ async def incoming(request: Request, db=Depends(get_db)):
                     is_image = False
                     image_url = None
                     media_id = None
+                    reply_id = None
                     
                     msg_type = msg.get('type')
                     
@@ -82,11 +204,11 @@ async def incoming(request: Request, db=Depends(get_db)):
                         media_id = image_data.get('id')
                         # Get media URL from WhatsApp API
                         if media_id:
-                            from .whatsapp_api import download_media
-                            from .config import WHATSAPP_TOKEN, GRAPH_VERSION
+                            from .whatsapp_api import download_media, media_info_url
+                            from .config import WHATSAPP_TOKEN
                             if WHATSAPP_TOKEN:
                                 # Get media URL
-                                media_url = f"https://graph.facebook.com/{GRAPH_VERSION}/{media_id}"
+                                media_url = media_info_url(media_id)
                                 headers = {"Authorization": f"Bearer {WHATSAPP_TOKEN}"}
                                 try:
                                     import requests
@@ -95,7 +217,7 @@ async def incoming(request: Request, db=Depends(get_db)):
                                         media_info = r.json()
                                         image_url = download_media(media_id, media_info.get('url'))
                                 except Exception as e:
-                                    print(f"Error fetching media URL: {e}")
+                                    logger.warning("Error fetching media URL for %s: %s", media_id, e)
                                     image_url = f"media_{media_id}"
                             else:
                                 image_url = f"media_{media_id}"
@@ -104,16 +226,14 @@ async def incoming(request: Request, db=Depends(get_db)):
                         if caption:
                             text = caption
                     elif msg_type == 'interactive':
-                        # handle quick reply or button reply
+                        # Button and list replies are routed by the id we sent
                         interactive = msg.get('interactive', {})
-                        if 'button_reply' in interactive:
-                            # Prefer ID over title for better matching
-                            button_reply = interactive['button_reply']
-                            text = button_reply.get('id') or button_reply.get('title')
-                        elif 'list_reply' in interactive:
-                            # Prefer ID over title for better matching
-                            list_reply = interactive['list_reply']
-                            text = list_reply.get('id') or list_reply.get('title')
+                        reply = interactive.get('button_reply') or interactive.get('list_reply') or {}
+                        reply_id = reply.get('id')
+                        text = reply_id or reply.get('title')
+                        if 'nfm_reply' in interactive:
+                            # WhatsApp Flow form: the answers arrive as a JSON string
+                            text = interactive['nfm_reply'].get('response_json')
                     
                     if not wa_id:
                         continue
@@ -121,18 +241,26 @@ async def incoming(request: Request, db=Depends(get_db)):
                     # ensure user exists
                     user = db.query(User).filter_by(wa_id=wa_id).first()
                     if not user:
-                        user = User(wa_id=wa_id); db.add(user); db.commit(); db.refresh(user)
+                        user = _create_user(db, wa_id)
+                    
+                    # Replies follow the language the user last wrote in; menu letters,
+                    # numbers and names don't tell us anything and keep the stored one
+                    if msg_type == 'text' and text:
+                        detected = detect_language(text)
+                        if detected and detected != user.language:
+                            user.language = detected
+                            db.commit()
                     
                     # route message (handle both text and images)
                     if is_image:
-                        route_message(db, wa_id, text or "Image received", is_image=True, image_url=image_url)
+                        route_message(db, wa_id, text or "Image received", is_image=True, image_url=image_url, language=user.language)
+                    elif reply_id:
+                        route_interactive(db, wa_id, reply_id, language=user.language)
                     elif text:
-                        route_message(db, wa_id, text)
+                        route_message(db, wa_id, text, language=user.language)
         return JSONResponse({"ok": True})
     except Exception as e:
-        print('Error processing incoming webhook:', e)
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error processing incoming webhook")
         return JSONResponse({"ok": False, "error": str(e)})
 
 # demo endpoint for dashboard
@@ -140,7 +268,8 @@ from fastapi.encoders import jsonable_encoder
 @app.get("/_demo/reports")
 def list_reports(db=Depends(get_db)):
     out = []
-    for r in db.query(Complaint).order_by(Complaint.created_at.desc()).limit(200):
+    query = db.query(Complaint).options(selectinload(Complaint.attachments))
+    for r in query.order_by(Complaint.created_at.desc()).limit(200):
         out.append({
             "id": r.id,
             "reference_number": r.reference_number,
@@ -157,7 +286,7 @@ def list_reports(db=Depends(get_db)):
             "updated_at": r.updated_at.isoformat() + "Z" if r.updated_at else None,
             "user": {"wa_id": r.wa_id},
             "data": r.data,
-            "documents": r.documents
+            "documents": [d.path for d in r.attachments]
         })
     return JSONResponse(jsonable_encoder(out))
 
@@ -167,8 +296,7 @@ from fastapi.responses import FileResponse
 
 @app.get("/reports/{report_id}.pdf")
 def get_report_pdf(report_id: int):
-    reports_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "reports")
-    path = os.path.join(reports_dir, f"report_{report_id}.pdf")
+    path = os.path.join(REPORTS_DIR, f"report_{report_id}.pdf")
     if not os.path.exists(path):
         # optional: generate on-the-fly if the complaint exists but file missing
         db = next(get_db())
@@ -177,8 +305,8 @@ def get_report_pdf(report_id: int):
             try:
                 from .reports import save_pdf_for_complaint
                 save_pdf_for_complaint(comp)
-            except Exception as e:
-                print("PDF on-demand error:", e)
+            except Exception:
+                logger.exception("On-demand PDF generation failed for complaint %s", report_id)
         db.close()
     if not os.path.exists(path):
         raise HTTPException(status_code=404, detail="Report not found")
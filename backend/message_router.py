@@ -1,71 +1,100 @@
+import logging
+
 from fastapi import HTTPException
-from .whatsapp_api import send_message, send_interactive_buttons, send_interactive_list
+from sqlalchemy.exc import IntegrityError
+from .whatsapp_api import send_message, send_message_stream, send_interactive_buttons, send_interactive_list
 from .utils import loads
 from . import complaint_flow, status_flow, account_unfreeze_flow
 from .models import ConversationState
 from . import nlu
+from . import interactive
+from . import metrics, tracing
+from .language import reply_template, ui_text
 
-def route_message(db, wa_id, text, is_image=False, image_url=None):
-    """Route incoming messages to appropriate handlers"""
-    text_norm = (text or "").strip().lower()
-    original_text = text or ""
-    
-    # Ensure user has a conversation state object
+logger = logging.getLogger(__name__)
+
+def send_main_menu(wa_id, language=None):
+    # WhatsApp allows at most 3 reply buttons; D is offered as text
+    interactive.send(wa_id, "main_menu", language)
+    send_message(wa_id, ui_text("menu_d", language))
+
+OTHER_QUERY_BUTTONS = [
+    {"id": "start", "title": "Back to Menu"},
+    {"id": "help", "title": "More Help"}
+]
+
+DOCUMENT_BUTTONS = [
+    {"id": "done", "title": "✅ Done"},
+    {"id": "send_more", "title": "📎 Send More"}
+]
+
+def _get_conversation_state(db, wa_id):
+    """Ensure user has a conversation state object"""
     cs = db.query(ConversationState).filter_by(wa_id=wa_id).first()
     if not cs:
         cs = ConversationState(wa_id=wa_id, state="idle", meta="{}")
         db.add(cs)
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError:
+            # Created meanwhile by another worker handling the same user
+            db.rollback()
+            return db.query(ConversationState).filter_by(wa_id=wa_id).one()
         db.refresh(cs)
+    return cs
+
+def route_message(db, wa_id, text, is_image=False, image_url=None, language=None, message_type=None):
+    """Route incoming messages to appropriate handlers; `language` is the user's reply language"""
+    # One NLU scope per inbound message: intent is detected at most once and reused
+    with nlu.turn(text or "", language) as turn, tracing.span("route_message"):
+        _route_message(db, wa_id, text, turn, is_image=is_image, image_url=image_url,
+                       message_type=message_type or ("image" if is_image else "text"))
+
+def _route_message(db, wa_id, text, turn, is_image=False, image_url=None, message_type="text"):
+    text_norm = (text or "").strip().lower()
+    original_text = text or ""
+    
+    cs = _get_conversation_state(db, wa_id)
+    state = metrics.state_label(cs.state)
+    metrics.MESSAGES.labels(state, message_type).inc()
+    tracing.set_attribute("chatbot.state", state)
+    tracing.set_attribute("chatbot.message_type", message_type)
     
+    # Handle start/menu commands
+    if text_norm in ["start", "menu", "hi", "hello", "help"]:
+        cs.state = "menu"
+        cs.meta = "{}"
+        db.commit()
+        send_main_menu(wa_id, turn.language)
+        return
+
     # NLU: Check if user wants to file a complaint from free text (when idle)
     if cs.state == "idle" and original_text and not is_image:
-        should_route, complaint_type = nlu.should_route_to_complaint(original_text)
+        should_route, complaint_type = nlu.should_route_to_complaint(original_text, turn)
         if should_route and complaint_type:
-            print(f"[NLU] Detected complaint intent: {complaint_type}")
+            logger.debug("Detected complaint intent: %s", complaint_type)
             if complaint_type == "financial":
-                complaint_flow.start_new_complaint_flow(db, wa_id, complaint_type="A")
+                complaint_flow.start_new_complaint_flow(db, wa_id, complaint_type="A", language=turn.language)
                 # Auto-select financial fraud
                 cs = db.query(ConversationState).filter_by(wa_id=wa_id).first()
                 if cs:
                     cs.state = "new_complaint:financial_type"
                     db.commit()
-                complaint_flow.send_financial_fraud_interactive(wa_id)
+                complaint_flow.send_financial_fraud_interactive(wa_id, turn.language)
             elif complaint_type == "social":
-                complaint_flow.start_new_complaint_flow(db, wa_id, complaint_type="A")
+                complaint_flow.start_new_complaint_flow(db, wa_id, complaint_type="A", language=turn.language)
                 # Auto-select social media fraud
                 cs = db.query(ConversationState).filter_by(wa_id=wa_id).first()
                 if cs:
                     cs.state = "new_complaint:social_platform"
                     db.commit()
-                complaint_flow.send_social_media_interactive(wa_id)
+                complaint_flow.send_social_media_interactive(wa_id, turn.language)
             return
 
-    # Handle start/menu commands
-    if text_norm in ["start", "menu", "hi", "hello", "help"]:
-        cs.state = "menu"
-        cs.meta = "{}"
-        db.commit()
-        menu_text = "Welcome to 1930 Cyber Crime Helpline, Odisha!\n\nPlease select an option:"
-        buttons = [
-            {"id": "A", "title": "New Complaint"},
-            {"id": "B", "title": "Status Check"},
-            {"id": "C", "title": "Account Unfreeze"},
-            {"id": "D", "title": "Other Queries"}
-        ]
-        # Send as buttons (max 3) or fallback to text
-        if len(buttons) <= 3:
-            send_interactive_buttons(wa_id, menu_text, buttons)
-        else:
-            # Split into multiple button messages or use list
-            send_interactive_buttons(wa_id, menu_text, buttons[:3])
-            send_message(wa_id, "Or type D for Other Queries")
-        return
-
     # Handle menu selections
     if cs.state == "menu":
         if text_norm in ["a", "a.", "new complaint", "new"]:
-            complaint_flow.start_new_complaint_flow(db, wa_id, complaint_type="A")
+            complaint_flow.start_new_complaint_flow(db, wa_id, complaint_type="A", language=turn.language)
             return
         elif text_norm in ["b", "b.", "status", "status check", "check status"]:
             status_flow.start_status_check(db, wa_id)
@@ -77,32 +106,15 @@ def route_message(db, wa_id, text, is_image=False, image_url=None):
             # Use Gemini NLU to handle other queries
             cs.state = "other_query"
             db.commit()
-            response = nlu.handle_other_query(original_text if original_text else "I need help")
-            send_message(wa_id, response)
+            send_message_stream(wa_id, nlu.stream_other_query(original_text if original_text else "I need help", turn.language))
             # Offer to return to menu
-            buttons = [
-                {"id": "start", "title": "Back to Menu"},
-                {"id": "help", "title": "More Help"}
-            ]
-            send_interactive_buttons(wa_id, "Would you like to:", buttons)
+            send_interactive_buttons(wa_id, "Would you like to:", OTHER_QUERY_BUTTONS)
             return
         else:
             # Use Gemini NLU to understand unclear menu selection
-            response = nlu.handle_unclear_input(original_text, context="User is at main menu")
+            response = nlu.handle_unclear_input(original_text, context="User is at main menu", language=turn.language)
             send_message(wa_id, response)
-            # Resend menu
-            menu_text = "Welcome to 1930 Cyber Crime Helpline, Odisha!\n\nPlease select an option:"
-            buttons = [
-                {"id": "A", "title": "New Complaint"},
-                {"id": "B", "title": "Status Check"},
-                {"id": "C", "title": "Account Unfreeze"},
-                {"id": "D", "title": "Other Queries"}
-            ]
-            if len(buttons) <= 3:
-                send_interactive_buttons(wa_id, menu_text, buttons)
-            else:
-                send_interactive_buttons(wa_id, menu_text, buttons[:3])
-                send_message(wa_id, "Or type D for Other Queries")
+            send_main_menu(wa_id, turn.language)
             return
 
     # Handle new complaint flow
@@ -111,32 +123,28 @@ def route_message(db, wa_id, text, is_image=False, image_url=None):
         if cs.state == "new_complaint:choose_category":
             # Handle both button ID ("1") and button title ("Financial Fraud")
             if text_norm in ["1", "financial", "financial fraud"] or "financial fraud" in text_norm:
-                print(f"[DEBUG] Category selected: Financial Fraud (input: {text})")
+                logger.debug("Category selected: Financial Fraud (input: %r)", text)
                 cs.state = "new_complaint:financial_type"
                 db.commit()
-                result = complaint_flow.send_financial_fraud_interactive(wa_id)
-                print(f"[DEBUG] Interactive list send result: {result}")
+                result = complaint_flow.send_financial_fraud_interactive(wa_id, turn.language)
+                logger.debug("Interactive list send result: %s", result)
                 return
             elif text_norm in ["2", "social", "social media", "social media fraud"] or "social media" in text_norm:
                 cs.state = "new_complaint:social_platform"
                 db.commit()
-                complaint_flow.send_social_media_interactive(wa_id)
+                complaint_flow.send_social_media_interactive(wa_id, turn.language)
                 return
             else:
                 # Use Gemini NLU to understand unclear category selection
-                response = nlu.handle_unclear_input(original_text, context="User is selecting complaint category (Financial or Social Media)")
+                response = nlu.handle_unclear_input(original_text, context="User is selecting complaint category (Financial or Social Media)", language=turn.language)
                 send_message(wa_id, response)
                 # Resend category buttons
-                buttons = [
-                    {"id": "1", "title": "Financial Fraud"},
-                    {"id": "2", "title": "Social Media Fraud"}
-                ]
-                send_interactive_buttons(wa_id, "Please choose:", buttons)
+                interactive.send(wa_id, "category", turn.language)
                 return
         
         # Handle financial fraud type
         if cs.state == "new_complaint:financial_type":
-            print(f"[DEBUG] Financial fraud type selected: {text.strip()}")
+            logger.debug("Financial fraud type selected: %r", text.strip())
             complaint_flow.handle_financial_fraud_type(db, wa_id, text.strip())
             return
         
@@ -163,22 +171,14 @@ def route_message(db, wa_id, text, is_image=False, image_url=None):
                 return
             elif text_norm in ["send_more", "send more", "📎 send more", "more"]:
                 # User wants to send more documents
-                buttons = [
-                    {"id": "done", "title": "✅ Done"},
-                    {"id": "send_more", "title": "📎 Send More"}
-                ]
-                send_interactive_buttons(wa_id, "Please send your document (image/photo):", buttons)
+                send_interactive_buttons(wa_id, "Please send your document (image/photo):", DOCUMENT_BUTTONS)
                 return
             elif is_image and image_url:
                 complaint_flow.handle_document_upload(db, wa_id, image_url)
                 return
             else:
                 # Invalid input, show buttons again
-                buttons = [
-                    {"id": "done", "title": "✅ Done"},
-                    {"id": "send_more", "title": "📎 Send More"}
-                ]
-                send_interactive_buttons(wa_id, "Please send images/photos or select an option:", buttons)
+                send_interactive_buttons(wa_id, "Please send images/photos or select an option:", DOCUMENT_BUTTONS)
             return
         
         # Fallback to general handler
@@ -209,71 +209,128 @@ def route_message(db, wa_id, text, is_image=False, image_url=None):
             cs.state = "menu"
             cs.meta = "{}"
             db.commit()
-            menu_text = "Welcome to 1930 Cyber Crime Helpline, Odisha!\n\nPlease select an option:"
-            buttons = [
-                {"id": "A", "title": "New Complaint"},
-                {"id": "B", "title": "Status Check"},
-                {"id": "C", "title": "Account Unfreeze"},
-                {"id": "D", "title": "Other Queries"}
-            ]
-            if len(buttons) <= 3:
-                send_interactive_buttons(wa_id, menu_text, buttons)
-            else:
-                send_interactive_buttons(wa_id, menu_text, buttons[:3])
-                send_message(wa_id, "Or type D for Other Queries")
+            send_main_menu(wa_id, turn.language)
             return
         elif text_norm in ["help", "more help"]:
-            response = nlu.handle_other_query(original_text if original_text else "I need more help")
-            send_message(wa_id, response)
+            send_message_stream(wa_id, nlu.stream_other_query(original_text if original_text else "I need more help", turn.language))
             return
         else:
             # Continue conversation with Gemini
-            response = nlu.handle_other_query(original_text)
-            send_message(wa_id, response)
+            send_message_stream(wa_id, nlu.stream_other_query(original_text, turn.language))
             return
 
     # Fallback: if in any active state, use Gemini NLU to understand
     if cs.state != "idle":
-        response = nlu.handle_unclear_input(original_text, context=f"User is in state: {cs.state}")
+        response = nlu.handle_unclear_input(original_text, context=f"User is in state: {cs.state}", language=turn.language)
         send_message(wa_id, response)
         # Offer to restart
-        buttons = [
-            {"id": "start", "title": "Restart"}
-        ]
-        send_interactive_buttons(wa_id, "Would you like to start over?", buttons)
+        interactive.send(wa_id, "restart", turn.language)
         return
 
-    # Default fallback: use Gemini NLU
-    intent, confidence = nlu.detect_intent(original_text)
+    # Default fallback: reuse the intent detected for the complaint check above
+    intent, confidence = turn.intent()
     if intent != "unknown" and confidence > 0.6:
         # Route based on detected intent
         if intent == "new_complaint_financial":
-            complaint_flow.start_new_complaint_flow(db, wa_id, complaint_type="A")
+            complaint_flow.start_new_complaint_flow(db, wa_id, complaint_type="A", language=turn.language)
             cs = db.query(ConversationState).filter_by(wa_id=wa_id).first()
             if cs:
                 cs.state = "new_complaint:financial_type"
                 db.commit()
-            complaint_flow.send_financial_fraud_interactive(wa_id)
+            complaint_flow.send_financial_fraud_interactive(wa_id, turn.language)
         elif intent == "new_complaint_social":
-            complaint_flow.start_new_complaint_flow(db, wa_id, complaint_type="A")
+            complaint_flow.start_new_complaint_flow(db, wa_id, complaint_type="A", language=turn.language)
             cs = db.query(ConversationState).filter_by(wa_id=wa_id).first()
             if cs:
                 cs.state = "new_complaint:social_platform"
                 db.commit()
-            complaint_flow.send_social_media_interactive(wa_id)
+            complaint_flow.send_social_media_interactive(wa_id, turn.language)
         elif intent == "status_check":
             status_flow.start_status_check(db, wa_id)
         elif intent == "account_unfreeze":
             account_unfreeze_flow.start_account_unfreeze(db, wa_id)
         else:
-            response = nlu.handle_other_query(original_text)
-            send_message(wa_id, response)
+            send_message_stream(wa_id, nlu.stream_other_query(original_text, turn.language))
     else:
         # Use Gemini for general response
-        response = nlu.handle_unclear_input(original_text)
+        response = nlu.handle_unclear_input(original_text, language=turn.language)
         send_message(wa_id, response)
         # Show menu
-        buttons = [
-            {"id": "start", "title": "See Menu"}
-        ]
-        send_interactive_buttons(wa_id, "Send 'start' to see the menu:", buttons)
+        interactive.send(wa_id, "see_menu", turn.language)
+
+# --- Interactive replies (button/list taps) ---
+# A tap carries the id we sent, so it is dispatched on (state, id) directly:
+# no text normalization or intent detection, and the conversation state is read once.
+
+def _show_menu(db, wa_id, cs, language):
+    cs.state = "menu"
+    cs.meta = "{}"
+    db.commit()
+    send_main_menu(wa_id, language)
+
+def _start_other_query(db, wa_id, cs, language):
+    cs.state = "other_query"
+    db.commit()
+    send_message(wa_id, reply_template("other_query", language))
+    send_interactive_buttons(wa_id, "Would you like to:", OTHER_QUERY_BUTTONS)
+
+def _choose_financial(db, wa_id, cs, language):
+    cs.state = "new_complaint:financial_type"
+    db.commit()
+    complaint_flow.send_financial_fraud_interactive(wa_id, language)
+
+def _choose_social(db, wa_id, cs, language):
+    cs.state = "new_complaint:social_platform"
+    db.commit()
+    complaint_flow.send_social_media_interactive(wa_id, language)
+
+def _send_more_documents(db, wa_id, cs, language):
+    send_interactive_buttons(wa_id, "Please send your document (image/photo):", DOCUMENT_BUTTONS)
+
+def _build_interactive_handlers():
+    table = {
+        ("menu", "A"): lambda db, wa_id, cs, language: complaint_flow.start_new_complaint_flow(db, wa_id, complaint_type="A", cs=cs, language=language),
+        ("menu", "B"): lambda db, wa_id, cs, language: status_flow.start_status_check(db, wa_id, cs=cs),
+        ("menu", "C"): lambda db, wa_id, cs, language: account_unfreeze_flow.start_account_unfreeze(db, wa_id, cs=cs),
+        ("menu", "D"): _start_other_query,
+        ("new_complaint:choose_category", "1"): _choose_financial,
+        ("new_complaint:choose_category", "2"): _choose_social,
+    }
+    for key in complaint_flow.FINANCIAL_FRAUD_TYPES:
+        table[("new_complaint:financial_type", key)] = (
+            lambda db, wa_id, cs, language, key=key: complaint_flow.handle_financial_fraud_type(db, wa_id, key, cs=cs))
+    for key in complaint_flow.SOCIAL_MEDIA_PLATFORMS:
+        table[("new_complaint:social_platform", key)] = (
+            lambda db, wa_id, cs, language, key=key: complaint_flow.handle_social_media_platform(db, wa_id, key, cs=cs))
+    for key in complaint_flow.SOCIAL_MEDIA_SUB_TYPES:
+        table[("new_complaint:social_subtype", key)] = (
+            lambda db, wa_id, cs, language, key=key: complaint_flow.handle_social_media_subtype(db, wa_id, key, cs=cs))
+    for state in ("new_complaint:documents", "new_complaint:documents:collecting"):
+        table[(state, "done")] = lambda db, wa_id, cs, language: complaint_flow.finalize_complaint(db, wa_id, cs=cs)
+        table[(state, "send_more")] = _send_more_documents
+    return table
+
+_INTERACTIVE_HANDLERS = _build_interactive_handlers()
+
+# Ids that mean the same in every state ("Back to Menu", "Restart", "See Menu")
+_ANY_STATE_HANDLERS = {
+    "start": _show_menu,
+    "menu": _show_menu,
+    "help": _show_menu,
+}
+
+@tracing.traced("route_interactive")
+def route_interactive(db, wa_id, reply_id, language=None):
+    """Route a button/list reply by its id; ids that don't fit the current state
+    are routed like typed text"""
+    cs = _get_conversation_state(db, wa_id)
+    handler = _INTERACTIVE_HANDLERS.get((cs.state, reply_id)) or _ANY_STATE_HANDLERS.get(reply_id)
+    if handler is None:
+        route_message(db, wa_id, reply_id, language=language, message_type="interactive")
+        return
+    state = metrics.state_label(cs.state)
+    metrics.MESSAGES.labels(state, "interactive").inc()
+    tracing.set_attribute("chatbot.state", state)
+    # Same NLU scope as typed text, so upstream calls of a tap (D streams an answer) are counted
+    with nlu.turn(reply_id, language):
+        handler(db, wa_id, cs, language)
@@ -0,0 +1,406 @@
+"""
+Prometheus metrics, served at /metrics in the text exposition format.
+
+Counters and histograms are kept in-process (per worker) behind one lock each;
+recording a value is a dict lookup, a bisect and two additions. `timed` wraps a
+function with a histogram observation, `instrument_engine` times every SQL
+statement through SQLAlchemy cursor events.
+
+With several workers (METRICS_DIR set), each worker writes a snapshot of its
+values to METRICS_DIR every METRICS_SYNC_INTERVAL seconds and on shutdown;
+whichever worker is scraped adds its own live values to the others' snapshots.
+Counters and histograms of workers that have exited keep counting, gauges only
+come from running workers.
+
+Stage histograms:
+- chatbot_webhook_seconds        whole inbound payload, parsing to last reply
+- chatbot_handler_seconds        flow handlers (complaint, status, unfreeze)
+- chatbot_nlu_seconds            intent detection and generated answers
+- chatbot_db_query_seconds       each SQL statement, by operation
+- chatbot_send_seconds           outbound Graph API calls, by message kind
+- chatbot_pdf_render_seconds     complaint PDF rendering
+"""
+import bisect
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+from .config import METRICS_DIR, METRICS_SYNC_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+_REGISTRY: List["_Metric"] = []
+_COLLECTORS: List[Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]]] = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[tuple, object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._children[()] = self._new_child()
+        _REGISTRY.append(self)
+
+    def labels(self, *values):
+        """The child for one combination of label values (created on first use)"""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _values(self) -> list:
+        """JSON-able [label values, value...] rows of this process"""
+        raise NotImplementedError
+
+    def _samples(self, values: Dict[tuple, object]) -> List[str]:
+        raise NotImplementedError
+
+    def render(self, values: Dict[tuple, object]) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples(values))
+        return "\n".join(lines)
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def _values(self):
+        return [[list(key), child.value] for key, child in list(self._children.items())]
+
+    def _merge(self, rows_per_process) -> Dict[tuple, float]:
+        merged: Dict[tuple, float] = {}
+        for rows in rows_per_process:
+            for key, value in rows:
+                merged[tuple(key)] = merged.get(tuple(key), 0.0) + value
+        return merged
+
+    def _samples(self, values):
+        return [
+            f"{self.name}{_format_labels(zip(self.labelnames, key))} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class _HistogramChild:
+    __slots__ = ("upper_bounds", "counts", "sum", "_lock")
+
+    def __init__(self, upper_bounds):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)  # last slot: above the largest bucket
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.upper_bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self):
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("child", "start")
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.start)
+        return False
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.upper_bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.upper_bounds)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    def _values(self):
+        rows = []
+        for key, child in list(self._children.items()):
+            with child._lock:
+                rows.append([list(key), list(child.counts), child.sum])
+        return rows
+
+    def _merge(self, rows_per_process) -> Dict[tuple, tuple]:
+        merged: Dict[tuple, tuple] = {}
+        for rows in rows_per_process:
+            for key, counts, total in rows:
+                previous = merged.get(tuple(key))
+                if previous is not None:
+                    counts = [a + b for a, b in zip(previous[0], counts)]
+                    total += previous[1]
+                merged[tuple(key)] = (counts, total)
+        return merged
+
+    def _samples(self, values):
+        lines = []
+        for key, (counts, total) in sorted(values.items()):
+            labels = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.upper_bounds + (float("inf"),), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(labels + [('le', _format_value(float(bound)))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+def timed(histogram: Histogram, *label_values):
+    """Decorator: observe the call duration; a labelled histogram defaults to the function name"""
+    def decorator(func):
+        if histogram.labelnames:
+            child = histogram.labels(*(label_values or (func.__name__,)))
+        else:
+            child = histogram._default
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def register_collector(func):
+    """func() yields (name, type, help, labels, value) samples read at scrape time"""
+    _COLLECTORS.append(func)
+    return func
+
+
+def snapshot() -> dict:
+    """This process's metric values, as written to METRICS_DIR"""
+    return {
+        "pid": os.getpid(),
+        "metrics": {metric.name: metric._values() for metric in _REGISTRY},
+        "collected": [[name, kind, documentation, labels, value]
+                      for collect in _COLLECTORS
+                      for name, kind, documentation, labels, value in collect()],
+    }
+
+
+def render() -> str:
+    snapshots = [snapshot()] + _peer_snapshots()
+    parts = [metric.render(metric._merge([s["metrics"].get(metric.name, []) for s in snapshots]))
+             for metric in _REGISTRY]
+    # Collected samples: summed per (name, labels), in the order the first process yields them
+    samples: Dict[tuple, list] = {}
+    for index, s in enumerate(snapshots):
+        for name, kind, documentation, labels, value in s["collected"]:
+            if kind == "gauge" and index and not s["live"]:
+                continue
+            key = (name, tuple(sorted(labels.items())))
+            if key in samples:
+                samples[key][3] += value
+            else:
+                samples[key] = [name, kind, documentation, value]
+    described = set()
+    for (_, labels), (name, kind, documentation, value) in samples.items():
+        if name not in described:
+            described.add(name)
+            parts.append(f"# HELP {name} {documentation}\n# TYPE {name} {kind}")
+        parts.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(parts) + "\n"
+
+
+# --- Across the workers of a node ---
+
+# pids are reused after a worker restarts; the suffix keeps an exited worker's file
+_snapshot_name = f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json"
+_sync_thread: Optional[threading.Thread] = None
+_stop = threading.Event()
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _peer_snapshots() -> List[dict]:
+    if not METRICS_DIR:
+        return []
+    try:
+        names = os.listdir(METRICS_DIR)
+    except FileNotFoundError:
+        return []
+    snapshots = []
+    for name in names:
+        if not name.endswith(".json") or name == _snapshot_name:
+            continue
+        try:
+            with open(os.path.join(METRICS_DIR, name)) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue  # being replaced, or removed by a restart
+        data["live"] = _alive(data.get("pid", 0))
+        snapshots.append(data)
+    return snapshots
+
+
+def write_snapshot():
+    """Write this process's values to METRICS_DIR (no-op without it)"""
+    if not METRICS_DIR:
+        return
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    path = os.path.join(METRICS_DIR, _snapshot_name)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(snapshot(), f)
+    os.replace(tmp, path)
+
+
+def _sync_loop():
+    while not _stop.wait(METRICS_SYNC_INTERVAL):
+        try:
+            write_snapshot()
+        except Exception:
+            logger.exception("Writing the metrics snapshot failed")
+
+
+def start_sync():
+    """Share this worker's metrics with the others through METRICS_DIR"""
+    global _sync_thread
+    if not METRICS_DIR or (_sync_thread is not None and _sync_thread.is_alive()):
+        return
+    _stop.clear()
+    _sync_thread = threading.Thread(target=_sync_loop, name="metrics-sync", daemon=True)
+    _sync_thread.start()
+
+
+def stop_sync():
+    """Stop syncing and write the final values, so an exiting worker's counts are kept"""
+    _stop.set()
+    if _sync_thread is not None:
+        _sync_thread.join(timeout=5)
+    try:
+        write_snapshot()
+    except Exception:
+        logger.exception("Writing the metrics snapshot failed")
+
+
+_STATE_SUFFIX = re.compile(r":\d+$")
+
+
+def state_label(state: str) -> str:
+    """Conversation state without the per-question index (new_complaint:personal_info:3 -> ...:personal_info)"""
+    return _STATE_SUFFIX.sub("", state or "idle")
+
+
+# --- Pipeline metrics ---
+
+WEBHOOK_SECONDS = Histogram("chatbot_webhook_seconds", "Time to process one inbound webhook payload")
+MESSAGES = Counter("chatbot_messages_total", "Inbound messages by conversation state and message type", ["state", "type"])
+INTENTS = Counter("chatbot_intents_total", "Detected intents by source (local, keyword, gemini)", ["intent", "source"])
+HANDLER_SECONDS = Histogram("chatbot_handler_seconds", "Flow handler time", ["handler"])
+NLU_SECONDS = Histogram("chatbot_nlu_seconds", "NLU time by operation", ["operation"])
+DB_SECONDS = Histogram("chatbot_db_query_seconds", "SQL statement time by operation", ["operation"], buckets=DB_BUCKETS)
+SEND_SECONDS = Histogram("chatbot_send_seconds", "Outbound WhatsApp API call time by message kind", ["kind"])
+PDF_SECONDS = Histogram("chatbot_pdf_render_seconds", "Complaint PDF render time")
+
+
+def instrument_engine(engine):
+    """Time every statement run through `engine` into chatbot_db_query_seconds"""
+    children = {}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("metrics_start")
+        if not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        child = children.get(operation)
+        if child is None:
+            child = children[operation] = DB_SECONDS.labels(operation)
+        child.observe(elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        started = context.connection.info.get("metrics_start") if context.connection is not None else None
+        if started:
+            started.pop()
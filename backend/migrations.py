@@ -1,5 +1,20 @@
+"""
+Schema migrations. Run once per deploy, before starting the API workers:
+
+    python -m backend.migrations
+
+The applied version is stamped in SQLite's PRAGMA user_version, so workers can
+check it with a single cheap query at startup instead of re-inspecting tables.
+Bump SCHEMA_VERSION whenever a migration step is added.
+"""
+import json
+
 from sqlalchemy import text
 
+from .utils import normalize_phone
+
+SCHEMA_VERSION = 9
+
 NEW_COLUMNS = [
     ("reference_number", "TEXT", "NULL"),
     ("complaint_type", "TEXT", "''"),
@@ -10,6 +25,7 @@ NEW_COLUMNS = [
     ("father_spouse_guardian_name", "TEXT", "''"),
     ("date_of_birth", "TEXT", "''"),
     ("phone_number", "TEXT", "''"),
+    ("phone_normalized", "TEXT", "''"),
     ("email_id", "TEXT", "''"),
     ("gender", "TEXT", "''"),
     ("village", "TEXT", "''"),
@@ -26,8 +42,9 @@ NEW_COLUMNS = [
 
 def ensure_schema(engine):
     """Add newly introduced columns if they are missing (simple sqlite migration)."""
-    with engine.connect() as conn:
-        result = conn.execute(text("PRAGMA table_info('complaints');"))
+    with engine.begin() as conn:
+        # table_xinfo also lists generated columns
+        result = conn.execute(text("PRAGMA table_xinfo('complaints');"))
         existing_columns = {row[1] for row in result}
 
         columns_after_execution = set(existing_columns)
@@ -59,3 +76,127 @@ def ensure_schema(engine):
                 )
             )
 
+        backfill_phone_normalized(conn)
+        conn.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS ix_complaints_phone_created "
+                "ON complaints (phone_normalized, created_at)"
+            )
+        )
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_complaints_created_at ON complaints (created_at)"))
+
+        drop_data_columns(conn, existing_columns)
+        backfill_documents(conn)
+        unique_conversation_states(conn)
+        drop_verification_tokens(conn)
+
+
+def backfill_phone_normalized(conn):
+    """Fill phone_normalized for rows written before the column existed (v2)."""
+    rows = conn.execute(
+        text(
+            "SELECT id, phone_number FROM complaints "
+            "WHERE (phone_normalized IS NULL OR phone_normalized = '') AND phone_number != ''"
+        )
+    ).fetchall()
+    updates = []
+    for row_id, phone in rows:
+        normalized = normalize_phone(phone)
+        if normalized:
+            updates.append({"id": row_id, "phone": normalized})
+    if updates:
+        conn.execute(text("UPDATE complaints SET phone_normalized = :phone WHERE id = :id"), updates)
+    return len(updates)
+
+
+# Generated columns over complaints.data added in v4; nothing writes those keys
+_DATA_COLUMNS = ("data_transaction_id", "data_amount")
+
+
+def drop_data_columns(conn, existing_columns):
+    """Remove the unused generated columns of complaints.data and their indexes (v8)."""
+    for column_name in _DATA_COLUMNS:
+        conn.execute(text(f"DROP INDEX IF EXISTS ix_complaints_{column_name}"))
+        if column_name in existing_columns:
+            conn.execute(text(f"ALTER TABLE complaints DROP COLUMN {column_name}"))
+
+
+def backfill_documents(conn):
+    """Move the legacy complaints.documents JSON arrays into complaint_documents (v4)."""
+    rows = conn.execute(
+        text("SELECT id, documents FROM complaints WHERE documents IS NOT NULL AND documents NOT IN ('', '[]')")
+    ).fetchall()
+    inserts = []
+    for complaint_id, documents in rows:
+        try:
+            paths = json.loads(documents)
+        except ValueError:
+            continue
+        if isinstance(paths, list):
+            inserts.extend({"complaint_id": complaint_id, "path": str(path)} for path in paths if path)
+    if inserts:
+        conn.execute(
+            text(
+                "INSERT INTO complaint_documents (complaint_id, path, created_at) "
+                "VALUES (:complaint_id, :path, CURRENT_TIMESTAMP)"
+            ),
+            inserts,
+        )
+    if rows:
+        conn.execute(text("UPDATE complaints SET documents = '[]' WHERE id = :id"), [{"id": row[0]} for row in rows])
+    return len(inserts)
+
+
+def unique_conversation_states(conn):
+    """Keep the newest conversation state per wa_id and make wa_id unique (v7)."""
+    removed = conn.execute(
+        text(
+            "DELETE FROM conversation_states WHERE id NOT IN "
+            "(SELECT MAX(id) FROM conversation_states GROUP BY wa_id)"
+        )
+    ).rowcount
+    conn.execute(
+        text("CREATE UNIQUE INDEX IF NOT EXISTS ux_conversation_states_wa_id ON conversation_states (wa_id)")
+    )
+    conn.execute(text("DROP INDEX IF EXISTS ix_conversation_states_wa_id"))  # covered by the unique one
+    return removed
+
+
+def drop_verification_tokens(conn):
+    """Recreate status_verifications without the unused UNIQUE token column (v9).
+
+    SQLite can't drop a UNIQUE column in place; the rows are short-lived
+    verified sessions, so users with a live one simply verify once more."""
+    from .models import StatusVerification
+
+    columns = {row[1] for row in conn.execute(text("PRAGMA table_info('status_verifications')"))}
+    if "token" in columns:
+        StatusVerification.__table__.drop(conn)
+        StatusVerification.__table__.create(conn)
+
+
+def current_version(engine) -> int:
+    with engine.connect() as conn:
+        return conn.execute(text("PRAGMA user_version")).scalar() or 0
+
+
+def schema_is_current(engine) -> bool:
+    return current_version(engine) >= SCHEMA_VERSION
+
+
+def migrate(engine):
+    """Create missing tables, apply column migrations and stamp the schema version."""
+    from .models import Base
+
+    Base.metadata.create_all(bind=engine)
+    ensure_schema(engine)
+    with engine.begin() as conn:
+        conn.execute(text(f"PRAGMA user_version = {SCHEMA_VERSION}"))
+
+
+if __name__ == "__main__":
+    from .db import engine
+
+    before = current_version(engine)
+    migrate(engine)
+    print(f"[MIGRATE] Schema version {before} -> {SCHEMA_VERSION}")
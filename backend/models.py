@@ -1,6 +1,8 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, ForeignKey, Integer, String, DateTime, Text, Index
+from sqlalchemy.orm import relationship, validates
 from datetime import datetime
 from .db import Base
+from .utils import normalize_phone
 
 class User(Base):
     __tablename__ = "users"
@@ -25,6 +27,7 @@ class Complaint(Base):
     father_spouse_guardian_name = Column(String, default="")
     date_of_birth = Column(String, default="")
     phone_number = Column(String, default="")
+    phone_normalized = Column(String, default="")  # 10-digit form of phone_number, kept in sync below
     email_id = Column(String, default="")
     gender = Column(String, default="")
     
@@ -37,17 +40,67 @@ class Complaint(Base):
     
     # Additional data and documents
     data = Column(Text, default="{}")  # JSON string for additional answers
-    documents = Column(Text, default="[]")  # JSON array of document file paths/URLs
+    documents = Column(Text, default="[]")  # legacy JSON array, moved to complaint_documents (v4)
     account_number = Column(String, default="")  # For account unfreeze (type C)
     acknowledgement_number = Column(String, default="")  # For status check (type B)
     
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Loaded on access; list endpoints use selectinload() to fetch all pages' documents in one query
+    attachments = relationship("ComplaintDocument", order_by="ComplaintDocument.id")
+
+    # Status checks by mobile number: latest complaint for a phone is one index seek
+    __table_args__ = (
+        Index("ix_complaints_phone_created", "phone_normalized", "created_at"),
+        # Dashboard listing: newest complaints first
+        Index("ix_complaints_created_at", "created_at"),
+    )
+
+    @validates("phone_number")
+    def _sync_phone_normalized(self, key, value):
+        self.phone_normalized = normalize_phone(value)
+        return value
+
+class ComplaintDocument(Base):
+    """One uploaded file of a complaint; appending a document is a single INSERT"""
+    __tablename__ = "complaint_documents"
+    id = Column(Integer, primary_key=True, index=True)
+    complaint_id = Column(Integer, ForeignKey("complaints.id"), nullable=False, index=True)
+    path = Column(String, nullable=False)  # URL or /media/... path
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class ArchivedComplaint(Base):
+    """Resolved complaint moved out of the hot table by backend.compaction; payload holds the full row as JSON"""
+    __tablename__ = "complaints_archive"
+    id = Column(Integer, primary_key=True)  # same id as the original complaint
+    reference_number = Column(String, index=True, unique=True)
+    wa_id = Column(String, index=True)
+    status = Column(String)
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+    payload = Column(Text, nullable=False)  # {column: value, ..., "documents": [paths]}
+
 class ConversationState(Base):
     __tablename__ = "conversation_states"
+    # One row per wa_id, also when two workers handle the same user's messages at once
+    __table_args__ = (Index("ux_conversation_states_wa_id", "wa_id", unique=True),)
     id = Column(Integer, primary_key=True, index=True)
-    wa_id = Column(String, index=True)
+    wa_id = Column(String)
     state = Column(String, default="idle")  # idle | menu | new_complaint:stepX | status_check | account_unfreeze
     meta = Column(Text, default="{}")  # small JSON to store temporary answers
-    updated_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class StatusVerification(Base):
+    """A wa_id that completed the status-check verification for a complaint, until expires_at"""
+    __tablename__ = "status_verifications"
+    id = Column(Integer, primary_key=True, index=True)
+    wa_id = Column(String, nullable=False)
+    complaint_id = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    __table_args__ = (
+        Index("ix_status_verifications_wa_complaint", "wa_id", "complaint_id"),
+    )
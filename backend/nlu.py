@@ -3,40 +3,89 @@ Natural Language Understanding (NLU) module using Google Gemini API
 Handles intent detection and query understanding for the 1930 Cyber Crime Helpline chatbot
 """
 import os
+import re
 import json
-from typing import Dict, Optional, Tuple
-from .config import GEMINI_API_KEY
-
-try:
-    import google.generativeai as genai
-    GEMINI_AVAILABLE = True
-except ImportError:
-    GEMINI_AVAILABLE = False
-    print("[WARNING] google-generativeai not installed. Install with: pip install google-generativeai")
-
-# Initialize Gemini if available
-if GEMINI_AVAILABLE and GEMINI_API_KEY:
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from .config import (
+    GEMINI_API_KEY, NLU_CACHE_SIZE, NLU_CACHE_TTL, NLU_CACHE_SIMILARITY,
+    GEMINI_TIMEOUT, GEMINI_INTENT_TIMEOUT, GEMINI_MAX_CONCURRENCY, GEMINI_HEDGE_AFTER,
+    GEMINI_BREAKER_THRESHOLD, GEMINI_BREAKER_RESET, GEMINI_API_ENDPOINT,
+    NLU_BATCH_WINDOW_MS, NLU_BATCH_MAX, NLU_STREAMING,
+)
+from .gemini_client import CircuitBreaker, GeminiClient
+from .keyword_matcher import KeywordMatcher
+from . import language as lang
+from .nlu_batcher import IntentBatcher
+from . import metrics, tracing
+from . import prompts
+from .prompts import PromptTemplate
+from .response_cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+# The Gemini SDK is heavy to import; it is loaded and configured on first use
+# so workers can serve /health (and keyword-only traffic) without paying for it.
+model = None
+_model_initialized = False
+_model_lock = threading.Lock()
+
+def _init_model():
+    try:
+        import google.generativeai as genai
+    except ImportError:
+        logger.warning("google-generativeai not installed. Install with: pip install google-generativeai")
+        return None
+    
+    if not GEMINI_API_KEY:
+        return None
     try:
-        genai.configure(api_key=GEMINI_API_KEY)
+        if GEMINI_API_ENDPOINT:
+            # Local stand-in server (scripts/stub_gemini.py) speaks the REST API only
+            genai.configure(api_key=GEMINI_API_KEY, transport="rest", client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+        else:
+            genai.configure(api_key=GEMINI_API_KEY)
         # Use gemini-1.5-flash for fast responses
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        print("[INFO] Gemini API initialized successfully")
+        gemini_model = genai.GenerativeModel('gemini-1.5-flash')
+        logger.info("Gemini API initialized")
+        return gemini_model
     except Exception as e:
-        print(f"[ERROR] Failed to initialize Gemini API: {e}")
-        model = None
-else:
-    model = None
+        logger.error("Failed to initialize Gemini API: %s", e)
+        return None
+
+def get_model():
+    """Return the Gemini model (None when unavailable), initializing it on first call"""
+    global model, _model_initialized
+    if not _model_initialized:
+        with _model_lock:
+            if not _model_initialized:
+                model = _init_model()
+                _model_initialized = True
+    return model
+
+# Every upstream call goes through this client: deadlines, concurrency cap, circuit breaker
+gemini = GeminiClient(
+    get_model,
+    timeout=GEMINI_TIMEOUT,
+    max_concurrency=GEMINI_MAX_CONCURRENCY,
+    hedge_after=GEMINI_HEDGE_AFTER,
+    breaker=CircuitBreaker(GEMINI_BREAKER_THRESHOLD, GEMINI_BREAKER_RESET),
+)
 
 # Intent categories
 INTENTS = {
     "new_complaint_financial": [
-        "scammed", "fraud", "money stuck", "lost money", "cheated", "fraudulent transaction", 
+        "scammed", "fraud*", "money stuck", "lost money", "cheated", "fraudulent transaction", 
         "upi fraud", "payment fraud", "stuck", "money", "payment", "transaction", "upi", 
         "debit card", "credit card", "bank", "transfer", "scam", "fraudulent"
     ],
     "new_complaint_social": [
         "account hacked", "fake account", "impersonation", "social media", "facebook", 
-        "instagram", "whatsapp hacked", "hacked", "fake", "impersonat", "twitter", "x.com",
+        "instagram", "whatsapp hacked", "hacked", "fake", "impersonat*", "twitter", "x.com",
         "telegram", "gmail", "youtube", "account"
     ],
     "status_check": [
@@ -53,6 +102,124 @@ INTENTS = {
     ]
 }
 
+# Compiled once at import; keyword detection is the degraded-mode path when Gemini is down
+_KEYWORD_MATCHER = KeywordMatcher(INTENTS)
+
+# Messages in these languages are tried against the local tables before Gemini;
+# a hit at this confidence is enough for the router to act on (it routes at > 0.6)
+LOCAL_LANGUAGES = ("or", "hi", "hi-Latn")
+LOCAL_INTENT_MIN_CONFIDENCE = 0.65
+
+# Generated answers for repeated FAQs ("what is 1930", "how to report UPI fraud")
+response_cache = ResponseCache(
+    max_entries=NLU_CACHE_SIZE,
+    ttl_seconds=NLU_CACHE_TTL,
+    similarity=NLU_CACHE_SIMILARITY,
+)
+
+class TurnNLU:
+    """NLU results for one inbound message.
+    Computed on first use and reused by every routing branch, so a message costs at
+    most one intent detection no matter how many branches look at it."""
+
+    def __init__(self, text: str, language: Optional[str] = None):
+        self.text = text
+        self.language = language or lang.DEFAULT_LANGUAGE
+        self.upstream_calls = 0
+        self._intent: Optional[Tuple[str, float]] = None
+
+    def intent(self) -> Tuple[str, float]:
+        if self._intent is None:
+            self._intent = detect_intent(self.text)
+        return self._intent
+
+_current_turn: ContextVar[Optional[TurnNLU]] = ContextVar("nlu_turn", default=None)
+
+# Histogram of upstream (Gemini) calls per inbound message: {calls: messages}
+_turn_stats_lock = threading.Lock()
+_upstream_calls_histogram: Dict[int, int] = {}
+
+@contextmanager
+def turn(text: str, language: Optional[str] = None):
+    """Scope NLU work to one inbound message and record its upstream call count.
+    `language` is the user's reply language (User.language)."""
+    current = TurnNLU(text, language)
+    token = _current_turn.set(current)
+    try:
+        yield current
+    finally:
+        _current_turn.reset(token)
+        with _turn_stats_lock:
+            _upstream_calls_histogram[current.upstream_calls] = _upstream_calls_histogram.get(current.upstream_calls, 0) + 1
+
+def _count_upstream_call():
+    current = _current_turn.get()
+    if current is not None:
+        current.upstream_calls += 1
+
+def _complete(template: PromptTemplate, prompt: str, timeout: Optional[float] = None,
+              max_output_tokens: Optional[int] = None) -> str:
+    """Call Gemini with a rendered registry prompt and record its token/latency accounting"""
+    start = time.perf_counter()
+    try:
+        with tracing.span("gemini.generate", **{"gemini.prompt": template.name}):
+            text = gemini.generate(prompt, timeout=timeout, max_output_tokens=max_output_tokens or template.max_output_tokens)
+    except Exception:
+        template.record_error()
+        raise
+    template.record(prompt, text, time.perf_counter() - start)
+    return text
+
+def _generate(template: PromptTemplate, prompt: str, timeout: Optional[float] = None) -> str:
+    """Call Gemini, counting the call against the current turn"""
+    _count_upstream_call()
+    return _complete(template, prompt, timeout=timeout)
+
+def _extract_json(response_text: str) -> str:
+    """Strip markdown code fences around a JSON answer"""
+    response_text = response_text.strip()
+    if "```json" in response_text:
+        response_text = response_text.split("```json")[1].split("```")[0].strip()
+    elif "```" in response_text:
+        response_text = response_text.split("```")[1].split("```")[0].strip()
+    return response_text
+
+def _parse_intent(result: dict) -> Tuple[str, float]:
+    return result.get("intent", "unknown"), float(result.get("confidence", 0.0))
+
+def _classify_single(user_message: str) -> Tuple[str, float]:
+    """One Gemini round trip for one message"""
+    prompt = prompts.INTENT.render(user_message)
+    response_text = _complete(prompts.INTENT, prompt, timeout=GEMINI_INTENT_TIMEOUT)
+    return _parse_intent(json.loads(_extract_json(response_text)))
+
+def _classify_batch(messages: List[str]) -> List[Tuple[str, float]]:
+    """One Gemini round trip for several messages; results come back in input order"""
+    if len(messages) == 1:
+        return [_classify_single(messages[0])]
+    
+    prompt = prompts.INTENT_BATCH.render_batch(messages)
+    response_text = _complete(
+        prompts.INTENT_BATCH, prompt, timeout=GEMINI_INTENT_TIMEOUT,
+        max_output_tokens=prompts.batch_output_tokens(len(messages)),
+    )
+    items = json.loads(_extract_json(response_text))
+    by_id = {}
+    for item in items if isinstance(items, list) else []:
+        try:
+            by_id[int(item.get("id"))] = _parse_intent(item)
+        except (TypeError, ValueError, AttributeError):
+            continue
+    # Anything the model dropped falls back to keywords rather than failing the whole batch
+    return [by_id.get(i) or _keyword_intent_detection(message) for i, message in enumerate(messages)]
+
+# Concurrent idle users share one upstream request per batching window
+intent_batcher = None
+if NLU_BATCH_WINDOW_MS > 0:
+    intent_batcher = IntentBatcher(_classify_batch, window=NLU_BATCH_WINDOW_MS / 1000.0, max_batch=NLU_BATCH_MAX)
+
+@metrics.timed(metrics.NLU_SECONDS)
+@tracing.traced("nlu.detect_intent")
 def detect_intent(user_message: str) -> Tuple[str, float]:
     """
     Detect user intent from message using Gemini API
@@ -66,97 +233,94 @@ def detect_intent(user_message: str) -> Tuple[str, float]:
         - "other_query"
         - "unknown"
     """
-    if not model:
-        # Fallback to keyword matching
-        return _keyword_intent_detection(user_message)
-    
-    user_message_lower = user_message.lower().strip()
-    
-    # Create prompt for intent detection
-    prompt = f"""You are an AI assistant for the 1930 Cyber Crime Helpline, Odisha. 
-Analyze the user's message and determine their intent.
-
-User message: "{user_message}"
+    intent, confidence, source = _detect_intent(user_message)
+    metrics.INTENTS.labels(intent, source).inc()
+    tracing.set_attribute("nlu.intent", intent)
+    tracing.set_attribute("nlu.source", source)
+    return intent, confidence
 
-Possible intents:
-1. new_complaint_financial - User wants to file a complaint about financial fraud (money lost, scammed, UPI fraud, payment issues)
-2. new_complaint_social - User wants to file a complaint about social media fraud (hacked account, fake account, impersonation)
-3. status_check - User wants to check status of existing complaint
-4. account_unfreeze - User wants to unfreeze/unblock their bank account
-5. other_query - User has a general question or needs guidance
-
-Respond ONLY with a JSON object in this exact format:
-{{
-    "intent": "intent_name",
-    "confidence": 0.0-1.0,
-    "reasoning": "brief explanation"
-}}
-"""
+def _detect_intent(user_message: str) -> Tuple[str, float, str]:
+    """detect_intent plus where the answer came from: local, keyword or gemini"""
+    if lang.detect_language(user_message) in LOCAL_LANGUAGES:
+        # Odia / Hindi / Hinglish: the local tables settle the common intents on-box
+        intent, confidence = _best_intent(lang.local_scores(user_message), _KEYWORD_MATCHER.score(user_message))
+        if confidence >= LOCAL_INTENT_MIN_CONFIDENCE:
+            logger.debug("Intent detected locally: %s (confidence: %.2f)", intent, confidence)
+            return intent, confidence, "local"
+    
+    if not get_model():
+        # Fallback to keyword matching
+        return (*_keyword_intent_detection(user_message), "keyword")
     
     try:
-        response = model.generate_content(prompt)
-        response_text = response.text.strip()
+        _count_upstream_call()
+        if intent_batcher is not None:
+            # Allow for the batching window on top of the upstream deadline
+            intent, confidence = intent_batcher.classify(
+                user_message, timeout=GEMINI_INTENT_TIMEOUT + intent_batcher.window + 0.5
+            )
+        else:
+            intent, confidence = _classify_single(user_message)
         
-        # Extract JSON from response (might have markdown code blocks)
-        if "```json" in response_text:
-            response_text = response_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in response_text:
-            response_text = response_text.split("```")[1].split("```")[0].strip()
-        
-        result = json.loads(response_text)
-        intent = result.get("intent", "unknown")
-        confidence = float(result.get("confidence", 0.0))
-        
-        print(f"[NLU] Intent detected: {intent} (confidence: {confidence:.2f})")
-        return intent, confidence
+        logger.debug("Intent detected: %s (confidence: %.2f)", intent, confidence)
+        return intent, confidence, "gemini"
         
     except Exception as e:
-        print(f"[NLU ERROR] Failed to detect intent: {e}")
-        return _keyword_intent_detection(user_message)
+        logger.warning("Failed to detect intent: %s", e)
+        return (*_keyword_intent_detection(user_message), "keyword")
 
 def _keyword_intent_detection(user_message: str) -> Tuple[str, float]:
-    """Fallback keyword-based intent detection"""
-    user_message_lower = user_message.lower()
+    """Fallback keyword-based intent detection (English plus the Odia/Hindi/Hinglish tables)"""
+    return _best_intent(_KEYWORD_MATCHER.score(user_message), lang.local_scores(user_message))
+
+def _best_intent(*score_tables: Dict[str, float]) -> Tuple[str, float]:
+    scores: Dict[str, float] = {}
+    for table in score_tables:
+        for intent, score in table.items():
+            scores[intent] = scores.get(intent, 0.0) + score
     
-    # Check each intent category
+    # Highest weighted score wins; ties keep the INTENTS order
     best_intent = "unknown"
-    best_confidence = 0.0
+    best_score = 0.0
+    for intent in _KEYWORD_MATCHER.intents:
+        score = scores.get(intent, 0.0)
+        if score > best_score:
+            best_score = score
+            best_intent = intent
     
-    for intent, keywords in INTENTS.items():
-        matches = sum(1 for keyword in keywords if keyword in user_message_lower)
-        if matches > 0:
-            # Calculate confidence based on number of matches and message length
-            confidence = min(0.8, 0.3 + (matches * 0.15))
-            if confidence > best_confidence:
-                best_confidence = confidence
-                best_intent = intent
+    if best_intent == "unknown":
+        return best_intent, 0.0
     
-    return best_intent, best_confidence
+    # Same scale as before: one plain keyword -> 0.45, capped at 0.8
+    confidence = min(0.8, 0.3 + (best_score * 0.15))
+    return best_intent, confidence
 
-def handle_other_query(user_message: str) -> str:
+def _cache_kind(kind: str, language: Optional[str]) -> str:
+    # Answers are cached per reply language
+    if language and language != lang.DEFAULT_LANGUAGE:
+        return f"{kind}:{language}"
+    return kind
+
+@metrics.timed(metrics.NLU_SECONDS)
+@tracing.traced("nlu.handle_other_query")
+def handle_other_query(user_message: str, language: Optional[str] = None) -> str:
     """
     Handle other queries using Gemini API
     Provides helpful responses for general questions about cybercrime, helpline, etc.
     """
-    if not model:
-        return _fallback_other_query_response()
+    if not get_model():
+        return _fallback_other_query_response(language)
     
-    prompt = f"""You are a helpful assistant for the 1930 Cyber Crime Helpline, Odisha. 
-The user has asked: "{user_message}"
-
-Provide a helpful, concise response (max 300 words) that:
-1. Answers their question if it's about cybercrime, fraud, or the helpline
-2. Guides them to the appropriate option (A for new complaint, B for status check, etc.)
-3. Provides relevant information about reporting cybercrime
-4. Is friendly and professional
-5. If the query is not related to cybercrime, politely redirect them
-
-Keep the response conversational and suitable for WhatsApp messaging.
-"""
+    kind = _cache_kind("other_query", language)
+    cached = response_cache.get(kind, user_message)
+    if cached is not None:
+        logger.debug("Served other query from cache")
+        return cached
+    
+    prompt = prompts.OTHER_QUERY.render(user_message, language=language)
     
     try:
-        response = model.generate_content(prompt)
-        response_text = response.text.strip()
+        response_text = _generate(prompts.OTHER_QUERY, prompt).strip()
         
         # Clean up response (remove markdown if present)
         if response_text.startswith("```"):
@@ -164,82 +328,195 @@ Keep the response conversational and suitable for WhatsApp messaging.
             if response_text.startswith("markdown"):
                 response_text = response_text[8:].strip()
         
-        print(f"[NLU] Generated response for other query")
+        logger.debug("Generated response for other query")
+        response_cache.put(kind, user_message, response_text)
         return response_text
         
     except Exception as e:
-        print(f"[NLU ERROR] Failed to generate response: {e}")
-        return _fallback_other_query_response()
+        logger.warning("Failed to generate response: %s", e)
+        return _fallback_other_query_response(language)
+
+# A sentence ends at . ! ? followed by whitespace, or at a blank line
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+_CODE_FENCE = re.compile(r"```(?:markdown|json)?")
+WHATSAPP_TEXT_LIMIT = 4096
+
+def _find_cut(buffer: str, first: bool, first_min_chars: int, chunk_chars: int) -> Optional[int]:
+    boundaries = [m.end() for m in _SENTENCE_END.finditer(buffer)]
+    if first:
+        # Release the first message as soon as one full sentence is there
+        return next((b for b in boundaries if b >= first_min_chars), None)
+    if len(buffer) < chunk_chars:
+        return None
+    before = [b for b in boundaries if b <= chunk_chars]
+    if before:
+        return before[-1]
+    if boundaries:
+        return boundaries[0]
+    if len(buffer) >= WHATSAPP_TEXT_LIMIT:
+        space = buffer.rfind(" ", 0, WHATSAPP_TEXT_LIMIT)
+        return space if space > 0 else WHATSAPP_TEXT_LIMIT
+    return None
+
+def split_stream_into_messages(pieces: Iterable[str], first_min_chars: int = 40, chunk_chars: int = 600) -> Iterator[str]:
+    """Regroup streamed text into WhatsApp messages cut at sentence boundaries.
+    The first message goes out after the first sentence; later ones are ~chunk_chars long."""
+    buffer = ""
+    first = True
+    for piece in pieces:
+        buffer += piece
+        while True:
+            cut = _find_cut(buffer, first, first_min_chars, chunk_chars)
+            if cut is None:
+                break
+            message, buffer = buffer[:cut].strip(), buffer[cut:]
+            if message:
+                first = False
+                yield message
+    if buffer.strip():
+        yield buffer.strip()
+
+def stream_other_query(user_message: str, language: Optional[str] = None) -> Iterator[str]:
+    """
+    Streaming variant of handle_other_query: yields the answer as a sequence of
+    WhatsApp-sized messages, the first one as soon as Gemini has produced a sentence.
+    """
+    if not get_model() or NLU_STREAMING != "1":
+        yield handle_other_query(user_message, language)
+        return
+    
+    kind = _cache_kind("other_query", language)
+    cached = response_cache.get(kind, user_message)
+    if cached is not None:
+        logger.debug("Served other query from cache")
+        yield cached
+        return
+    
+    received: List[str] = []
+    
+    def record(pieces):
+        for piece in pieces:
+            received.append(piece)
+            yield piece
+    
+    sent = 0
+    template = prompts.OTHER_QUERY
+    prompt = template.render(user_message, language=language)
+    start = time.perf_counter()
+    # Not made current: the caller sends each message between our yields
+    span = tracing.start_span("gemini.stream", tracing.CLIENT, **{"gemini.prompt": template.name})
+    try:
+        _count_upstream_call()
+        pieces = gemini.stream(prompt, max_output_tokens=template.max_output_tokens)
+        for message in split_stream_into_messages(record(pieces)):
+            message = _CODE_FENCE.sub("", message).strip()
+            if message:
+                if not sent:
+                    # Time to the first message; the rest overlaps with sending
+                    metrics.NLU_SECONDS.labels("stream_other_query_first").observe(time.perf_counter() - start)
+                    span.set_attribute("gemini.first_message_ms", round((time.perf_counter() - start) * 1000, 1))
+                sent += 1
+                yield message
+        logger.debug("Streamed response for other query in %d message(s)", sent)
+        template.record(prompt, "".join(received), time.perf_counter() - start)
+        full_text = _CODE_FENCE.sub("", "".join(received)).strip()
+        if full_text:
+            response_cache.put(kind, user_message, full_text)
+    except Exception as e:
+        template.record_error()
+        span.record_error(e)
+        logger.warning("Failed to stream response: %s", e)
+        if not sent:
+            yield _fallback_other_query_response(language)
+        else:
+            # Part of the answer went out already: say that the rest is missing
+            yield lang.reply_template("answer_cut_short", language)
+    finally:
+        span.set_attribute("gemini.messages", sent)
+        span.end()
 
-def handle_unclear_input(user_message: str, context: Optional[str] = None) -> str:
+@metrics.timed(metrics.NLU_SECONDS)
+@tracing.traced("nlu.handle_unclear_input")
+def handle_unclear_input(user_message: str, context: Optional[str] = None, language: Optional[str] = None) -> str:
     """
     Handle unclear or unexpected user input using Gemini
     Provides helpful guidance when the system doesn't understand the input
     """
-    if not model:
-        return _fallback_unclear_response()
+    if not get_model():
+        return _fallback_unclear_response(language)
     
-    context_text = f"Context: {context}\n\n" if context else ""
+    kind = _cache_kind("unclear_input", language)
+    cached = response_cache.get(kind, user_message, context)
+    if cached is not None:
+        logger.debug("Served unclear input response from cache")
+        return cached
     
-    prompt = f"""You are a helpful assistant for the 1930 Cyber Crime Helpline, Odisha.
-{context_text}The user sent: "{user_message}"
-
-The system didn't understand this input. Provide a helpful response that:
-1. Acknowledges the confusion
-2. Suggests what the user might want to do
-3. Reminds them of the available options (A, B, C, D)
-4. Is friendly and helpful
-
-Keep it concise (max 200 words) and suitable for WhatsApp.
-"""
+    prompt = prompts.UNCLEAR_INPUT.render(user_message, context, language=language)
     
     try:
-        response = model.generate_content(prompt)
-        response_text = response.text.strip()
+        response_text = _generate(prompts.UNCLEAR_INPUT, prompt).strip()
         
         # Clean up response
         if response_text.startswith("```"):
             response_text = response_text.split("```")[1].split("```")[0].strip()
         
-        print(f"[NLU] Generated response for unclear input")
+        logger.debug("Generated response for unclear input")
+        response_cache.put(kind, user_message, response_text, context)
         return response_text
         
     except Exception as e:
-        print(f"[NLU ERROR] Failed to generate response: {e}")
-        return _fallback_unclear_response()
+        logger.warning("Failed to generate response: %s", e)
+        return _fallback_unclear_response(language)
 
-def _fallback_other_query_response() -> str:
+def _fallback_other_query_response(language: Optional[str] = None) -> str:
     """Fallback response for other queries when Gemini is unavailable"""
-    return """Thank you for contacting 1930 Cyber Crime Helpline, Odisha.
+    return lang.reply_template("other_query", language)
 
-For general queries and guidance:
-• Send 'A' to file a new complaint
-• Send 'B' to check complaint status
-• Send 'C' for account unfreeze requests
-• Send 'start' to see the main menu
+def _fallback_unclear_response(language: Optional[str] = None) -> str:
+    """Fallback response for unclear input when Gemini is unavailable"""
+    return lang.reply_template("unclear_input", language)
 
-For urgent matters, please call the helpline directly at 1930.
+def cache_stats() -> Dict[str, float]:
+    """Hit/miss counters of the generated-answer cache"""
+    return response_cache.stats()
 
-How can I help you today?"""
+def upstream_stats() -> Dict[str, object]:
+    """Gemini client counters and circuit breaker state"""
+    return {**gemini.stats, "breaker": gemini.breaker.state}
 
-def _fallback_unclear_response() -> str:
-    """Fallback response for unclear input when Gemini is unavailable"""
-    return """I didn't quite understand that. 
+def prompt_stats() -> Dict[str, Dict[str, float]]:
+    """Per-prompt calls, estimated tokens and upstream latency"""
+    return prompts.stats()
 
-Please choose from the following options:
-• A - New Complaint
-• B - Status Check
-• C - Account Unfreeze
-• D - Other Queries
+def batch_stats() -> Dict[str, object]:
+    """Intent micro-batching counters"""
+    if intent_batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **intent_batcher.stats}
 
-Or send 'start' to see the main menu."""
+def turn_stats() -> Dict[str, object]:
+    """Upstream calls per inbound message"""
+    with _turn_stats_lock:
+        histogram = dict(sorted(_upstream_calls_histogram.items()))
+    messages = sum(histogram.values())
+    calls = sum(k * v for k, v in histogram.items())
+    return {
+        "messages": messages,
+        "upstream_calls": calls,
+        "mean_calls_per_message": calls / messages if messages else 0.0,
+        "histogram": histogram,
+    }
 
-def should_route_to_complaint(user_message: str) -> Tuple[bool, Optional[str]]:
+def should_route_to_complaint(user_message: str, current: Optional[TurnNLU] = None) -> Tuple[bool, Optional[str]]:
     """
     Determine if user message indicates they want to file a complaint
+    Pass the message's TurnNLU to reuse an intent that was already detected.
     Returns: (should_route, complaint_type) where complaint_type is "financial" or "social"
     """
-    intent, confidence = detect_intent(user_message)
+    if current is not None:
+        intent, confidence = current.intent()
+    else:
+        intent, confidence = detect_intent(user_message)
     
     if intent == "new_complaint_financial" and confidence > 0.5:
         return True, "financial"
@@ -0,0 +1,81 @@
+"""
+Micro-batching for intent classification.
+
+Callers block in `classify()` while their message waits up to `window` seconds
+for other messages to arrive; the collected batch is sent to Gemini as a single
+structured prompt and the per-message results are handed back to each caller.
+Under low load a batch has one message and is sent as a normal single prompt.
+The batch call is traced under the first message's trace.
+"""
+import contextvars
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+from . import tracing
+
+
+class IntentBatcher:
+    def __init__(
+        self,
+        classify_batch: Callable[[List[str]], List[Tuple[str, float]]],
+        window: float = 0.005,
+        max_batch: int = 16,
+        max_inflight_batches: int = 4,
+    ):
+        self._classify_batch = classify_batch
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: List[Tuple[str, Future, contextvars.Context]] = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._executor = ThreadPoolExecutor(max_workers=max_inflight_batches, thread_name_prefix="nlu-batch")
+        self.stats = {"messages": 0, "batches": 0, "max_batch_seen": 0}
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._collector, name="nlu-batcher", daemon=True)
+            self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        future: Future = Future()
+        with self._cond:
+            self._ensure_thread()
+            self._pending.append((text, future, contextvars.copy_context()))
+            self.stats["messages"] += 1
+            self._cond.notify()
+        return future
+
+    def classify(self, text: str, timeout: Optional[float] = None) -> Tuple[str, float]:
+        """Block until this message's (intent, confidence) is available"""
+        return self.submit(text).result(timeout=timeout)
+
+    def _collector(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                # First message of a batch opens the window
+                deadline = time.monotonic() + self.window
+                while len(self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+            self.stats["batches"] += 1
+            self.stats["max_batch_seen"] = max(self.stats["max_batch_seen"], len(batch))
+            self._executor.submit(batch[0][2].run, self._run_batch, batch)
+
+    def _run_batch(self, batch: List[Tuple[str, Future, contextvars.Context]]):
+        try:
+            with tracing.span("nlu.intent_batch", **{"nlu.batch_size": len(batch)}):
+                results = self._classify_batch([text for text, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
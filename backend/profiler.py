@@ -0,0 +1,223 @@
+"""
+On-demand profiling of live workers, served at /_admin/profile (needs ADMIN_TOKEN).
+
+- cpu: a sampling profiler. A thread snapshots every thread's stack each
+  PROFILE_INTERVAL_MS via sys._current_frames() and counts identical stacks;
+  the output is collapsed stacks ("worker-PID;thread;frame;frame COUNT"),
+  ready for flamegraph.pl or speedscope. Nothing is hooked into the code being
+  profiled, so the cost is one stack walk per thread per sample. Threads parked
+  in a wait (idle pool workers, the event loop's select) are left out unless
+  idle=True.
+- memory: tracemalloc runs for the duration and the top-N allocation sites
+  (by size still allocated) are returned. tracemalloc slows allocations while
+  it runs and is stopped afterwards unless it was already on.
+
+Workers of one node share PROFILE_DIR: the worker that gets the request writes
+it to PROFILE_DIR/requests, every worker's watcher thread picks it up, profiles
+itself and writes its result next to it, and the first worker merges them.
+Only one profile runs per worker at a time and the duration is capped at
+PROFILE_MAX_SECONDS.
+"""
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional
+
+from .config import PROFILE_DIR, PROFILE_MAX_SECONDS, PROFILE_INTERVAL_MS
+
+logger = logging.getLogger(__name__)
+
+MODES = ("cpu", "memory")
+POLL_INTERVAL = 0.5  # seconds between checks for new requests
+COLLECT_GRACE = 2 * POLL_INTERVAL + 1.0  # extra wait for the other workers' results
+
+# Leaf frames of a thread that is waiting rather than working
+IDLE_LEAVES = {
+    "threading.py:Condition.wait", "threading.py:Event.wait", "threading.py:Thread.join",
+    "queue.py:Queue.get", "selectors.py:EpollSelector.select", "selectors.py:KqueueSelector.select",
+    "selectors.py:PollSelector.select", "selectors.py:SelectSelector.select",
+}
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_busy = threading.Lock()
+_watcher: Optional[threading.Thread] = None
+_stop = threading.Event()
+
+
+class ProfilerBusy(Exception):
+    """A profile is already running in this worker"""
+
+
+def profile_dir() -> str:
+    return PROFILE_DIR or os.path.join(tempfile.gettempdir(), "chatbot-profiles")
+
+
+# --- Sampling ---
+
+_labels: Dict[object, str] = {}
+
+
+def _frame_label(code) -> str:
+    label = _labels.get(code)
+    if label is None:
+        path = code.co_filename
+        if path.startswith(_ROOT):
+            path = os.path.relpath(path, _ROOT)
+        else:
+            path = os.path.basename(path)
+        name = getattr(code, "co_qualname", code.co_name)
+        label = _labels[code] = f"{path}:{name}".replace(";", ":").replace(" ", "_")
+    return label
+
+
+def sample_stacks(seconds: float, interval: float = PROFILE_INTERVAL_MS / 1000.0, idle: bool = False) -> Counter:
+    """Sample all threads' stacks for `seconds`; {(thread, frames...): samples}"""
+    me = threading.get_ident()
+    stacks: Counter = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            if not idle and _frame_label(frame.f_code) in IDLE_LEAVES:
+                continue
+            frames = []
+            while frame is not None:
+                frames.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            frames.append(names.get(ident, f"thread-{ident}").replace(" ", "_").replace(";", ":"))
+            stacks[tuple(reversed(frames))] += 1
+        time.sleep(interval)
+    return stacks
+
+
+def collapse(stacks: Counter, prefix: str = "") -> List[str]:
+    """Collapsed-stack lines, root frame first"""
+    head = f"{prefix};" if prefix else ""
+    return [f"{head}{';'.join(stack)} {count}" for stack, count in stacks.most_common()]
+
+
+def allocation_top(seconds: float, top: int = 25) -> List[dict]:
+    """Top allocation sites after tracing allocations for `seconds`"""
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        time.sleep(seconds)
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        if started:
+            tracemalloc.stop()
+    snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    return [
+        {"location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+         "size_bytes": stat.size, "count": stat.count}
+        for stat in snapshot.statistics("lineno")[:top]
+    ]
+
+
+def profile_local(seconds: float, mode: str = "cpu", top: int = 25, idle: bool = False) -> dict:
+    """Profile this worker; raises ProfilerBusy if it is already being profiled"""
+    seconds = max(0.1, min(float(seconds), PROFILE_MAX_SECONDS))
+    if not _busy.acquire(blocking=False):
+        raise ProfilerBusy("a profile is already running in this worker")
+    try:
+        logger.info("Profiling for %.1fs", seconds, extra={"mode": mode})
+        if mode == "memory":
+            return {"pid": os.getpid(), "mode": mode, "top": allocation_top(seconds, top)}
+        stacks = sample_stacks(seconds, idle=idle)
+        return {"pid": os.getpid(), "mode": mode, "samples": sum(stacks.values()),
+                "collapsed": collapse(stacks, f"worker-{os.getpid()}")}
+    finally:
+        _busy.release()
+
+
+# --- Across the workers of a node ---
+
+def _write_json(path: str, data: dict):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _serve_request(request: dict):
+    out_dir = os.path.join(profile_dir(), request["id"])
+    try:
+        result = profile_local(request["seconds"], request["mode"], request["top"], request.get("idle", False))
+    except ProfilerBusy as e:
+        result = {"pid": os.getpid(), "mode": request["mode"], "error": str(e)}
+    if not os.path.exists(os.path.join(profile_dir(), "requests", f"{request['id']}.json")):
+        return  # too late, the results were already collected
+    os.makedirs(out_dir, exist_ok=True)
+    _write_json(os.path.join(out_dir, f"{os.getpid()}.json"), result)
+
+
+def _watch():
+    requests_dir = os.path.join(profile_dir(), "requests")
+    seen = set()
+    while not _stop.wait(POLL_INTERVAL):
+        try:
+            names = os.listdir(requests_dir)
+        except FileNotFoundError:
+            continue
+        for name in names:
+            if not name.endswith(".json") or name in seen:
+                continue
+            seen.add(name)
+            try:
+                with open(os.path.join(requests_dir, name)) as f:
+                    request = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if request.get("expires", 0) < time.time():
+                continue
+            threading.Thread(target=_serve_request, args=(request,), name="profiler", daemon=True).start()
+
+
+def start_watcher():
+    """Let this worker take part in node-wide profiles"""
+    global _watcher
+    if _watcher is not None and _watcher.is_alive():
+        return
+    _stop.clear()
+    _watcher = threading.Thread(target=_watch, name="profile-watcher", daemon=True)
+    _watcher.start()
+
+
+def stop_watcher():
+    _stop.set()
+
+
+def profile_workers(seconds: float, mode: str = "cpu", top: int = 25, idle: bool = False) -> List[dict]:
+    """Profile every worker watching PROFILE_DIR; blocks for about `seconds`"""
+    seconds = max(0.1, min(float(seconds), PROFILE_MAX_SECONDS))
+    request_id = uuid.uuid4().hex
+    requests_dir = os.path.join(profile_dir(), "requests")
+    out_dir = os.path.join(profile_dir(), request_id)
+    os.makedirs(requests_dir, exist_ok=True)
+    request_path = os.path.join(requests_dir, f"{request_id}.json")
+    _write_json(request_path, {"id": request_id, "seconds": seconds, "mode": mode, "top": top, "idle": idle,
+                               "expires": time.time() + COLLECT_GRACE})
+    try:
+        time.sleep(seconds + COLLECT_GRACE)
+        results = []
+        for name in sorted(os.listdir(out_dir)) if os.path.isdir(out_dir) else []:
+            if name.endswith(".json"):
+                with open(os.path.join(out_dir, name)) as f:
+                    results.append(json.load(f))
+        return results
+    finally:
+        os.remove(request_path)
+        if os.path.isdir(out_dir):
+            for name in os.listdir(out_dir):
+                os.remove(os.path.join(out_dir, name))
+            os.rmdir(out_dir)
@@ -0,0 +1,148 @@
+"""
+Prompt registry for the NLU module.
+
+Each prompt is a static prefix (instructions, built once at import) followed by a
+small dynamic part holding the user's text. User text is truncated to a token
+budget before it is spliced in, and every prompt keeps its own accounting of
+calls, estimated tokens and upstream latency.
+"""
+import json
+import threading
+from typing import Dict, List, Optional
+
+from .config import PROMPT_USER_TOKEN_BUDGET
+from .language import DEFAULT_LANGUAGE, LANGUAGE_NAMES
+
+# Gemini averages roughly 4 characters per token for English text
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text or "") + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_to_budget(text: str, budget_tokens: int) -> str:
+    """Cut text to about `budget_tokens` tokens, at a word boundary where possible"""
+    text = (text or "").strip()
+    max_chars = budget_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(" ", 0, max_chars)
+    if cut < max_chars // 2:
+        cut = max_chars
+    return text[:cut].rstrip() + " …"
+
+
+def _quote(text: str) -> str:
+    # Keep the user's text from closing the quoted string it is embedded in
+    return text.replace('"', "'")
+
+
+class PromptTemplate:
+    def __init__(self, name: str, prefix: str, max_output_tokens: int, user_token_budget: int = PROMPT_USER_TOKEN_BUDGET):
+        self.name = name
+        self.prefix = prefix
+        self.prefix_tokens = estimate_tokens(prefix)
+        self.max_output_tokens = max_output_tokens
+        self.user_token_budget = user_token_budget
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "errors": 0, "truncated_inputs": 0, "prompt_tokens": 0,
+                       "output_tokens": 0, "latency_total_s": 0.0, "latency_max_s": 0.0}
+
+    def user_text(self, text: str) -> str:
+        truncated = truncate_to_budget(text, self.user_token_budget)
+        if truncated != (text or "").strip():
+            with self._lock:
+                self._stats["truncated_inputs"] += 1
+        return _quote(truncated)
+
+    def render(self, text: str, context: Optional[str] = None, language: Optional[str] = None) -> str:
+        context_line = f"Context: {context}\n" if context else ""
+        if language and language != DEFAULT_LANGUAGE and language in LANGUAGE_NAMES:
+            context_line += f"Reply in {LANGUAGE_NAMES[language]}.\n"
+        return f'{self.prefix}{context_line}User message: "{self.user_text(text)}"\n'
+
+    def render_batch(self, messages: List[str]) -> str:
+        items = [self.user_text(m) for m in messages]
+        return f"{self.prefix}Messages (JSON array, the id of a message is its index):\n{json.dumps(items, ensure_ascii=False)}\n"
+
+    def record(self, prompt: str, output: str, latency: float):
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["prompt_tokens"] += estimate_tokens(prompt)
+            self._stats["output_tokens"] += estimate_tokens(output)
+            self._stats["latency_total_s"] += latency
+            self._stats["latency_max_s"] = max(self._stats["latency_max_s"], latency)
+
+    def record_error(self):
+        with self._lock:
+            self._stats["errors"] += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            out = dict(self._stats)
+        calls = out["calls"]
+        out["prefix_tokens"] = self.prefix_tokens
+        out["avg_prompt_tokens"] = out["prompt_tokens"] / calls if calls else 0.0
+        out["avg_latency_s"] = out["latency_total_s"] / calls if calls else 0.0
+        return out
+
+
+_INTENT_LIST = """Intents:
+- new_complaint_financial: report financial fraud (money lost, scam, UPI/card/payment fraud)
+- new_complaint_social: report social media fraud (hacked or fake account, impersonation)
+- status_check: status of an existing complaint
+- account_unfreeze: unfreeze/unblock a bank account
+- other_query: general question or guidance
+"""
+
+PROMPTS: Dict[str, PromptTemplate] = {}
+
+
+def register(template: PromptTemplate) -> PromptTemplate:
+    PROMPTS[template.name] = template
+    return template
+
+
+INTENT = register(PromptTemplate(
+    "intent",
+    "You classify messages sent to the 1930 Cyber Crime Helpline, Odisha, by intent.\n"
+    + _INTENT_LIST
+    + 'Reply ONLY with JSON: {"intent": "<intent>", "confidence": <0.0-1.0>}\n\n',
+    max_output_tokens=48,
+))
+
+INTENT_BATCH = register(PromptTemplate(
+    "intent_batch",
+    "You classify independent messages sent to the 1930 Cyber Crime Helpline, Odisha, by intent.\n"
+    + _INTENT_LIST
+    + 'Reply ONLY with a JSON array, one object per message: [{"id": 0, "intent": "<intent>", "confidence": <0.0-1.0>}]\n\n',
+    max_output_tokens=40,  # per message, see batch_output_tokens
+))
+
+OTHER_QUERY = register(PromptTemplate(
+    "other_query",
+    "You are the WhatsApp assistant of the 1930 Cyber Crime Helpline, Odisha. "
+    "Answer the user's message in at most 300 words, friendly and professional. "
+    "Answer questions about cybercrime, fraud or the helpline, point to the right option "
+    "(A new complaint, B status check, C account unfreeze) and explain how to report cybercrime. "
+    "Politely redirect unrelated questions. Plain conversational text, no markdown.\n\n",
+    max_output_tokens=512,
+))
+
+UNCLEAR_INPUT = register(PromptTemplate(
+    "unclear_input",
+    "You are the WhatsApp assistant of the 1930 Cyber Crime Helpline, Odisha. "
+    "The bot did not understand the user's message. In at most 200 words: acknowledge it, "
+    "suggest what they may want, and remind them of the options A (New Complaint), "
+    "B (Status Check), C (Account Unfreeze), D (Other Queries). Friendly plain text, no markdown.\n\n",
+    max_output_tokens=320,
+))
+
+
+def batch_output_tokens(size: int) -> int:
+    return INTENT_BATCH.max_output_tokens * size + 16
+
+
+def stats() -> Dict[str, Dict[str, float]]:
+    return {name: template.stats() for name, template in PROMPTS.items()}
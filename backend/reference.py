@@ -0,0 +1,58 @@
+"""
+Complaint reference numbers.
+
+Format: 1930-YYYYMMDD-NN-XXXXX
+  - YYYYMMDD  day the reference was issued
+  - NN        node id of the writer (config.NODE_ID), so nodes or databases that
+              keep their own id sequences never hand out the same reference
+  - XXXXX     complaint primary key, zero-padded to at least 5 digits
+
+The complaint id is embedded, so `decode` gets back to the row with a primary-key
+lookup. Legacy references (1930-YYYYMMDD-XXXXX, no node id) still decode.
+"""
+import re
+import time
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
+
+from .config import NODE_ID
+
+PREFIX = "1930"
+
+if not 0 <= NODE_ID <= 99:
+    raise ValueError(f"NODE_ID must be between 0 and 99, got {NODE_ID}")
+_NODE = f"{NODE_ID:02d}"
+
+_REFERENCE_RE = re.compile(r"^1930-(\d{8})-(?:(\d{2})-)?(\d+)$")
+
+# "YYYYMMDD" for today and the epoch second it stops being valid; refreshed at midnight
+_day = ["", 0.0]
+
+
+class Reference(NamedTuple):
+    day: str  # YYYYMMDD
+    node: Optional[int]  # None for legacy references
+    complaint_id: int
+
+
+def _today() -> str:
+    now = time.time()
+    if now >= _day[1]:
+        current = datetime.fromtimestamp(now)
+        midnight = (current + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        _day[0], _day[1] = current.strftime("%Y%m%d"), midnight.timestamp()
+    return _day[0]
+
+
+def allocate(complaint_id: int) -> str:
+    """Reference for a complaint that already has its primary key (flush first)"""
+    return f"{PREFIX}-{_today()}-{_NODE}-{complaint_id:05d}"
+
+
+def decode(reference) -> Optional[Reference]:
+    """Split a reference (current or legacy format) into its parts, or None"""
+    match = _REFERENCE_RE.match((reference or "").strip())
+    if not match:
+        return None
+    day, node, complaint_id = match.groups()
+    return Reference(day, int(node) if node is not None else None, int(complaint_id))
@@ -1,6 +1,5 @@
 # backend/reports.py
 import os
-import json
 from io import BytesIO
 from datetime import datetime
 
@@ -9,11 +8,11 @@ from reportlab.lib.pagesizes import A4  # type: ignore
 from reportlab.pdfgen import canvas  # type: ignore
 from reportlab.lib.utils import ImageReader  # type: ignore
 
+from .config import MEDIA_DIR, REPORTS_DIR
 from .utils import loads
+from . import metrics, tracing
 
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
-REPORTS_DIR = os.path.join(BASE_DIR, "reports")
-MEDIA_DIR = os.path.join(BASE_DIR, "media")
 os.makedirs(REPORTS_DIR, exist_ok=True)
 os.makedirs(MEDIA_DIR, exist_ok=True)
 
@@ -35,7 +34,7 @@ def _resolve_document_path(doc: str):
         candidate_paths.append(doc)
     candidate_paths.append(os.path.join(BASE_DIR, normalized))
     candidate_paths.append(os.path.join(MEDIA_DIR, normalized.split("media/", 1)[-1]))
-    candidate_paths.append(os.path.join(BASE_DIR, "reports", normalized))
+    candidate_paths.append(os.path.join(REPORTS_DIR, normalized))
     if doc.startswith(MEDIA_PREFIX):
         candidate_paths.append(os.path.join(BASE_DIR, normalized))
     if doc.startswith("media/"):
@@ -92,13 +91,15 @@ def _draw_image(canvas_obj, source_path_or_url, x, y, max_width):
     )
     return y - draw_height - 15
 
+@metrics.timed(metrics.PDF_SECONDS)
+@tracing.traced("pdf.render")
 def build_pdf_bytes(complaint):
     """
     complaint: SQLAlchemy object with all complaint fields
     returns: bytes of PDF
     """
     data = loads(getattr(complaint, "data", "{}"))
-    documents = json.loads(getattr(complaint, "documents", "[]"))
+    documents = [document.path for document in getattr(complaint, "attachments", [])]
     created = getattr(complaint, "created_at", None)
     updated = getattr(complaint, "updated_at", None)
     created_s = created.strftime("%d/%m/%Y %H:%M:%S") if created else datetime.utcnow().strftime("%d/%m/%Y %H:%M:%S")
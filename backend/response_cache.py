@@ -0,0 +1,202 @@
+"""
+Response cache for generated NLU answers ("other query" / unclear input replies).
+
+Two tiers:
+- exact: normalized text + context -> answer (dict lookup, microseconds)
+- near-duplicate: MinHash signatures over content words, bucketed with LSH,
+  so "how to report upi fraud?" and "How do I report UPI fraud" share an answer
+  while "how to report card fraud" does not.
+
+Entries expire after a TTL and the cache is bounded in size (least recently used
+entries are evicted first).
+"""
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+_NON_WORD = re.compile(r"[^\w\s]+", re.UNICODE)
+_SPACES = re.compile(r"\s+")
+
+# MinHash parameters: NUM_PERM = BANDS * ROWS
+_NUM_PERM = 32
+_BANDS = 8
+_ROWS = 4
+_PRIME = (1 << 61) - 1
+_MASK = (1 << 32) - 1
+
+
+def _make_permutations():
+    # Fixed seeds so signatures are stable across restarts
+    perms = []
+    seed = 0x1930
+    for _ in range(_NUM_PERM):
+        seed = (seed * 6364136223846793005 + 1442695040888963407) & ((1 << 64) - 1)
+        a = (seed >> 16) % _PRIME or 1
+        seed = (seed * 6364136223846793005 + 1442695040888963407) & ((1 << 64) - 1)
+        b = (seed >> 16) % _PRIME
+        perms.append((a, b))
+    return perms
+
+
+_PERMUTATIONS = _make_permutations()
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    text = _NON_WORD.sub(" ", (text or "").lower())
+    return _SPACES.sub(" ", text).strip()
+
+
+# Function words carry no meaning for FAQ matching
+_STOPWORDS = frozenset("""
+a an the is are was were be been am i me my we our you your it its this that
+to of in on for with at by from and or do does did can could should would will
+how what when where which who why please pls kindly tell about there any some
+""".split())
+
+
+def _features(normalized: str) -> set:
+    """Content words with a trailing plural 's' stripped"""
+    words = set()
+    for word in normalized.split():
+        if word in _STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.add(word)
+    return words
+
+
+def minhash_signature(normalized: str) -> Optional[Tuple[int, ...]]:
+    features = _features(normalized)
+    if not features:
+        return None
+    hashes = [zlib.crc32(f.encode("utf-8")) for f in features]
+    return tuple(
+        min(((a * h + b) % _PRIME) & _MASK for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def _similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+    same = sum(1 for x, y in zip(sig_a, sig_b) if x == y)
+    return same / _NUM_PERM
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "signature", "namespace")
+
+    def __init__(self, value, expires_at, signature, namespace):
+        self.value = value
+        self.expires_at = expires_at
+        self.signature = signature
+        self.namespace = namespace
+
+
+class ResponseCache:
+    """Thread-safe TTL + LRU cache with an exact and a near-duplicate tier"""
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600, similarity: float = 0.85):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity = similarity
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._buckets: Dict[Tuple[str, int, Tuple[int, ...]], set] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits_exact": 0, "hits_near": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    @staticmethod
+    def _namespace(kind: str, context: Optional[str]) -> str:
+        return f"{kind}|{normalize_text(context or '')}"
+
+    def _band_keys(self, namespace: str, signature: Tuple[int, ...]) -> List[Tuple[str, int, Tuple[int, ...]]]:
+        return [(namespace, band, signature[band * _ROWS:(band + 1) * _ROWS]) for band in range(_BANDS)]
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None or entry.signature is None:
+            return
+        for band_key in self._band_keys(entry.namespace, entry.signature):
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def get(self, kind: str, text: str, context: Optional[str] = None) -> Optional[str]:
+        namespace = self._namespace(kind, context)
+        normalized = normalize_text(text)
+        key = (namespace, normalized)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits_exact"] += 1
+                    return entry.value
+                self._remove(key)
+                self._stats["expirations"] += 1
+
+        # Near-duplicate tier: signature is computed outside the lock
+        signature = minhash_signature(normalized)
+        if signature is None:
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+        with self._lock:
+            candidates = set()
+            for band_key in self._band_keys(namespace, signature):
+                candidates.update(self._buckets.get(band_key, ()))
+            best_key, best_score = None, 0.0
+            for candidate in candidates:
+                entry = self._entries.get(candidate)
+                if entry is None:
+                    continue
+                if entry.expires_at <= now:
+                    self._remove(candidate)
+                    self._stats["expirations"] += 1
+                    continue
+                score = _similarity(signature, entry.signature)
+                if score > best_score:
+                    best_key, best_score = candidate, score
+            if best_key is not None and best_score >= self.similarity:
+                self._entries.move_to_end(best_key)
+                self._stats["hits_near"] += 1
+                return self._entries[best_key].value
+            self._stats["misses"] += 1
+        return None
+
+    def put(self, kind: str, text: str, value: str, context: Optional[str] = None):
+        if self.max_entries <= 0:
+            return
+        namespace = self._namespace(kind, context)
+        normalized = normalize_text(text)
+        key = (namespace, normalized)
+        signature = minhash_signature(normalized)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = _Entry(value, time.monotonic() + self.ttl_seconds, signature, namespace)
+            if signature is not None:
+                for band_key in self._band_keys(namespace, signature):
+                    self._buckets.setdefault(band_key, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            out = dict(self._stats)
+            out["size"] = len(self._entries)
+        lookups = out["hits_exact"] + out["hits_near"] + out["misses"]
+        out["hit_rate"] = (out["hits_exact"] + out["hits_near"]) / lookups if lookups else 0.0
+        return out
@@ -0,0 +1,271 @@
+"""
+Request tracing: one trace per inbound WhatsApp message, exported as OpenTelemetry spans.
+
+The webhook opens the root span with a trace id derived from the WhatsApp message id
+(a redelivered message lands in the same trace). The current span lives in a
+contextvar, so route_message, the NLU calls, Graph API sends and PDF rendering
+nest under it; work handed to a thread pool keeps its parent through `wrap`.
+
+Finished spans are queued and written by a background thread in OTLP/JSON, to
+TRACE_FILE (one export request per line) and/or POSTed to TRACE_OTLP_ENDPOINT.
+"""
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, List, Optional
+
+import requests
+
+from .config import TRACE_FILE, TRACE_OTLP_ENDPOINT, TRACE_SERVICE_NAME, TRACE_EXPORT_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# OTLP span kinds
+INTERNAL, SERVER, CLIENT = 1, 2, 3
+
+MAX_QUEUED_SPANS = 10000
+EXPORT_BATCH = 512
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+_random = random.SystemRandom()
+
+stats = {"spans": 0, "exported": 0, "dropped": 0, "export_errors": 0}
+
+
+def enabled() -> bool:
+    return bool(TRACE_FILE or TRACE_OTLP_ENDPOINT)
+
+
+def _new_id(bits: int) -> str:
+    return f"{_random.getrandbits(bits):0{bits // 4}x}"
+
+
+def trace_id_for(message_id: Optional[str]) -> str:
+    """32-hex trace id; the same WhatsApp message id always gives the same trace"""
+    if not message_id:
+        return _new_id(128)
+    return hashlib.sha256(message_id.encode("utf-8")).hexdigest()[:32]
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "kind", "start_ns", "end_ns",
+                 "attributes", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str] = None, kind: int = INTERNAL,
+                 attributes: Optional[Dict[str, object]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes) if attributes else {}
+        self.error = None
+
+    def set_attribute(self, key: str, value):
+        if value is not None:
+            self.attributes[key] = value
+
+    def record_error(self, exc: BaseException):
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            _finish(self)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def current_trace_id() -> Optional[str]:
+    span = _current.get()
+    return span.trace_id if span is not None else None
+
+
+def set_attribute(key: str, value):
+    """Set an attribute on the current span, if any"""
+    span = _current.get()
+    if span is not None:
+        span.set_attribute(key, value)
+
+
+def start_span(name: str, kind: int = INTERNAL, **attributes) -> Span:
+    """A child of the current span (or a new trace) that is not made current; call .end()"""
+    parent = _current.get()
+    if parent is None:
+        return Span(name, _new_id(128), kind=kind, attributes=attributes)
+    return Span(name, parent.trace_id, parent.span_id, kind, attributes)
+
+
+@contextmanager
+def _activate(span: Span):
+    token = _current.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.record_error(e)
+        raise
+    finally:
+        _current.reset(token)
+        span.end()
+
+
+def span(name: str, kind: int = INTERNAL, **attributes):
+    """Context manager: a child span of the current one, current while the block runs"""
+    return _activate(start_span(name, kind, **attributes))
+
+
+def start_trace(message_id: Optional[str], name: str = "webhook", **attributes):
+    """Context manager: the root span for one inbound message"""
+    if message_id:
+        attributes["messaging.message.id"] = message_id
+    return _activate(Span(name, trace_id_for(message_id), kind=SERVER, attributes=attributes))
+
+
+def traced(name: Optional[str] = None, kind: int = INTERNAL, **attributes):
+    """Decorator: run the function inside a span (named after the function by default)"""
+    def decorator(func):
+        span_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, kind, **attributes):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def wrap(func):
+    """Bind func to a copy of the caller's context, for thread pools that don't copy it"""
+    context = contextvars.copy_context()
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return context.run(func, *args, **kwargs)
+    return wrapper
+
+
+# --- Export ---
+
+_queue: "queue.Queue[Span]" = queue.Queue(maxsize=MAX_QUEUED_SPANS)
+_exporter: Optional[threading.Thread] = None
+_exporter_lock = threading.Lock()
+_stop = threading.Event()
+
+
+def _finish(span: Span):
+    stats["spans"] += 1
+    if not enabled():
+        return
+    _ensure_exporter()
+    try:
+        _queue.put_nowait(span)
+    except queue.Full:
+        stats["dropped"] += 1
+
+
+def _ensure_exporter():
+    global _exporter
+    if _exporter is not None and _exporter.is_alive():
+        return
+    with _exporter_lock:
+        if _exporter is None or not _exporter.is_alive():
+            _stop.clear()
+            _exporter = threading.Thread(target=_export_loop, name="trace-export", daemon=True)
+            _exporter.start()
+
+
+def _value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _attributes(attributes: Dict[str, object]) -> List[dict]:
+    return [{"key": key, "value": _value(value)} for key, value in attributes.items()]
+
+
+def _otlp_span(span: Span) -> dict:
+    data = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": span.kind,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": _attributes(span.attributes),
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+    }
+    if span.parent_id:
+        data["parentSpanId"] = span.parent_id
+    return data
+
+
+def to_otlp(spans: List[Span]) -> dict:
+    """An OTLP/HTTP JSON ExportTraceServiceRequest for the given spans"""
+    resource = {"service.name": TRACE_SERVICE_NAME, "process.pid": os.getpid()}
+    return {"resourceSpans": [{
+        "resource": {"attributes": _attributes(resource)},
+        "scopeSpans": [{"scope": {"name": __name__}, "spans": [_otlp_span(s) for s in spans]}],
+    }]}
+
+
+def _export(spans: List[Span]):
+    body = to_otlp(spans)
+    try:
+        if TRACE_FILE:
+            with open(TRACE_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps(body, separators=(",", ":")) + "\n")
+        if TRACE_OTLP_ENDPOINT:
+            r = requests.post(TRACE_OTLP_ENDPOINT, json=body, timeout=5)
+            r.raise_for_status()
+        stats["exported"] += len(spans)
+    except Exception as e:
+        stats["export_errors"] += 1
+        logger.warning("Export of %d span(s) failed: %s", len(spans), e)
+
+
+def _drain(limit: int = EXPORT_BATCH) -> List[Span]:
+    spans = []
+    while len(spans) < limit:
+        try:
+            spans.append(_queue.get_nowait())
+        except queue.Empty:
+            break
+    return spans
+
+
+def _export_loop():
+    while not _stop.wait(TRACE_EXPORT_INTERVAL):
+        while True:
+            spans = _drain()
+            if not spans:
+                break
+            _export(spans)
+
+
+def flush():
+    """Export everything queued so far (called on shutdown)"""
+    _stop.set()
+    if _exporter is not None:
+        _exporter.join(timeout=5)
+    while True:
+        spans = _drain()
+        if not spans:
+            break
+        _export(spans)
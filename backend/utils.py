@@ -1,6 +1,5 @@
 import json
-import re
-from datetime import datetime
+from . import reference, validators
 
 def dumps(obj):
     try:
@@ -15,37 +14,30 @@ def loads(s):
         return {}
 
 def generate_reference_number(complaint_id):
-    """Generate a reference number in format: 1930-YYYYMMDD-XXXXX"""
-    date_str = datetime.now().strftime("%Y%m%d")
-    return f"1930-{date_str}-{str(complaint_id).zfill(5)}"
+    """Generate a reference number in format: 1930-YYYYMMDD-NN-XXXXX (see backend.reference)"""
+    return reference.allocate(complaint_id)
+
+def parse_reference_number(value):
+    """Return the complaint id embedded in a reference number (current or legacy format), or None"""
+    decoded = reference.decode(value)
+    return decoded.complaint_id if decoded else None
+
+def normalize_phone(phone):
+    """Return the 10-digit national number (without +91 / 91 / 0 prefix, spaces or dashes), or ''"""
+    return validators.phone(phone) or ""
 
 def validate_phone(phone):
     """Validate Indian phone number (10 digits, optionally with +91)"""
-    phone = phone.strip().replace(" ", "").replace("-", "")
-    if phone.startswith("+91"):
-        phone = phone[3:]
-    elif phone.startswith("91") and len(phone) == 12:
-        phone = phone[2:]
-    return len(phone) == 10 and phone.isdigit()
+    return validators.phone(phone) is not None
 
 def validate_email(email):
     """Basic email validation"""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return bool(re.match(pattern, email.strip()))
+    return validators.email(email) is not None
 
 def validate_pin_code(pin):
     """Validate Indian PIN code (6 digits)"""
-    pin = pin.strip().replace(" ", "")
-    return len(pin) == 6 and pin.isdigit()
+    return validators.pin_code(pin) is not None
 
 def validate_date_of_birth(dob):
-    """Validate date of birth (DD/MM/YYYY or DD-MM-YYYY)"""
-    patterns = [
-        r'^\d{2}/\d{2}/\d{4}$',
-        r'^\d{2}-\d{2}-\d{4}$',
-        r'^\d{4}-\d{2}-\d{2}$',  # YYYY-MM-DD
-    ]
-    for pattern in patterns:
-        if re.match(pattern, dob.strip()):
-            return True
-    return False
+    """Validate date of birth (DD/MM/YYYY, DD-MM-YYYY or YYYY-MM-DD)"""
+    return validators.date_of_birth(dob) is not None
@@ -0,0 +1,208 @@
+"""
+Field validation and normalization for complaint data.
+
+Each validator takes the raw text and returns the normalized value (canonical
+10-digit phone, ISO date, ...) or None when the value is invalid. Patterns are
+compiled once at import. `validate_records` checks whole columns of records
+(imports, data-quality scans) and adds the PIN code / district cross-check.
+"""
+import re
+from datetime import date
+from typing import Callable, Dict, Iterable, List, Optional
+
+_PHONE_SEPARATORS = re.compile(r"[\s\-().]")
+_PHONE = re.compile(r"(?:\+?91|0)?(\d{10})")
+_EMAIL = re.compile(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
+_PIN = re.compile(r"[1-9]\d{5}")
+_PIN_SEPARATORS = re.compile(r"\s")
+_DMY = re.compile(r"(\d{2})[/-](\d{2})[/-](\d{4})")
+_ISO = re.compile(r"(\d{4})-(\d{2})-(\d{2})")
+_DISTRICT_CLEAN = re.compile(r"[^a-z]+")
+
+MIN_BIRTH_YEAR = 1900
+
+
+def phone(value) -> Optional[str]:
+    """Indian phone number -> 10 digits (drops +91 / 91 / 0 prefix, spaces, dashes)"""
+    match = _PHONE.fullmatch(_PHONE_SEPARATORS.sub("", value or ""))
+    return match.group(1) if match else None
+
+
+def email(value) -> Optional[str]:
+    """Email address with the domain lower-cased"""
+    value = (value or "").strip()
+    if not _EMAIL.fullmatch(value):
+        return None
+    local, domain = value.rsplit("@", 1)
+    return f"{local}@{domain.lower()}"
+
+
+def pin_code(value) -> Optional[str]:
+    """Indian PIN code -> 6 digits"""
+    value = _PIN_SEPARATORS.sub("", value or "")
+    return value if _PIN.fullmatch(value) else None
+
+
+def date_of_birth(value) -> Optional[str]:
+    """DD/MM/YYYY, DD-MM-YYYY or YYYY-MM-DD -> ISO YYYY-MM-DD (must be a real, past date)"""
+    value = (value or "").strip()
+    match = _DMY.fullmatch(value)
+    if match:
+        day, month, year = match.groups()
+    else:
+        match = _ISO.fullmatch(value)
+        if not match:
+            return None
+        year, month, day = match.groups()
+    try:
+        parsed = date(int(year), int(month), int(day))
+    except ValueError:
+        return None
+    if parsed.year < MIN_BIRTH_YEAR or parsed > date.today():
+        return None
+    return parsed.isoformat()
+
+
+_GENDERS = {"m": "Male", "male": "Male", "f": "Female", "female": "Female", "o": "Other", "other": "Other"}
+
+
+def gender(value) -> Optional[str]:
+    return _GENDERS.get((value or "").strip().lower())
+
+
+FIELD_VALIDATORS: Dict[str, Callable[[str], Optional[str]]] = {
+    "phone_number": phone,
+    "email_id": email,
+    "pin_code": pin_code,
+    "date_of_birth": date_of_birth,
+    "gender": gender,
+}
+
+
+# --- PIN code -> district (Odisha) ---
+
+# First three digits of the PIN (sorting district) -> districts it delivers to
+ODISHA_PIN_DISTRICTS = {
+    "751": {"Khordha"},
+    "752": {"Khordha", "Puri", "Nayagarh"},
+    "753": {"Cuttack"},
+    "754": {"Cuttack", "Jagatsinghpur", "Kendrapara", "Jajpur"},
+    "755": {"Jajpur", "Kendrapara", "Bhadrak"},
+    "756": {"Balasore", "Bhadrak"},
+    "757": {"Mayurbhanj"},
+    "758": {"Keonjhar"},
+    "759": {"Dhenkanal", "Angul"},
+    "760": {"Ganjam"},
+    "761": {"Ganjam", "Gajapati", "Kandhamal"},
+    "762": {"Kandhamal", "Boudh"},
+    "763": {"Koraput"},
+    "764": {"Koraput", "Malkangiri", "Nabarangpur"},
+    "765": {"Rayagada"},
+    "766": {"Kalahandi", "Nuapada"},
+    "767": {"Bolangir", "Sonepur"},
+    "768": {"Sambalpur", "Bargarh", "Jharsuguda", "Deogarh"},
+    "769": {"Sundargarh"},
+    "770": {"Sundargarh"},
+}
+
+# Alternative spellings -> the names used above
+DISTRICT_ALIASES = {
+    "khurda": "Khordha", "khurdha": "Khordha", "bhubaneswar": "Khordha",
+    "baleswar": "Balasore", "baleshwar": "Balasore",
+    "kendujhar": "Keonjhar", "keonjhargarh": "Keonjhar",
+    "anugul": "Angul",
+    "balangir": "Bolangir",
+    "subarnapur": "Sonepur", "sonapur": "Sonepur",
+    "debagarh": "Deogarh", "debgarh": "Deogarh",
+    "baudh": "Boudh", "bauda": "Boudh",
+    "jagatsinghapur": "Jagatsinghpur",
+    "nabarangapur": "Nabarangpur", "nowrangpur": "Nabarangpur",
+    "jajapur": "Jajpur",
+    "phulbani": "Kandhamal",
+    "berhampur": "Ganjam", "brahmapur": "Ganjam",
+    "rourkela": "Sundargarh",
+    "malkanagiri": "Malkangiri",
+}
+
+_DISTRICTS = {_DISTRICT_CLEAN.sub("", d.lower()): d for names in ODISHA_PIN_DISTRICTS.values() for d in names}
+_DISTRICTS.update(DISTRICT_ALIASES)
+
+
+def district(value) -> Optional[str]:
+    """Canonical Odisha district name, or None if not recognised"""
+    key = _DISTRICT_CLEAN.sub("", (value or "").lower())
+    if key.endswith("district"):
+        key = key[:-len("district")]
+    return _DISTRICTS.get(key)
+
+
+def districts_for_pin(pin) -> Optional[set]:
+    """Districts served by a PIN code, or None outside Odisha"""
+    pin = pin_code(pin)
+    return ODISHA_PIN_DISTRICTS.get(pin[:3]) if pin else None
+
+
+def pin_district_mismatch(pin, district_name) -> Optional[str]:
+    """Describe a PIN code / district disagreement, or None if they agree or can't be checked"""
+    served = districts_for_pin(pin)
+    name = district(district_name)
+    if served is None or name is None or name in served:
+        return None
+    return f"PIN {pin_code(pin)} is in {'/'.join(sorted(served))}, not {name}"
+
+
+# --- Bulk validation ---
+
+def validate_record(record: Dict[str, str]):
+    """(normalized, errors) for one record; empty fields are neither"""
+    normalized, errors = {}, {}
+    for field, check in FIELD_VALIDATORS.items():
+        value = record.get(field)
+        if not value:
+            continue
+        result = check(value)
+        if result is None:
+            errors[field] = value
+        else:
+            normalized[field] = result
+    mismatch = pin_district_mismatch(record.get("pin_code"), record.get("district"))
+    if mismatch:
+        errors["district"] = mismatch
+    return normalized, errors
+
+
+def validate_records(records: Iterable[Dict[str, str]], fields: Optional[List[str]] = None, id_field: str = "id"):
+    """
+    Validate columns of records at once.
+
+    Returns {"records": n, "fields": {field: {"valid", "invalid", "empty", "invalid_ids"}},
+    "pin_district_mismatches": [{"id", "pin_code", "district", "message"}]}.
+    """
+    records = list(records)
+    fields = fields or list(FIELD_VALIDATORS)
+    ids = [record.get(id_field) for record in records]
+    report = {"records": len(records), "fields": {}, "pin_district_mismatches": []}
+
+    for field in fields:
+        check = FIELD_VALIDATORS[field]
+        column = [record.get(field) or "" for record in records]
+        results = list(map(check, column))
+        empty = sum(1 for value in column if not value)
+        invalid_ids = [ids[i] for i, (value, result) in enumerate(zip(column, results)) if value and result is None]
+        report["fields"][field] = {
+            "valid": len(records) - empty - len(invalid_ids),
+            "invalid": len(invalid_ids),
+            "empty": empty,
+            "invalid_ids": invalid_ids,
+        }
+
+    for record_id, record in zip(ids, records):
+        mismatch = pin_district_mismatch(record.get("pin_code"), record.get("district"))
+        if mismatch:
+            report["pin_district_mismatches"].append({
+                "id": record_id,
+                "pin_code": record.get("pin_code"),
+                "district": record.get("district"),
+                "message": mismatch,
+            })
+    return report
@@ -0,0 +1,45 @@
+"""
+Verified sessions for status checks.
+
+When a user finishes the status-check verification, a row for their wa_id and
+the complaint is stored with an expiry. Until then, checking the same complaint
+again from the same wa_id skips the personal-details questions.
+"""
+from datetime import datetime, timedelta
+
+from .config import STATUS_VERIFICATION_TTL
+from .models import StatusVerification
+
+
+def issue(db, wa_id, complaint_id):
+    """Record a completed verification for (wa_id, complaint)"""
+    if STATUS_VERIFICATION_TTL <= 0:
+        return
+    now = datetime.utcnow()
+    # One live session per (wa_id, complaint): replace the previous one
+    db.query(StatusVerification).filter_by(wa_id=wa_id, complaint_id=complaint_id).delete()
+    verification = StatusVerification(
+        wa_id=wa_id,
+        complaint_id=complaint_id,
+        created_at=now,
+        expires_at=now + timedelta(seconds=STATUS_VERIFICATION_TTL),
+    )
+    db.add(verification)
+    db.commit()
+
+
+def is_verified(db, wa_id, complaint_id):
+    if STATUS_VERIFICATION_TTL <= 0:
+        return False
+    return db.query(StatusVerification.id).filter(
+        StatusVerification.wa_id == wa_id,
+        StatusVerification.complaint_id == complaint_id,
+        StatusVerification.expires_at > datetime.utcnow(),
+    ).first() is not None
+
+
+def purge_expired(db):
+    """Delete expired sessions; returns the number of rows removed"""
+    removed = db.query(StatusVerification).filter(StatusVerification.expires_at <= datetime.utcnow()).delete()
+    db.commit()
+    return removed
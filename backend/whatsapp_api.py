@@ -1,24 +1,38 @@
 import os
+import logging
 import requests, json
-from .config import WHATSAPP_TOKEN, PHONE_NUMBER_ID, GRAPH_VERSION, DEBUG_PRINT_REPLY
+from requests.adapters import HTTPAdapter
+from .config import WHATSAPP_TOKEN, PHONE_NUMBER_ID, GRAPH_VERSION, GRAPH_API_BASE, DEBUG_PRINT_REPLY, MEDIA_DIR
+from . import metrics, tracing
+
+logger = logging.getLogger(__name__)
 
-BASE_DIR = os.path.dirname(os.path.dirname(__file__))
-MEDIA_DIR = os.path.join(BASE_DIR, "media")
 os.makedirs(MEDIA_DIR, exist_ok=True)
 
+MESSAGES_URL = f"{GRAPH_API_BASE}/{GRAPH_VERSION}/{PHONE_NUMBER_ID}/messages"
+
+# Keep-alive connections to the Graph API, shared by the worker threads
+_http = requests.Session()
+_http.mount(GRAPH_API_BASE, HTTPAdapter(pool_connections=4, pool_maxsize=32))
+
+def media_info_url(media_id: str) -> str:
+    return f"{GRAPH_API_BASE}/{GRAPH_VERSION}/{media_id}"
+
 def _should_send():
     return bool(WHATSAPP_TOKEN and PHONE_NUMBER_ID)
 
+@metrics.timed(metrics.SEND_SECONDS, "text")
+@tracing.traced("whatsapp.send", tracing.CLIENT, **{"whatsapp.message_kind": "text"})
 def send_message(to: str, text: str):
     """Send a text message to a user via WhatsApp Cloud API.
-    If credentials are not set, fallback to printing (helpful for local dev).
+    If credentials are not set, fallback to logging the reply (helpful for local dev).
     """
     if not _should_send():
         if DEBUG_PRINT_REPLY == "1":
-            print(f"[DRY-RUN] To: {to} | Message: {text}")
+            logger.info("[DRY-RUN] To: %s | Message: %s", to, text)
         return {"ok": True, "dry_run": True}
 
-    url = f"https://graph.facebook.com/{GRAPH_VERSION}/{PHONE_NUMBER_ID}/messages"
+    url = MESSAGES_URL
     headers = {
         "Authorization": f"Bearer {WHATSAPP_TOKEN}",
         "Content-Type": "application/json"
@@ -30,12 +44,18 @@ def send_message(to: str, text: str):
         "text": {"body": text}
     }
     try:
-        r = requests.post(url, json=payload, headers=headers, timeout=10)
+        r = _http.post(url, json=payload, headers=headers, timeout=10)
         return r.json()
     except Exception as e:
-        print(f"Error sending WhatsApp message: {e}")
+        logger.warning("Error sending WhatsApp message: %s", e)
         return {"ok": False, "error": str(e)}
 
+def send_message_stream(to: str, messages):
+    """Send each message of an iterable as soon as it is produced (e.g. a streamed answer)."""
+    return [send_message(to, text) for text in messages]
+
+@metrics.timed(metrics.SEND_SECONDS, "image")
+@tracing.traced("whatsapp.send", tracing.CLIENT, **{"whatsapp.message_kind": "image"})
 def send_image(to: str, image_url: str, caption: str = ""):
     """Send an image message via WhatsApp Cloud API.
     image_url: Public URL of the image
@@ -43,10 +63,10 @@ def send_image(to: str, image_url: str, caption: str = ""):
     """
     if not _should_send():
         if DEBUG_PRINT_REPLY == "1":
-            print(f"[DRY-RUN] To: {to} | Image: {image_url} | Caption: {caption}")
+            logger.info("[DRY-RUN] To: %s | Image: %s | Caption: %s", to, image_url, caption)
         return {"ok": True, "dry_run": True}
 
-    url = f"https://graph.facebook.com/{GRAPH_VERSION}/{PHONE_NUMBER_ID}/messages"
+    url = MESSAGES_URL
     headers = {
         "Authorization": f"Bearer {WHATSAPP_TOKEN}",
         "Content-Type": "application/json"
@@ -61,34 +81,37 @@ def send_image(to: str, image_url: str, caption: str = ""):
         }
     }
     try:
-        r = requests.post(url, json=payload, headers=headers, timeout=10)
+        r = _http.post(url, json=payload, headers=headers, timeout=10)
         return r.json()
     except Exception as e:
-        print(f"Error sending WhatsApp image: {e}")
+        logger.warning("Error sending WhatsApp image: %s", e)
         return {"ok": False, "error": str(e)}
 
-def send_interactive_buttons(to: str, text: str, buttons: list):
-    """Send an interactive button message.
-    buttons: List of dicts with 'id' and 'title' keys. Max 3 buttons.
-    Example: [{"id": "A", "title": "New Complaint"}, {"id": "B", "title": "Status Check"}]
-    """
-    if not _should_send():
-        if DEBUG_PRINT_REPLY == "1":
-            button_text = "\n".join([f"[{b.get('id', '')}] {b.get('title', '')}" for b in buttons])
-            print(f"[DRY-RUN] To: {to} | Interactive Buttons:\n{text}\n{button_text}")
-        return {"ok": True, "dry_run": True}
+class PreparedInteractive:
+    """An interactive message whose JSON body is encoded once.
+    Sending only splices the recipient into the pre-encoded bytes."""
 
-    if len(buttons) > 3:
-        buttons = buttons[:3]  # WhatsApp allows max 3 buttons
+    def __init__(self, kind: str, interactive: dict, dry_run_text: str, fallback_text: str):
+        self.kind = kind
+        self.dry_run_text = dry_run_text
+        self.fallback_text = fallback_text
+        body = json.dumps({
+            "messaging_product": "whatsapp",
+            "to": "",
+            "type": "interactive",
+            "interactive": interactive
+        }, ensure_ascii=False)
+        head, tail = body.split('"to": ""', 1)
+        self._head = (head + '"to": ').encode("utf-8")
+        self._tail = tail.encode("utf-8")
 
-    url = f"https://graph.facebook.com/{GRAPH_VERSION}/{PHONE_NUMBER_ID}/messages"
-    headers = {
-        "Authorization": f"Bearer {WHATSAPP_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
+    def body(self, to: str) -> bytes:
+        return self._head + json.dumps(str(to)).encode("utf-8") + self._tail
+
+def prepare_buttons(text: str, buttons: list) -> PreparedInteractive:
+    """Build a button message (see send_interactive_buttons)"""
     interactive_buttons = []
-    for btn in buttons:
+    for btn in buttons[:3]:  # WhatsApp allows max 3 buttons
         interactive_buttons.append({
             "type": "reply",
             "reply": {
@@ -96,74 +119,24 @@ def send_interactive_buttons(to: str, text: str, buttons: list):
                 "title": btn.get("title", "")[:20]  # Max 20 chars
             }
         })
-    
-    payload = {
-        "messaging_product": "whatsapp",
-        "to": to,
-        "type": "interactive",
-        "interactive": {
-            "type": "button",
-            "body": {"text": text[:1024]},
-            "action": {
-                "buttons": interactive_buttons
-            }
+    interactive = {
+        "type": "button",
+        "body": {"text": text[:1024]},
+        "action": {
+            "buttons": interactive_buttons
         }
     }
-    try:
-        r = requests.post(url, json=payload, headers=headers, timeout=10)
-        result = r.json()
-        
-        # Check if message was sent successfully
-        if result.get("messages"):
-            print(f"[DEBUG] Interactive buttons sent successfully to {to}")
-            return result
-        
-        # If there's an error, log it and fallback
-        if result.get("error"):
-            error_msg = result.get("error", {}).get("message", "Unknown error")
-            print(f"[ERROR] Failed to send interactive buttons to {to}: {error_msg}")
-            print(f"[DEBUG] Falling back to text message")
-            # Fallback to text message if interactive fails
-            button_text = "\n".join([f"{b.get('id', '')}. {b.get('title', '')}" for b in buttons])
-            fallback_text = text + "\n\n" + button_text
-            return send_message(to, fallback_text)
-        
-        # If no messages and no error, something unexpected happened
-        print(f"[WARNING] Unexpected response from WhatsApp API: {result}")
-        button_text = "\n".join([f"{b.get('id', '')}. {b.get('title', '')}" for b in buttons])
-        fallback_text = text + "\n\n" + button_text
-        return send_message(to, fallback_text)
-        
-    except Exception as e:
-        print(f"[ERROR] Exception sending interactive buttons to {to}: {e}")
-        import traceback
-        traceback.print_exc()
-        # Fallback to text message
-        button_text = "\n".join([f"{b.get('id', '')}. {b.get('title', '')}" for b in buttons])
-        fallback_text = text + "\n\n" + button_text
-        return send_message(to, fallback_text)
+    dry_run_text = "\n".join([f"[{b.get('id', '')}] {b.get('title', '')}" for b in buttons])
+    fallback_text = "\n".join([f"{b.get('id', '')}. {b.get('title', '')}" for b in buttons[:3]])
+    return PreparedInteractive(
+        "buttons",
+        interactive,
+        f"Interactive Buttons:\n{text}\n{dry_run_text}",
+        text + "\n\n" + fallback_text,
+    )
 
-def send_interactive_list(to: str, text: str, button_text: str, sections: list):
-    """Send an interactive list message.
-    sections: List of dicts with 'title' and 'rows' (list of {id, title, description})
-    Example: [{"title": "Fraud Types", "rows": [{"id": "1", "title": "UPI Fraud"}]}]
-    """
-    if not _should_send():
-        if DEBUG_PRINT_REPLY == "1":
-            list_text = "\n".join([
-                f"{row.get('id', '')}. {row.get('title', '')}" 
-                for section in sections 
-                for row in section.get('rows', [])
-            ])
-            print(f"[DRY-RUN] To: {to} | Interactive List:\n{text}\n{list_text}")
-        return {"ok": True, "dry_run": True}
-
-    url = f"https://graph.facebook.com/{GRAPH_VERSION}/{PHONE_NUMBER_ID}/messages"
-    headers = {
-        "Authorization": f"Bearer {WHATSAPP_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
+def prepare_list(text: str, button_text: str, sections: list) -> PreparedInteractive:
+    """Build a list message (see send_interactive_list)"""
     # Format sections for WhatsApp API
     formatted_sections = []
     for section in sections[:10]:  # Max 10 sections
@@ -179,63 +152,82 @@ def send_interactive_list(to: str, text: str, button_text: str, sections: list):
                 "title": section.get("title", "")[:24],
                 "rows": rows
             })
-    
-    payload = {
-        "messaging_product": "whatsapp",
-        "to": to,
-        "type": "interactive",
-        "interactive": {
-            "type": "list",
-            "body": {"text": text[:1024]},
-            "action": {
-                "button": button_text[:20],
-                "sections": formatted_sections
-            }
+    interactive = {
+        "type": "list",
+        "body": {"text": text[:1024]},
+        "action": {
+            "button": button_text[:20],
+            "sections": formatted_sections
         }
     }
+    list_text = "\n".join([
+        f"{row.get('id', '')}. {row.get('title', '')}"
+        for section in sections
+        for row in section.get('rows', [])
+    ])
+    return PreparedInteractive(
+        "list",
+        interactive,
+        f"Interactive List:\n{text}\n{list_text}",
+        text + "\n\n" + list_text,
+    )
+
+@metrics.timed(metrics.SEND_SECONDS, "interactive")
+@tracing.traced("whatsapp.send", tracing.CLIENT, **{"whatsapp.message_kind": "interactive"})
+def send_prepared(to: str, message: PreparedInteractive):
+    """Send a prepared interactive message, falling back to plain text if it is rejected"""
+    if not _should_send():
+        if DEBUG_PRINT_REPLY == "1":
+            logger.info("[DRY-RUN] To: %s | %s", to, message.dry_run_text)
+        return {"ok": True, "dry_run": True}
+
+    url = MESSAGES_URL
+    headers = {
+        "Authorization": f"Bearer {WHATSAPP_TOKEN}",
+        "Content-Type": "application/json"
+    }
     try:
-        r = requests.post(url, json=payload, headers=headers, timeout=10)
+        r = _http.post(url, data=message.body(to), headers=headers, timeout=10)
         result = r.json()
         
         # Check if message was sent successfully
         if result.get("messages"):
-            print(f"[DEBUG] Interactive list sent successfully to {to}")
+            logger.debug("Interactive %s sent", message.kind, extra={"to": to})
             return result
         
         # If there's an error, log it and fallback
         if result.get("error"):
             error_msg = result.get("error", {}).get("message", "Unknown error")
-            print(f"[ERROR] Failed to send interactive list to {to}: {error_msg}")
-            print(f"[DEBUG] Falling back to text message")
-            # Fallback to text message if interactive fails
-            fallback_text = text + "\n\n" + "\n".join([
-                f"{row.get('id', '')}. {row.get('title', '')}" 
-                for section in sections 
-                for row in section.get('rows', [])
-            ])
-            return send_message(to, fallback_text)
+            logger.warning("Interactive %s rejected, falling back to text: %s", message.kind, error_msg, extra={"to": to})
+            return send_message(to, message.fallback_text)
         
         # If no messages and no error, something unexpected happened
-        print(f"[WARNING] Unexpected response from WhatsApp API: {result}")
-        fallback_text = text + "\n\n" + "\n".join([
-            f"{row.get('id', '')}. {row.get('title', '')}" 
-            for section in sections 
-            for row in section.get('rows', [])
-        ])
-        return send_message(to, fallback_text)
+        logger.warning("Unexpected response from WhatsApp API: %s", result)
+        return send_message(to, message.fallback_text)
         
     except Exception as e:
-        print(f"[ERROR] Exception sending interactive list to {to}: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Exception sending interactive %s", message.kind, extra={"to": to})
         # Fallback to text message
-        fallback_text = text + "\n\n" + "\n".join([
-            f"{row.get('id', '')}. {row.get('title', '')}" 
-            for section in sections 
-            for row in section.get('rows', [])
-        ])
-        return send_message(to, fallback_text)
+        return send_message(to, message.fallback_text)
+
+def send_interactive_buttons(to: str, text: str, buttons: list):
+    """Send an interactive button message.
+    buttons: List of dicts with 'id' and 'title' keys. Max 3 buttons.
+    Example: [{"id": "A", "title": "New Complaint"}, {"id": "B", "title": "Status Check"}]
+    Messages with static content should be prepared once (see interactive.py).
+    """
+    return send_prepared(to, prepare_buttons(text, buttons))
+
+def send_interactive_list(to: str, text: str, button_text: str, sections: list):
+    """Send an interactive list message.
+    sections: List of dicts with 'title' and 'rows' (list of {id, title, description})
+    Example: [{"title": "Fraud Types", "rows": [{"id": "1", "title": "UPI Fraud"}]}]
+    Messages with static content should be prepared once (see interactive.py).
+    """
+    return send_prepared(to, prepare_list(text, button_text, sections))
 
+@metrics.timed(metrics.SEND_SECONDS, "media_download")
+@tracing.traced("whatsapp.download_media", tracing.CLIENT)
 def download_media(media_id: str, media_url: str = None):
     """Download media (image/document) and return a /media/... path the UI can load."""
     filename = f"{media_id}.jpg"
@@ -249,12 +241,12 @@ def download_media(media_id: str, media_url: str = None):
     if media_url:
         try:
             headers = {"Authorization": f"Bearer {WHATSAPP_TOKEN}"}
-            response = requests.get(media_url, headers=headers, timeout=30)
+            response = _http.get(media_url, headers=headers, timeout=30)
             response.raise_for_status()
             with open(file_path, "wb") as f:
                 f.write(response.content)
             return relative_path
         except Exception as e:
-            print(f"Error downloading media: {e}")
+            logger.warning("Error downloading media %s: %s", media_id, e)
 
     return relative_path
@@ -0,0 +1,96 @@
+"""
+Cold-start benchmark for an API worker.
+
+Measures, in fresh interpreter processes:
+- the time to import backend.main (what every uvicorn worker pays before serving)
+- the time from spawning uvicorn until /health answers
+
+Usage:
+    python -m benchmarks.bench_cold_start [--runs 5]
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_IMPORT_PROBE = (
+    "import sys, time; t = time.perf_counter(); import backend.main; "
+    "print(time.perf_counter() - t, int('google.generativeai' in sys.modules))"
+)
+
+
+def _env(workdir):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    env.setdefault("GEMINI_API_KEY", "stub")
+    return env
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def import_time(workdir):
+    out = subprocess.run(
+        [sys.executable, "-c", _IMPORT_PROBE], cwd=workdir, env=_env(workdir),
+        capture_output=True, text=True, check=True,
+    ).stdout.strip().splitlines()[-1]
+    seconds, sdk_loaded = out.split()
+    return float(seconds), sdk_loaded == "1"
+
+
+def time_to_health(workdir, timeout=30.0):
+    port = _free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=_env(workdir), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                if requests.get(f"http://127.0.0.1:{port}/health", timeout=0.5).ok:
+                    return time.perf_counter() - start
+            except requests.RequestException:
+                pass
+            time.sleep(0.01)
+        raise RuntimeError("worker did not answer /health in time")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def run(runs=5):
+    # Separate working directory so the benchmark gets its own SQLite file
+    with tempfile.TemporaryDirectory() as workdir:
+        subprocess.run([sys.executable, "-m", "backend.migrations"], cwd=workdir, env=_env(workdir),
+                       capture_output=True, check=True)
+        imports = [import_time(workdir) for _ in range(runs)]
+        health = [time_to_health(workdir) for _ in range(runs)]
+    return {
+        "cold_start.import_backend_main_ms": statistics.median(t for t, _ in imports) * 1000,
+        "cold_start.gemini_sdk_imported": float(any(loaded for _, loaded in imports)),
+        "cold_start.time_to_health_ms": statistics.median(health) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    for name, value in run(args.runs).items():
+        print(f"{name:40s} {value:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Microbenchmark for the keyword fallback intent detector.
+
+Compares the precompiled Aho-Corasick matcher used by nlu._keyword_intent_detection
+with the previous per-keyword substring scan over the same corpus.
+
+Usage:
+    python -m benchmarks.bench_keyword_intent [--repeat N]
+"""
+import argparse
+import time
+
+from backend import nlu
+from benchmarks.corpus import MESSAGES
+
+
+def _legacy_keyword_intent_detection(user_message):
+    """The substring scan that _keyword_intent_detection used before the automaton"""
+    user_message_lower = user_message.lower()
+    best_intent = "unknown"
+    best_confidence = 0.0
+    for intent, keywords in nlu.INTENTS.items():
+        matches = sum(1 for keyword in keywords if keyword.rstrip("*") in user_message_lower)
+        if matches > 0:
+            confidence = min(0.8, 0.3 + (matches * 0.15))
+            if confidence > best_confidence:
+                best_confidence = confidence
+                best_intent = intent
+    return best_intent, best_confidence
+
+
+def _time_per_message(func, messages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for message in messages:
+            func(message)
+    elapsed = time.perf_counter() - start
+    return elapsed / (repeat * len(messages))
+
+
+def run(repeat=200):
+    """Return {name: microseconds per message}"""
+    return {
+        "keyword_intent.automaton_us": _time_per_message(nlu._keyword_intent_detection, MESSAGES, repeat) * 1e6,
+        "keyword_intent.legacy_scan_us": _time_per_message(_legacy_keyword_intent_detection, MESSAGES, repeat) * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    print(f"Corpus: {len(MESSAGES)} messages x {args.repeat} repeats")
+    for name, value in results.items():
+        print(f"{name:40s} {value:8.2f} us/message")
+
+    changed = [
+        (m, _legacy_keyword_intent_detection(m)[0], nlu._keyword_intent_detection(m)[0])
+        for m in MESSAGES
+    ]
+    changed = [c for c in changed if c[1] != c[2]]
+    if changed:
+        print("\nMessages classified differently (legacy -> automaton):")
+        for message, old, new in changed:
+            print(f"  {old:24s} -> {new:24s} {message}")
+
+
+if __name__ == "__main__":
+    main()
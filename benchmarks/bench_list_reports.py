@@ -0,0 +1,93 @@
+"""
+Benchmark for the dashboard listing (/_demo/reports) as the complaints table grows.
+
+Builds SQLite databases of 10k / 100k / 1M complaints (one document each) with the
+real schema and times list_reports, which returns the newest 200.
+
+Usage:
+    python -m benchmarks.bench_list_reports [--sizes 10000,100000,1000000] [--repeat N]
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+
+
+def _populate(path, rows):
+    from backend.migrations import migrate
+
+    engine = create_engine(f"sqlite:///{path}")
+    migrate(engine)
+    engine.dispose()
+
+    start = datetime(2024, 1, 1)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    statuses = ("submitted", "submitted", "in_progress", "resolved", "draft")
+    for offset in range(0, rows, 50_000):
+        batch = range(offset + 1, min(rows, offset + 50_000) + 1)
+        conn.executemany(
+            "INSERT INTO complaints (id, wa_id, reference_number, status, complaint_type, main_category, fraud_type, "
+            "name, phone_number, phone_normalized, email_id, district, pin_code, data, documents, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, 'A', 'financial_fraud', 'UPI Fraud', ?, ?, ?, ?, 'Khordha', '751001', '{}', '[]', ?, ?)",
+            (
+                (i, f"91{9000000000 + i}", f"1930-20240101-01-{i:05d}", statuses[i % len(statuses)], f"User {i}",
+                 f"{9000000000 + i}", f"{9000000000 + i}", f"user{i}@example.com",
+                 (start + timedelta(seconds=30 * i)).isoformat(" "), (start + timedelta(seconds=30 * i)).isoformat(" "))
+                for i in batch
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO complaint_documents (complaint_id, path, created_at) VALUES (?, ?, '2024-01-01 00:00:00')",
+            ((i, f"/media/{i}.jpg") for i in batch),
+        )
+    conn.commit()
+    conn.close()
+
+
+def run(sizes=DEFAULT_SIZES, repeat=5):
+    """Return {name: milliseconds per listing}"""
+    from backend.main import list_reports
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in sizes:
+            path = os.path.join(directory, f"complaints_{rows}.db")
+            _populate(path, rows)
+            engine = create_engine(f"sqlite:///{path}")
+            db = sessionmaker(bind=engine)()
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                list_reports(db)
+                timings.append(time.perf_counter() - start)
+                db.expunge_all()
+            db.close()
+            engine.dispose()
+            os.remove(path)
+            results[f"list_reports.{rows}_rows_ms"] = statistics.median(timings) * 1000
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    for name, value in run(sizes, args.repeat).items():
+        print(f"{name:40s} {value:10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
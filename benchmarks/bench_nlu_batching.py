@@ -0,0 +1,84 @@
+"""
+Benchmark for micro-batched intent detection against the local Gemini stand-in.
+
+Fires a burst of concurrent nlu.detect_intent calls (one thread per simulated
+idle user) with batching on and off, and reports upstream requests and latency.
+
+Usage:
+    python -m benchmarks.bench_nlu_batching [--users 64] [--latency-ms 300]
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+
+PORT = 8091
+
+
+def _burst(nlu, messages):
+    latencies = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(len(messages))
+
+    def user(message):
+        barrier.wait()
+        start = time.perf_counter()
+        nlu.detect_intent(message)
+        with lock:
+            latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=user, args=(m,)) for m in messages]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    latencies.sort()
+    return latencies
+
+
+def run(users=64, latency_ms=300.0, window_ms=5.0):
+    os.environ.setdefault("GEMINI_API_KEY", "stub")
+    os.environ["GEMINI_API_ENDPOINT"] = f"http://127.0.0.1:{PORT}"
+    os.environ["NLU_BATCH_WINDOW_MS"] = str(window_ms)
+    os.environ["GEMINI_MAX_CONCURRENCY"] = "16"
+    os.environ["GEMINI_INTENT_TIMEOUT"] = "30"
+    os.environ["GEMINI_HEDGE_AFTER"] = "0"
+
+    from scripts import stub_gemini
+    from backend import nlu
+    from benchmarks.corpus import MESSAGES
+
+    server = stub_gemini.serve(PORT, latency_ms=latency_ms, jitter_ms=0)
+    messages = [MESSAGES[i % len(MESSAGES)] for i in range(users)]
+    results = {}
+    batcher = nlu.intent_batcher
+    try:
+        for label, active in (("unbatched", None), ("batched", batcher)):
+            nlu.intent_batcher = active
+            before = stub_gemini.STATS["requests"]
+            latencies = _burst(nlu, messages)
+            results[f"nlu_batching.{label}.upstream_requests"] = stub_gemini.STATS["requests"] - before
+            results[f"nlu_batching.{label}.p50_ms"] = statistics.median(latencies) * 1000
+            results[f"nlu_batching.{label}.p95_ms"] = latencies[int(len(latencies) * 0.95) - 1] * 1000
+    finally:
+        nlu.intent_batcher = batcher
+        server.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=64)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    results = run(args.users, args.latency_ms, args.window_ms)
+    print(f"{args.users} concurrent users, upstream latency {args.latency_ms:.0f} ms")
+    for name, value in results.items():
+        print(f"{name:45s} {value:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
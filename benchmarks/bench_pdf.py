@@ -0,0 +1,76 @@
+"""
+Microbenchmark for complaint PDF generation.
+
+Times reports.build_pdf_bytes for a text-only complaint and for an image-heavy one
+(local JPEG attachments of phone-photo size).
+
+Usage:
+    python -m benchmarks.bench_pdf [--repeat N] [--images N]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+from backend.models import Complaint, ComplaintDocument
+from backend.reports import build_pdf_bytes
+
+
+def _complaint(documents):
+    complaint = Complaint(
+        id=1, wa_id="919999000001", reference_number="1930-20250101-01-00001", status="submitted",
+        complaint_type="A", main_category="financial_fraud", fraud_type="UPI Fraud (UPI/IMPS/INB/NEFT/RTGS)",
+        name="Ramesh Kumar", father_spouse_guardian_name="Suresh Kumar", date_of_birth="01/01/1990",
+        phone_number="9876543210", email_id="ramesh@example.com", gender="Male", village="Patia",
+        post_office="KIIT", police_station="Infocity", district="Khordha", pin_code="751024",
+        data='{"transaction_id": "UTR123456789", "amount": "25000"}',
+        created_at=datetime(2025, 1, 1, 10, 0), updated_at=datetime(2025, 1, 1, 10, 5),
+    )
+    complaint.attachments = [ComplaintDocument(path=path) for path in documents]
+    return complaint
+
+
+def _make_images(directory, count):
+    from PIL import Image
+
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"evidence_{i}.jpg")
+        Image.effect_noise((1280, 960), 40 + i).convert("RGB").save(path, "JPEG", quality=85)
+        paths.append(path)
+    return paths
+
+
+def _median_ms(complaint, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        build_pdf_bytes(complaint)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def run(repeat=20, images=6):
+    """Return {name: milliseconds per PDF}"""
+    with tempfile.TemporaryDirectory() as directory:
+        image_complaint = _complaint(_make_images(directory, images))
+        return {
+            "pdf.text_only_ms": _median_ms(_complaint([]), repeat),
+            f"pdf.{images}_images_ms": _median_ms(image_complaint, max(3, repeat // 4)),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--images", type=int, default=6)
+    args = parser.parse_args()
+
+    for name, value in run(args.repeat, args.images).items():
+        print(f"{name:30s} {value:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
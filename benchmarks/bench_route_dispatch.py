@@ -0,0 +1,88 @@
+"""
+Microbenchmark for message routing.
+
+Times one inbound message through route_message / route_interactive for each
+conversation state on an in-memory SQLite database, with replies in dry-run mode
+and NLU on the keyword fallback (no network).
+
+Usage:
+    python -m benchmarks.bench_route_dispatch [--repeat N]
+"""
+import argparse
+import os
+import statistics
+import time
+
+FORM = (
+    "Name: Ramesh\nFather Name: Suresh\nDOB: 01/01/1990\nPhone: 9876543210\nEmail: a@b.com\n"
+    "Gender: Male\nVillage: V\nPost Office: PO\nPolice Station: PS\nDistrict: Khordha\nPIN: 751001"
+)
+
+
+def _cases(complaint_id):
+    """(name, state, meta, kind, payload): kind is "text" or "reply" (button/list id)"""
+    in_complaint = {"complaint_id": complaint_id, "field_index": 0}
+    return [
+        ("idle.greeting", "idle", {}, "text", "hi"),
+        ("idle.free_text_intent", "idle", {}, "text", "my instagram account hacked please help"),
+        ("menu.button_new_complaint", "menu", {}, "reply", "A"),
+        ("category.button_financial", "new_complaint:choose_category", in_complaint, "reply", "1"),
+        ("financial_type.list_reply", "new_complaint:financial_type", in_complaint, "reply", "3"),
+        ("personal_info.one_field", "new_complaint:personal_info:0", in_complaint, "text", "Ramesh"),
+        ("personal_info.full_form", "new_complaint:personal_info:0", in_complaint, "text", FORM),
+        ("status.lookup_phone", "status_check:ask_reference", {}, "text", "9876543210"),
+    ]
+
+
+def run(repeat=200):
+    """Return {name: microseconds per message}"""
+    os.environ["DEBUG_PRINT_REPLY"] = "0"
+    os.environ["WHATSAPP_TOKEN"] = ""
+    os.environ["GEMINI_API_KEY"] = ""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    from backend.db import Base
+    from backend.message_router import route_interactive, route_message
+    from backend.models import Complaint, ConversationState
+    from backend.utils import dumps
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    wa_id = "919999000001"
+    complaint = Complaint(wa_id=wa_id, status="submitted", phone_number="9876543210", reference_number="1930-20250101-01-00001")
+    db.add(complaint)
+    db.add(ConversationState(wa_id=wa_id, state="idle", meta="{}"))
+    db.commit()
+
+    results = {}
+    for name, state, meta, kind, payload in _cases(complaint.id):
+        timings = []
+        for _ in range(repeat):
+            cs = db.query(ConversationState).filter_by(wa_id=wa_id).first()
+            cs.state, cs.meta = state, dumps(meta)
+            db.commit()
+            start = time.perf_counter()
+            if kind == "reply":
+                route_interactive(db, wa_id, payload)
+            else:
+                route_message(db, wa_id, payload)
+            timings.append(time.perf_counter() - start)
+        results[f"route.{name}_us"] = statistics.median(timings) * 1e6
+    db.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    for name, value in run(args.repeat).items():
+        print(f"{name:45s} {value:10.1f} us/message")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Microbenchmark for field validation.
+
+Times the per-field validators in backend.utils on valid and invalid inputs, and
+validators.validate_records over a column-oriented batch (imports, data scans).
+
+Usage:
+    python -m benchmarks.bench_validators [--repeat N] [--records N]
+"""
+import argparse
+import random
+import time
+
+from backend import utils, validators
+
+SAMPLES = {
+    "validate_phone": ["9876543210", "+91 98765-43210", "09876543210", "12345", "98765abcde"],
+    "validate_email": ["user@example.com", "first.last+tag@Mail.Example.IN", "no-at-sign", "a@b"],
+    "validate_pin_code": ["751001", "751 001", "051001", "75100"],
+    "validate_date_of_birth": ["01/01/1990", "1990-01-01", "31/02/1990", "1/1/90"],
+}
+
+
+def _records(n, seed=1930):
+    rng = random.Random(seed)
+    districts = ["Khordha", "Cuttack", "Puri", "Ganjam", "Sambalpur"]
+    return [
+        {
+            "id": i,
+            "phone_number": f"9{rng.randrange(10 ** 9):09d}" if rng.random() > 0.05 else "12345",
+            "email_id": f"user{i}@example.com" if rng.random() > 0.05 else "broken",
+            "pin_code": rng.choice(["751001", "753001", "760001", "768001", "7510"]),
+            "date_of_birth": f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(1950, 2005)}",
+            "gender": rng.choice(["Male", "Female", "Other", "x"]),
+            "district": rng.choice(districts),
+        }
+        for i in range(n)
+    ]
+
+
+def _time_per_call(func, values, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for value in values:
+            func(value)
+    return (time.perf_counter() - start) / (repeat * len(values))
+
+
+def run(repeat=2000, records=10000):
+    """Return {name: microseconds per value / per record}"""
+    results = {}
+    for name, values in SAMPLES.items():
+        results[f"validators.{name}_us"] = _time_per_call(getattr(utils, name), values, repeat) * 1e6
+    batch = _records(records)
+    start = time.perf_counter()
+    validators.validate_records(batch)
+    results["validators.validate_records_per_record_us"] = (time.perf_counter() - start) / records * 1e6
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--records", type=int, default=10000)
+    args = parser.parse_args()
+
+    for name, value in run(args.repeat, args.records).items():
+        print(f"{name:50s} {value:8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Sample inbound messages used by the benchmarks.
+Collected from the kind of free text users send to the helpline (anonymised).
+"""
+
+MESSAGES = [
+    "hi",
+    "hello",
+    "start",
+    "I was scammed on UPI, money got debited twice",
+    "someone took 25000 rupees from my bank account through a fake link",
+    "my instagram account hacked please help",
+    "there is a fake facebook profile using my photos",
+    "someone is impersonating me on whatsapp and asking my friends for money",
+    "what is the status of my complaint 1930-20251111-00042",
+    "check status",
+    "i want to track my complaint",
+    "my bank account is frozen by police, how to unfreeze",
+    "account blocked after I received money from OLX buyer",
+    "how to report cyber crime",
+    "what is 1930",
+    "how to report UPI fraud",
+    "i got a call from customer care and they asked for OTP, lost 5000",
+    "loan app people are threatening me and sending my photos",
+    "my gmail is hacked and youtube channel deleted",
+    "telegram job task fraud, invested 40000",
+    "debit card used without my knowledge at an ATM in another state",
+    "credit card transaction i did not do",
+    "got a lottery message saying i won 25 lakh",
+    "my accountant is asking about the transaction details",
+    "need guidance on what to do after sharing OTP",
+    "please tell me the process to file a complaint",
+    "A",
+    "B",
+    "1",
+    "done",
+    "Ramesh Kumar",
+    "ramesh.kumar@example.com",
+    "9876543210",
+    "751001",
+    "I received an SMS that my electricity will be cut tonight, paid 1200 through the link",
+    "fraudster made a digital arrest video call and took 3 lakh",
+    "unable to unlock my bank account since last week",
+    "x.com account is posting obscene content in my name",
+    "where is my refund, complaint filed two weeks back",
+    "can you explain how the helpline works",
+]
@@ -0,0 +1,176 @@
+"""
+Benchmark runner: runs the suite, stores the results per version and compares runs.
+
+Each benchmark module exposes run(**options) -> {metric: value}. Every module runs in
+its own interpreter (benchmarks set environment variables before importing the
+backend), and the merged results are written to benchmarks/results/<label>.json,
+where the label defaults to the current git commit.
+
+Metrics ending in _us, _ms or _s are timings (lower is better); a timing that is
+more than --threshold slower than the baseline is reported as a regression and
+makes the runner exit with status 1.
+
+Usage:
+    python -m benchmarks.run                          # default suite, saved under the commit id
+    python -m benchmarks.run --quick                  # smaller sizes, for a fast check
+    python -m benchmarks.run --only pdf,validators --label before-fix
+    python -m benchmarks.run --compare before-fix     # run, then compare against a saved run
+    python -m benchmarks.run --diff before-fix after-fix
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+# name -> (module, options, quick options)
+SUITE = {
+    "route_dispatch": ("benchmarks.bench_route_dispatch", {}, {"repeat": 30}),
+    "keyword_intent": ("benchmarks.bench_keyword_intent", {}, {"repeat": 20}),
+    "validators": ("benchmarks.bench_validators", {}, {"repeat": 200, "records": 2000}),
+    "pdf": ("benchmarks.bench_pdf", {}, {"repeat": 5, "images": 2}),
+    "list_reports": ("benchmarks.bench_list_reports", {}, {"sizes": [10_000, 100_000]}),
+}
+# Slower / process-level benchmarks, only run with --only
+EXTRA = {
+    "cold_start": ("benchmarks.bench_cold_start", {}, {"runs": 2}),
+    "nlu_batching": ("benchmarks.bench_nlu_batching", {}, {"users": 16}),
+}
+
+TIMING_SUFFIXES = ("_us", "_ms", "_s")
+
+_PROBE = """
+import json, sys, importlib
+module = importlib.import_module(sys.argv[1])
+results = module.run(**json.loads(sys.argv[2]))
+with open(sys.argv[3], "w") as f:
+    json.dump(results, f)
+"""
+
+
+def _git(*args):
+    try:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run_benchmark(module, options):
+    """Run module.run(**options) in a fresh interpreter; its own output is discarded"""
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    with tempfile.TemporaryDirectory() as workdir:
+        out = os.path.join(workdir, "results.json")
+        # Own working directory: anything relative (the default SQLite file) stays out of the tree
+        proc = subprocess.run([sys.executable, "-c", _PROBE, module, json.dumps(options), out],
+                              cwd=workdir, env=env, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{module} failed:\n{proc.stderr[-2000:]}")
+        with open(out) as f:
+            return json.load(f)
+
+
+def result_path(label):
+    return os.path.join(RESULTS_DIR, f"{label}.json")
+
+
+def load(label):
+    path = label if os.path.exists(label) else result_path(label)
+    with open(path) as f:
+        return json.load(f)
+
+
+def save(run):
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = result_path(run["label"])
+    with open(path, "w") as f:
+        json.dump(run, f, indent=2, sort_keys=True)
+    return path
+
+
+def compare(baseline, current, threshold):
+    """Rows of (metric, old, new, change) and the list of regressed metrics"""
+    rows, regressions = [], []
+    for metric in sorted(set(baseline["results"]) | set(current["results"])):
+        old, new = baseline["results"].get(metric), current["results"].get(metric)
+        change = (new - old) / old if old and new is not None else None
+        rows.append((metric, old, new, change))
+        if change is not None and metric.endswith(TIMING_SUFFIXES) and change > threshold:
+            regressions.append(metric)
+    return rows, regressions
+
+
+def print_comparison(baseline, current, threshold):
+    rows, regressions = compare(baseline, current, threshold)
+    print(f"\n{'metric':50s} {baseline['label'][:12]:>12s} {current['label'][:12]:>12s} {'change':>8s}")
+    for metric, old, new, change in rows:
+        old_s = f"{old:12.2f}" if old is not None else f"{'-':>12s}"
+        new_s = f"{new:12.2f}" if new is not None else f"{'-':>12s}"
+        change_s = f"{change:+8.1%}" if change is not None else f"{'':>8s}"
+        flag = "  REGRESSION" if metric in regressions else ""
+        print(f"{metric:50s} {old_s} {new_s} {change_s}{flag}")
+    if regressions:
+        print(f"\n{len(regressions)} timing(s) more than {threshold:.0%} slower than {baseline['label']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", help=f"comma-separated benchmarks ({', '.join([*SUITE, *EXTRA])})")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes and fewer repeats")
+    parser.add_argument("--label", help="name of the saved run (default: git commit, +dirty if modified)")
+    parser.add_argument("--compare", metavar="LABEL", help="compare this run against a saved one")
+    parser.add_argument("--diff", nargs=2, metavar=("BASE", "NEW"), help="only compare two saved runs")
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown reported as a regression (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    if args.diff:
+        regressions = print_comparison(load(args.diff[0]), load(args.diff[1]), args.threshold)
+        sys.exit(1 if regressions else 0)
+
+    available = {**SUITE, **EXTRA}
+    names = args.only.split(",") if args.only else list(SUITE)
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    commit = _git("rev-parse", "--short", "HEAD")
+    dirty = bool(_git("status", "--porcelain", "--untracked-files=no"))
+    label = args.label or (f"{commit}+dirty" if dirty else commit) or time.strftime("%Y%m%d-%H%M%S")
+
+    results = {}
+    for name in names:
+        module, options, quick_options = available[name]
+        start = time.perf_counter()
+        values = run_benchmark(module, quick_options if args.quick else options)
+        print(f"[BENCH] {name} ({time.perf_counter() - start:.1f}s)")
+        for metric, value in values.items():
+            print(f"  {metric:50s} {value:12.2f}")
+        results.update(values)
+
+    run = {
+        "label": label,
+        "commit": commit,
+        "dirty": dirty,
+        "quick": args.quick,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}",
+        "results": results,
+    }
+    if args.compare:
+        # Load the baseline first: it may be the label this run is about to overwrite
+        baseline = load(args.compare)
+        print(f"[BENCH] Saved {save(run)}")
+        regressions = print_comparison(baseline, run, args.threshold)
+        sys.exit(1 if regressions else 0)
+    print(f"[BENCH] Saved {save(run)}")
+
+
+if __name__ == "__main__":
+    main()
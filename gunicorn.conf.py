@@ -0,0 +1,50 @@
+"""
+Multi-worker server: gunicorn supervises one uvicorn worker per core.
+
+    gunicorn -c gunicorn.conf.py backend.main:app
+
+- Migrations run once, in the master, before any worker starts; the workers
+  only check the schema version (AUTO_MIGRATE=0).
+- The workers share the SQLite database (WAL mode, see backend/db.py), the
+  media and reports directories and METRICS_DIR, where /metrics sums them.
+- Background compaction runs in one worker only, the one holding the lock
+  file next to the database (see backend/compaction.py).
+- SIGTERM: gunicorn stops accepting connections and each worker finishes its
+  in-flight webhooks, then runs the app's shutdown (compaction pass, metrics,
+  spans and logs) within GRACEFUL_TIMEOUT seconds.
+
+The master never imports the backend: the app is loaded in each worker after
+the fork, so every worker starts its own background threads.
+"""
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+# Read by backend.config when the workers import it
+os.environ.setdefault("AUTO_MIGRATE", "0")
+os.environ.setdefault("METRICS_DIR", os.path.join(tempfile.gettempdir(), "chatbot-metrics"))
+# The phone -> latest complaint cache is invalidated only in the worker that files
+# a complaint; the others would serve a stale reference number
+os.environ.setdefault("COMPLAINT_LOOKUP_CACHE_SIZE", "0")
+
+bind = os.getenv("BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = False
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))  # a worker silent this long is restarted
+keepalive = 5
+accesslog = None
+errorlog = "-"
+
+
+def on_starting(server):
+    root = os.path.dirname(os.path.abspath(__file__))
+    server.log.info("Running migrations")
+    subprocess.run([sys.executable, "-m", "backend.migrations"], cwd=os.getcwd(), check=True,
+                   env=dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.getenv("PYTHONPATH")]))))
+    # Counts of a previous run's workers are not part of this one
+    shutil.rmtree(os.environ["METRICS_DIR"], ignore_errors=True)
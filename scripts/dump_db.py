@@ -34,7 +34,7 @@ def serialize_complaint(complaint):
         "name": complaint.name,
         "phone_number": complaint.phone_number,
         "district": complaint.district,
-        "documents": complaint.documents,
+        "documents": [document.path for document in complaint.attachments],
         "created_at": complaint.created_at.isoformat() if complaint.created_at else None,
         "updated_at": _safe_iso(complaint.updated_at),
     }
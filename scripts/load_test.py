@@ -0,0 +1,352 @@
+"""
+Load generator for /webhook.
+
+Synthetic users arrive as a Poisson process (--rate users per second) and each walks
+one full flow - new complaint, status check, account unfreeze or other query - with
+exponentially distributed think time between messages. Every webhook call is timed
+and attributed to its state transition (e.g. "complaint:fraud_type"); the report gives
+throughput, latency percentiles and error rates overall and per transition.
+
+With --spawn-server the script starts the Graph and Gemini stand-ins
+(scripts/stub_graph.py, scripts/stub_gemini.py) and a uvicorn server wired to them,
+on a scratch database and media/reports directories, so nothing real is contacted or
+overwritten.
+
+Usage:
+    python -m scripts.load_test --spawn-server --users 2000 --rate 50
+    python -m scripts.load_test --url http://localhost:8000/webhook --users 500 --rate 20 --json out.json
+
+Needs httpx (pip install httpx).
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FLOW_MIX = {"complaint": 0.4, "status": 0.25, "unfreeze": 0.2, "other": 0.15}
+
+OTHER_QUESTIONS = [
+    "what documents do I need to report a fraud?",
+    "how long does the bank take to refund money after a complaint",
+    "someone is asking me for an OTP on call, what should I do",
+    "can I report fraud for my father",
+]
+
+_message_ids = itertools.count(1)
+
+
+# --- Synthetic users ---
+
+def _details(user_id):
+    return [
+        f"User {user_id}",
+        f"Parent {user_id}",
+        "01/01/1990",
+        f"9{user_id:09d}"[-10:],
+        f"user{user_id}@example.com",
+        random.choice(["Male", "Female"]),
+        "Village",
+        "Post Office",
+        "Police Station",
+        "Khordha",
+        "751001",
+    ]
+
+
+def _text(body):
+    return {"type": "text", "text": {"body": body}}
+
+
+def _button(reply_id):
+    return {"type": "interactive", "interactive": {"type": "button_reply", "button_reply": {"id": reply_id, "title": reply_id}}}
+
+
+def _list(reply_id):
+    return {"type": "interactive", "interactive": {"type": "list_reply", "list_reply": {"id": reply_id, "title": reply_id}}}
+
+
+def _image(user_id, n):
+    return {"type": "image", "image": {"id": f"load{user_id}x{n}", "mime_type": "image/jpeg"}}
+
+
+def complaint_flow(user_id):
+    labels = ["Name", "Father Name", "DOB", "Phone", "Email", "Gender", "Village", "Post Office",
+              "Police Station", "District", "PIN"]
+    form = "\n".join(f"{label}: {value}" for label, value in zip(labels, _details(user_id)))
+    steps = [
+        ("complaint:greeting", _text("hi")),
+        ("complaint:menu", _button("A")),
+        ("complaint:category", _button("1")),
+        ("complaint:fraud_type", _list(str(random.randint(1, 23)))),
+        ("complaint:details_form", _text(form)),
+    ]
+    steps += [("complaint:document", _image(user_id, n)) for n in range(random.randint(1, 3))]
+    steps.append(("complaint:submit", _button("done")))
+    return steps
+
+
+def status_flow(user_id, phones):
+    phone = random.choice(phones) if phones else f"9{user_id:09d}"[-10:]
+    steps = [
+        ("status:greeting", _text("hi")),
+        ("status:menu", _button("B")),
+        ("status:lookup", _text(phone)),
+    ]
+    steps += [("status:verify", _text(value)) for value in _details(user_id)]
+    return steps
+
+
+def unfreeze_flow(user_id):
+    steps = [
+        ("unfreeze:greeting", _text("hi")),
+        ("unfreeze:menu", _button("C")),
+        ("unfreeze:account", _text(str(random.randint(10 ** 11, 10 ** 12 - 1)))),
+    ]
+    steps += [("unfreeze:details", _text(value)) for value in _details(user_id)]
+    return steps
+
+
+def other_flow(user_id):
+    return [
+        ("other:greeting", _text("hi")),
+        ("other:menu", _text("D")),
+        ("other:question", _text(random.choice(OTHER_QUESTIONS))),
+        ("other:back", _button("start")),
+    ]
+
+
+def build_flow(kind, user_id, phones):
+    if kind == "complaint":
+        return complaint_flow(user_id)
+    if kind == "status":
+        return status_flow(user_id, phones)
+    if kind == "unfreeze":
+        return unfreeze_flow(user_id)
+    return other_flow(user_id)
+
+
+def payload(wa_id, message):
+    message = {"from": wa_id, "id": f"wamid.load{next(_message_ids)}", "timestamp": str(int(time.time())), **message}
+    return {"object": "whatsapp_business_account",
+            "entry": [{"changes": [{"field": "messages", "value": {"messaging_product": "whatsapp", "messages": [message]}}]}]}
+
+
+# --- Driver ---
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)  # transition -> [seconds]
+        self.errors = defaultdict(int)  # transition -> count
+        self.error_samples = []
+        self.flows_completed = defaultdict(int)
+
+    def record(self, transition, seconds, error=None):
+        self.latencies[transition].append(seconds)
+        if error is not None:
+            self.errors[transition] += 1
+            if len(self.error_samples) < 10:
+                self.error_samples.append(f"{transition}: {error}")
+
+
+async def run_user(client, url, user_id, kind, think_ms, recorder, phones):
+    wa_id = f"9199{user_id:08d}"
+    for transition, message in build_flow(kind, user_id, phones):
+        start = time.perf_counter()
+        error = None
+        try:
+            response = await client.post(url, json=payload(wa_id, message))
+            if response.status_code != 200:
+                error = f"HTTP {response.status_code}"
+            elif not response.json().get("ok", False):
+                error = response.json().get("error", "ok=false")
+        except httpx.HTTPError as e:
+            error = type(e).__name__
+        recorder.record(transition, time.perf_counter() - start, error)
+        if error is not None:
+            return  # the conversation is off-script now
+        if think_ms > 0:
+            await asyncio.sleep(random.expovariate(1000.0 / think_ms))
+    recorder.flows_completed[kind] += 1
+    if kind == "complaint":
+        phones.append(f"9{user_id:09d}"[-10:])
+
+
+async def drive(url, users, rate, think_ms, concurrency, mix, seed):
+    random.seed(seed)
+    recorder = Recorder()
+    phones = []
+    kinds, weights = zip(*mix.items())
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=httpx.Timeout(60.0, pool=None)) as client:
+        tasks = []
+        start = time.perf_counter()
+        for user_id in range(1, users + 1):
+            kind = random.choices(kinds, weights)[0]
+            tasks.append(asyncio.create_task(run_user(client, url, user_id, kind, think_ms, recorder, phones)))
+            # Poisson arrivals: exponential gaps between users
+            await asyncio.sleep(random.expovariate(rate))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+    return recorder, elapsed
+
+
+# --- Report ---
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    # Nearest rank
+    index = max(0, math.ceil(q / 100.0 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def summarize(values, errors):
+    values = sorted(values)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "error_rate": errors / len(values) if values else 0.0,
+        "p50_ms": percentile(values, 50) * 1000,
+        "p90_ms": percentile(values, 90) * 1000,
+        "p99_ms": percentile(values, 99) * 1000,
+        "max_ms": (values[-1] if values else 0.0) * 1000,
+    }
+
+
+def build_report(recorder, elapsed, args):
+    all_latencies = [v for values in recorder.latencies.values() for v in values]
+    overall = summarize(all_latencies, sum(recorder.errors.values()))
+    overall["duration_s"] = elapsed
+    overall["throughput_rps"] = len(all_latencies) / elapsed if elapsed else 0.0
+    return {
+        "config": {"users": args.users, "rate": args.rate, "think_ms": args.think_ms, "concurrency": args.concurrency},
+        "overall": overall,
+        "flows_completed": dict(recorder.flows_completed),
+        "transitions": {name: summarize(values, recorder.errors[name]) for name, values in sorted(recorder.latencies.items())},
+        "error_samples": recorder.error_samples,
+    }
+
+
+def print_report(report):
+    overall = report["overall"]
+    print(f"\n{overall['requests']} requests in {overall['duration_s']:.1f}s = {overall['throughput_rps']:.1f} req/s, "
+          f"errors {overall['errors']} ({overall['error_rate']:.2%})")
+    print(f"latency p50 {overall['p50_ms']:.1f} ms  p90 {overall['p90_ms']:.1f} ms  "
+          f"p99 {overall['p99_ms']:.1f} ms  max {overall['max_ms']:.1f} ms")
+    print(f"flows completed: {report['flows_completed']}\n")
+    print(f"{'transition':26s} {'requests':>8s} {'err%':>6s} {'p50 ms':>8s} {'p90 ms':>8s} {'p99 ms':>8s} {'max ms':>8s}")
+    for name, row in report["transitions"].items():
+        print(f"{name:26s} {row['requests']:8d} {row['error_rate'] * 100:6.2f} {row['p50_ms']:8.1f} "
+              f"{row['p90_ms']:8.1f} {row['p99_ms']:8.1f} {row['max_ms']:8.1f}")
+    for sample in report["error_samples"]:
+        print(f"  error: {sample}")
+    for name, stats in report.get("stubs", {}).items():
+        print(f"{name}: {stats}")
+
+
+# --- Stand-ins and server ---
+
+def spawn_server(port, graph_port, gemini_port, workers):
+    """uvicorn on a scratch database, talking to the local stand-ins"""
+    workdir = tempfile.mkdtemp(prefix="loadtest-")
+    env = dict(
+        os.environ,
+        PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""),
+        WHATSAPP_TOKEN="stub",
+        PHONE_NUMBER_ID="stub",
+        GRAPH_API_BASE=f"http://127.0.0.1:{graph_port}",
+        GEMINI_API_KEY="stub",
+        GEMINI_API_ENDPOINT=f"http://127.0.0.1:{gemini_port}",
+        DEBUG_PRINT_REPLY="0",
+        MEDIA_DIR=os.path.join(workdir, "media"),
+        REPORTS_DIR=os.path.join(workdir, "reports"),
+    )
+    command = [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port),
+               "--workers", str(workers), "--log-level", "warning", "--no-access-log"]
+    server = subprocess.Popen(command, cwd=workdir, env=env, stdout=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return server, workdir
+        except httpx.HTTPError:
+            pass
+        if server.poll() is not None:
+            break
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("server did not start")
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in FLOW_MIX:
+            raise argparse.ArgumentTypeError(f"unknown flow {name!r} (choose from {', '.join(FLOW_MIX)})")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000/webhook")
+    parser.add_argument("--users", type=int, default=1000, help="synthetic users to run")
+    parser.add_argument("--rate", type=float, default=20.0, help="mean user arrivals per second (Poisson)")
+    parser.add_argument("--think-ms", type=float, default=500.0, help="mean pause between a user's messages (0 = none)")
+    parser.add_argument("--concurrency", type=int, default=256, help="max open connections")
+    parser.add_argument("--mix", type=parse_mix, default=FLOW_MIX, help="flow weights, e.g. complaint=2,status=1,other=1")
+    parser.add_argument("--seed", type=int, default=1930)
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--spawn-server", action="store_true", help="start stand-ins and a uvicorn server on a scratch DB")
+    parser.add_argument("--port", type=int, default=8000, help="port for --spawn-server")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for --spawn-server")
+    parser.add_argument("--graph-latency-ms", type=float, default=80.0)
+    parser.add_argument("--gemini-latency-ms", type=float, default=300.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="error rate of both stand-ins")
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn_server:
+        from scripts import stub_gemini, stub_graph
+
+        graph = stub_graph.serve(8092, args.graph_latency_ms, 20.0, args.error_rate)
+        gemini = stub_gemini.serve(8090, args.gemini_latency_ms, 50.0, args.error_rate)
+        server, workdir = spawn_server(args.port, 8092, 8090, args.workers)
+        args.url = f"http://127.0.0.1:{args.port}/webhook"
+        print(f"Server on {args.url} (database in {workdir})")
+
+    print(f"{args.users} users at {args.rate}/s, think time {args.think_ms} ms, mix {args.mix}")
+    try:
+        recorder, elapsed = asyncio.run(
+            drive(args.url, args.users, args.rate, args.think_ms, args.concurrency, args.mix, args.seed))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    report = build_report(recorder, elapsed, args)
+    if args.spawn_server:
+        report["stubs"] = {"graph": stub_graph.stats(), "gemini": dict(stub_gemini.STATS)}
+        graph.shutdown()
+        gemini.shutdown()
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
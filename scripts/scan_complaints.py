@@ -0,0 +1,78 @@
+"""
+Data-quality scan over the complaints table.
+
+Reads the validated columns in batches (plain column tuples, no ORM objects) and
+reports invalid phone numbers, emails, PIN codes, dates of birth and genders,
+plus PIN code / district mismatches.
+
+Usage:
+    python -m scripts.scan_complaints [--batch 5000] [--status submitted] [--json]
+"""
+import argparse
+import json
+
+from backend.db import SessionLocal
+from backend.models import Complaint
+from backend.validators import FIELD_VALIDATORS, validate_records
+
+COLUMNS = ["id", *FIELD_VALIDATORS, "district"]
+
+
+def _merge(total, report):
+    total["records"] += report["records"]
+    for field, counts in report["fields"].items():
+        merged = total["fields"].setdefault(field, {"valid": 0, "invalid": 0, "empty": 0, "invalid_ids": []})
+        for key in ("valid", "invalid", "empty"):
+            merged[key] += counts[key]
+        merged["invalid_ids"].extend(counts["invalid_ids"])
+    total["pin_district_mismatches"].extend(report["pin_district_mismatches"])
+
+
+def scan(session, batch=5000, status=None):
+    """Validate every complaint; returns the merged validate_records report"""
+    total = {"records": 0, "fields": {}, "pin_district_mismatches": []}
+    query = session.query(*[getattr(Complaint, column) for column in COLUMNS])
+    if status:
+        query = query.filter(Complaint.status == status)
+    last_id = 0
+    while True:
+        # Keyset pagination on the primary key
+        rows = query.filter(Complaint.id > last_id).order_by(Complaint.id).limit(batch).all()
+        if not rows:
+            break
+        _merge(total, validate_records([dict(zip(COLUMNS, row)) for row in rows]))
+        last_id = rows[-1][0]
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=5000)
+    parser.add_argument("--status", help="only complaints with this status (e.g. submitted)")
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        report = scan(session, args.batch, args.status)
+    finally:
+        session.close()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"Scanned {report['records']} complaints")
+    for field, counts in report["fields"].items():
+        ids = ", ".join(str(i) for i in counts["invalid_ids"][:10])
+        more = " ..." if counts["invalid"] > 10 else ""
+        print(f"  {field:15s} valid {counts['valid']:7d}  invalid {counts['invalid']:7d}  empty {counts['empty']:7d}"
+              + (f"  ids: {ids}{more}" if ids else ""))
+    mismatches = report["pin_district_mismatches"]
+    print(f"PIN code / district mismatches: {len(mismatches)}")
+    for item in mismatches[:20]:
+        print(f"  #{item['id']}: {item['message']}")
+
+
+if __name__ == "__main__":
+    main()
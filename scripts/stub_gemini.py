@@ -0,0 +1,178 @@
+"""
+Local stand-in for the Gemini REST API, for exercising the NLU code without quota.
+
+Answers intent prompts (single and batched) with the keyword detector and returns
+a canned text for everything else. Latency and error rate are configurable so
+timeouts, hedging, the circuit breaker and batching can be observed.
+
+Usage:
+    python -m scripts.stub_gemini --port 8090 --latency-ms 400
+    GEMINI_API_KEY=stub GEMINI_API_ENDPOINT=http://localhost:8090 uvicorn backend.main:app
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from backend.nlu import _keyword_intent_detection
+
+CANNED_ANSWER = (
+    "You can report cyber fraud by calling 1930 or through this chat. "
+    "Send 'A' to file a new complaint or 'B' to check the status of an existing one. "
+    "Please keep your transaction details and screenshots ready."
+)
+
+_SINGLE_MESSAGE = re.compile(r'User message: "(.*)"')
+
+STATS = {"requests": 0, "intent_single": 0, "intent_batch": 0, "batched_messages": 0, "text": 0, "errors": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(key, amount=1):
+    with _stats_lock:
+        STATS[key] += amount
+
+
+def _classify(message):
+    intent, confidence = _keyword_intent_detection(message)
+    if intent == "unknown":
+        intent, confidence = "other_query", 0.4
+    return intent, confidence
+
+
+def answer_for(prompt):
+    """Return the model text the stand-in gives for a prompt"""
+    if "Messages (JSON array" in prompt:
+        array_line = prompt.split("Messages (JSON array", 1)[1].split("\n", 2)[1]
+        messages = json.loads(array_line)
+        _count("intent_batch")
+        _count("batched_messages", len(messages))
+        results = []
+        for i, message in enumerate(messages):
+            intent, confidence = _classify(message)
+            results.append({"id": i, "intent": intent, "confidence": confidence})
+        return json.dumps(results)
+
+    match = _SINGLE_MESSAGE.search(prompt)
+    if match and '"intent"' in prompt:
+        _count("intent_single")
+        intent, confidence = _classify(match.group(1))
+        return json.dumps({"intent": intent, "confidence": confidence, "reasoning": "stub"})
+
+    _count("text")
+    return CANNED_ANSWER
+
+
+def _response_body(text, prompt):
+    return {
+        "candidates": [{
+            "content": {"parts": [{"text": text}], "role": "model"},
+            "finish_reason": "STOP",
+            "index": 0,
+        }],
+        "usage_metadata": {
+            "prompt_token_count": len(prompt) // 4,
+            "candidates_token_count": len(text) // 4,
+            "total_token_count": (len(prompt) + len(text)) // 4,
+        },
+    }
+
+
+def make_handler(latency_ms, jitter_ms, error_rate):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send_json(self, status, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                with _stats_lock:
+                    self._send_json(200, dict(STATS))
+                return
+            self._send_json(404, {"error": {"message": "not found"}})
+
+        def do_POST(self):
+            _count("requests")
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            prompt = "".join(
+                part.get("text", "")
+                for content in request.get("contents", [])
+                for part in content.get("parts", [])
+            )
+            delay = max(0.0, latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000.0
+            time.sleep(delay)
+            if random.random() < error_rate:
+                _count("errors")
+                self._send_json(503, {"error": {"code": 503, "message": "stub overloaded", "status": "UNAVAILABLE"}})
+                return
+            if ":streamGenerateContent" in self.path:
+                self._stream(answer_for(prompt), prompt, delay)
+                return
+            if ":generateContent" not in self.path:
+                self._send_json(404, {"error": {"message": f"unsupported path {self.path}"}})
+                return
+            self._send_json(200, _response_body(answer_for(prompt), prompt))
+
+        def _stream(self, text, prompt, delay):
+            """Send the answer a few words at a time, as SSE or as a streamed JSON array"""
+            words = text.split(" ")
+            pieces = [" ".join(words[i:i + 4]) + (" " if i + 4 < len(words) else "") for i in range(0, len(words), 4)]
+            sse = "alt=sse" in self.path
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream" if sse else "application/json")
+            self.end_headers()
+            if not sse:
+                self.wfile.write(b"[")
+            for i, piece in enumerate(pieces):
+                body = json.dumps(_response_body(piece, prompt))
+                if sse:
+                    self.wfile.write(f"data: {body}\r\n\r\n".encode("utf-8"))
+                else:
+                    self.wfile.write(((", " if i else "") + body).encode("utf-8"))
+                self.wfile.flush()
+                time.sleep(delay / max(1, len(pieces)))
+            if not sse:
+                self.wfile.write(b"]")
+            self.wfile.flush()
+            self.close_connection = True
+
+    return Handler
+
+
+def serve(port=8090, latency_ms=200.0, jitter_ms=50.0, error_rate=0.0):
+    """Start the stand-in in a background thread and return the server"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency_ms, jitter_ms, error_rate))
+    threading.Thread(target=server.serve_forever, name="stub-gemini", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = serve(args.port, args.latency_ms, args.jitter_ms, args.error_rate)
+    print(f"Stub Gemini listening on http://127.0.0.1:{args.port}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Local stand-in for the WhatsApp Cloud (Graph) API, for load tests without sending real messages.
+
+Accepts POST /{version}/{phone_number_id}/messages and answers like Graph does, serves
+media lookups (GET /{version}/{media_id}) and the media bytes. Counts messages per
+type and per recipient. Latency and error rate are configurable.
+
+Usage:
+    python -m scripts.stub_graph --port 8092 --latency-ms 80
+    WHATSAPP_TOKEN=stub PHONE_NUMBER_ID=stub GRAPH_API_BASE=http://localhost:8092 uvicorn backend.main:app
+"""
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 1x1 white JPEG, served for every media download
+PIXEL_JPEG = bytes.fromhex(
+    "ffd8ffe000104a46494600010100000100010000ffdb004300080606070605080707070909080a0c140d0c0b0b0c1912130f141d1a1f1e1d1a1c1c20242e2720222c231c1c2837292c30313434341f27393d38323c2e333432"
+    "ffc0000b080001000101011100ffc4001f0000010501010101010100000000000000000102030405060708090a0bffc400b5100002010303020403050504040000017d01020300041105122131410613516107227114328191a1082342b1c11552d1f02433627282090a161718191a25262728292a3435363738393a434445464748494a535455565758595a636465666768696a737475767778797a838485868788898a92939495969798999aa2a3a4a5a6a7a8a9aab2b3b4b5b6b7b8b9bac2c3c4c5c6c7c8c9cad2d3d4d5d6d7d8d9dae1e2e3e4e5e6e7e8e9eaf1f2f3f4f5f6f7f8f9faffda0008010100003f00fbfcffd9"
+)
+
+STATS = {"requests": 0, "messages": 0, "media_lookups": 0, "media_downloads": 0, "errors": 0}
+BY_TYPE = Counter()
+BY_RECIPIENT = Counter()
+_stats_lock = threading.Lock()
+_message_ids = itertools.count(1)
+
+
+def _count(key, amount=1):
+    with _stats_lock:
+        STATS[key] += amount
+
+
+def stats():
+    with _stats_lock:
+        return {**STATS, "by_type": dict(BY_TYPE), "recipients": len(BY_RECIPIENT)}
+
+
+def make_handler(latency_ms, jitter_ms, error_rate):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body, content_type="application/json"):
+            data = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _delay(self):
+            time.sleep(max(0.0, latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000.0)
+
+        def do_GET(self):
+            _count("requests")
+            if self.path == "/stats":
+                self._send(200, stats())
+                return
+            parts = self.path.strip("/").split("/")
+            if parts[0] == "media" and len(parts) == 2:
+                _count("media_downloads")
+                self._send(200, PIXEL_JPEG, "image/jpeg")
+                return
+            if len(parts) == 2:
+                _count("media_lookups")
+                self._delay()
+                host = self.headers.get("Host", "localhost")
+                self._send(200, {"id": parts[1], "mime_type": "image/jpeg", "url": f"http://{host}/media/{parts[1]}"})
+                return
+            self._send(404, {"error": {"message": f"unsupported path {self.path}"}})
+
+        def do_POST(self):
+            _count("requests")
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not self.path.endswith("/messages"):
+                self._send(404, {"error": {"message": f"unsupported path {self.path}"}})
+                return
+            self._delay()
+            if random.random() < error_rate:
+                _count("errors")
+                self._send(500, {"error": {"message": "stub error", "type": "OAuthException", "code": 131000}})
+                return
+            to = request.get("to", "")
+            kind = request.get("type", "")
+            if kind == "interactive":
+                kind = f"interactive:{request.get('interactive', {}).get('type', '')}"
+            with _stats_lock:
+                STATS["messages"] += 1
+                BY_TYPE[kind] += 1
+                BY_RECIPIENT[to] += 1
+            self._send(200, {
+                "messaging_product": "whatsapp",
+                "contacts": [{"input": to, "wa_id": to}],
+                "messages": [{"id": f"wamid.stub{next(_message_ids)}"}],
+            })
+
+    return Handler
+
+
+def serve(port=8092, latency_ms=80.0, jitter_ms=20.0, error_rate=0.0):
+    """Start the stand-in in a background thread and return the server"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency_ms, jitter_ms, error_rate))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="stub-graph", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8092)
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = serve(args.port, args.latency_ms, args.jitter_ms, args.error_rate)
+    print(f"Stub Graph API listening on http://127.0.0.1:{args.port}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()